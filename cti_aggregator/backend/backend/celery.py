@@ -1,6 +1,9 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
+from django.utils.text import slugify
+from ioc_scraper.sources import INTEL_SOURCES, AdaptiveSourceSchedule
 import logging
 
 # Configure logging
@@ -20,8 +23,49 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Auto-discover tasks from Django apps
 app.autodiscover_tasks()
 
+# Queues by workload, each served by its own worker pool (see docker-compose "workers" profile):
+#   http-scrape    - blog scrapers, many concurrent HTTP requests (gevent)
+#   headless       - scrapers that may drive a Chrome instance (prefork, low concurrency)
+#   falcon-api     - CrowdStrike Falcon API syncs (gevent, bounded by the API rate limit)
+#   db-maintenance - feed imports, snapshots, health and cleanup (prefork)
+TASK_QUEUES = {
+    'ioc_scraper.tasks.fetch_all_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_cisco_talos_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_microsoft_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_mandiant_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_unit42_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_zscaler_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_google_tag_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_orange_defense_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_dark_reading_intelligence': 'http-scrape',
+    'ioc_scraper.tasks.fetch_dark_reading_enhanced': 'headless',
+    'ioc_scraper.tasks.fetch_crowdstrike_intel': 'falcon-api',
+    'ioc_scraper.tasks.fetch_crowdstrike_actors': 'falcon-api',
+    'ioc_scraper.tasks.fetch_crowdstrike_malware': 'falcon-api',
+    'ioc_scraper.tasks.fetch_crowdstrike_indicators': 'falcon-api',
+    'ioc_scraper.tasks.summarize_crowdstrike_intel': 'falcon-api',
+    'ioc_scraper.tasks.update_tailored_intelligence': 'falcon-api',
+    'ioc_scraper.tasks.fetch_cisa_vulnerabilities': 'db-maintenance',
+    'ioc_scraper.tasks.process_intelligence_data': 'db-maintenance',
+    'ioc_scraper.tasks.rebuild_ioc_matcher': 'db-maintenance',
+    'ioc_scraper.tasks.system_health_check': 'db-maintenance',
+    'ioc_scraper.tasks.refresh_system_health': 'db-maintenance',
+}
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Route tasks to their workload queue; per-source fetches follow the source's configured queue."""
+    if name == 'ioc_scraper.tasks.fetch_intel_source':
+        source = args[0] if args else kwargs.get('source_name')
+        return {'queue': INTEL_SOURCES.get(source, {}).get('queue', 'http-scrape')}
+    if name in TASK_QUEUES:
+        return {'queue': TASK_QUEUES[name]}
+    return None
+
 # Configure Celery
 app.conf.update(
+    # Routing (unrouted tasks go to the default "celery" queue)
+    task_routes=(route_task,),
+    
     # Broker settings
     broker_connection_retry=True,
     broker_connection_retry_on_startup=True,
@@ -29,6 +73,7 @@ app.conf.update(
     
     # Result backend settings
     result_expires=60 * 60 * 24,  # Results expire after 1 day
+    task_track_started=True,       # Report STARTED so task-status can tell queued from running
     
     # Task settings
     task_acks_late=True,           # Tasks are acknowledged after execution (better for retries)
@@ -64,14 +109,18 @@ app.conf.beat_schedule = {
         },
     },
     
-    # Intelligence articles every hour (changed from every 4 hours)
-    "fetch-intelligence-articles": {
-        "task": "ioc_scraper.tasks.fetch_all_intelligence",
-        "schedule": crontab(hour='*', minute=0),  # Every hour
-        "options": {
-            "expires": 60 * 60 * 3,  # Task expires after 3 hours
-            "retry": True,
-        },
+    # Intelligence articles: one entry per source, polled at an adaptive interval
+    **{
+        f"fetch-intelligence-{slugify(source)}": {
+            "task": "ioc_scraper.tasks.fetch_intel_source",
+            "schedule": AdaptiveSourceSchedule(source),
+            "args": (source,),
+            "options": {
+                "expires": 60 * 15,  # Late runs are dropped; the schedule is re-evaluated anyway
+                "retry": True,
+            },
+        }
+        for source in INTEL_SOURCES
     },
     
     # CrowdStrike intelligence every 6 hours
@@ -94,6 +143,15 @@ app.conf.beat_schedule = {
         },
     },
     
+    # Refresh the cached health report served by /api/system-health/
+    'refresh-system-health': {
+        'task': 'ioc_scraper.tasks.refresh_system_health',
+        'schedule': 60 * 5,  # Every 5 minutes
+        "options": {
+            "expires": 60 * 4,  # Skip if the next run is already due
+        },
+    },
+    
     # Daily system health check and cleanup
     'system-health-check': {
         'task': 'ioc_scraper.tasks.system_health_check',
@@ -104,6 +162,22 @@ app.conf.beat_schedule = {
     },
 }
 
+@worker_init.connect
+def make_psycopg_cooperative(**kwargs):
+    """
+    Under the gevent pool, make psycopg2 yield to the gevent hub while it waits on
+    Postgres. Without this every query (e.g. the Falcon bulk upserts) blocks all
+    greenlets of the worker and --concurrency adds no throughput.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return
+    if monkey.is_module_patched('socket'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+        logger.info("Patched psycopg2 for the gevent pool")
+
 @app.task(bind=True)
 def debug_task(self):
     """Task to verify that Celery is working correctly."""
@@ -135,10 +135,30 @@ DATABASES = {
     }
 }
 
+# Shared cache on Redis so web and worker processes see the same entries (e.g. the health report)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get(
+            'REDIS_CACHE_URL',
+            f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', '6379')}/1",
+        ),
+        'KEY_PREFIX': 'cti',
+    }
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'stats': os.environ.get('STATS_THROTTLE_RATE', '60/min'),
+    },
+}
+
 # Celery databases
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Results and progress states of tasks started from the API (polled by the task-status endpoints)
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
 
 
 
@@ -189,6 +209,15 @@ STATICFILES_DIRS = [
 # URL prefix for data files
 DATA_FILES_URL = '/data_files/'
 
+# Memory-mapped IOC matcher snapshot (must be on a volume shared by web and worker processes)
+IOC_MATCHER_SNAPSHOT = os.environ.get('IOC_MATCHER_SNAPSHOT', os.path.join(BASE_DIR, 'data', 'ioc_matcher.snap'))
+
+# Intelligence article retention (see ioc_scraper.retention): articles older than the hot window
+# move to the monthly-partitioned archive table, archive partitions past retention are dropped
+# (0 keeps the archive forever)
+ARTICLE_HOT_MONTHS = int(os.environ.get('ARTICLE_HOT_MONTHS', '6'))
+ARTICLE_RETENTION_MONTHS = int(os.environ.get('ARTICLE_RETENTION_MONTHS', '36'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from ioc_scraper.models import Vulnerability, IntelligenceArticle, CrowdStrikeIntel, CrowdStrikeMalware, CrowdStrikeTailoredIntel
+from ioc_scraper.models import (
+    Vulnerability, CISAKev, IntelligenceArticle, CrowdStrikeIntel, CrowdStrikeMalware, CrowdStrikeTailoredIntel, Indicator
+)
 
 class VulnerabilitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,54 +13,29 @@ class CISAKevSerializer(serializers.ModelSerializer):
     id = serializers.CharField()
     cveID = serializers.CharField(source='cve_id')
     vulnerabilityName = serializers.CharField(source='vulnerability_name')
-    dateAdded = serializers.DateField(source='published_date')
+    dateAdded = serializers.DateField(source='date_added')
     shortDescription = serializers.CharField(source='description')
-    vendorProject = serializers.SerializerMethodField()
-    product = serializers.SerializerMethodField()
+    vendorProject = serializers.CharField(source='vendor_project')
+    product = serializers.CharField()
     severityLevel = serializers.CharField(source='severity')
-    requiredAction = serializers.SerializerMethodField()
-    dueDate = serializers.SerializerMethodField()
+    requiredAction = serializers.CharField(source='required_action')
+    dueDate = serializers.DateField(source='due_date')
+    knownRansomwareCampaignUse = serializers.CharField(source='known_ransomware_campaign_use')
+    notes = serializers.CharField()
     
     class Meta:
-        model = Vulnerability
+        model = CISAKev
         fields = [
             'id', 'cveID', 'vulnerabilityName', 'dateAdded', 
             'shortDescription', 'requiredAction', 'dueDate',
-            'vendorProject', 'product', 'severityLevel'
+            'vendorProject', 'product', 'severityLevel',
+            'knownRansomwareCampaignUse', 'notes'
         ]
-    
-    def get_vendorProject(self, obj):
-        # Try to extract vendor from vulnerability name or return a default
-        if 'Microsoft' in obj.vulnerability_name:
-            return 'Microsoft'
-        elif 'Adobe' in obj.vulnerability_name:
-            return 'Adobe'
-        elif 'Cisco' in obj.vulnerability_name:
-            return 'Cisco'
-        elif 'Oracle' in obj.vulnerability_name:
-            return 'Oracle'
-        elif 'VMware' in obj.vulnerability_name:
-            return 'VMware'
-        # Add more vendors as needed
-        return 'Unknown'
-    
-    def get_product(self, obj):
-        # Try to extract product from vulnerability name or description
-        # This is a simple implementation; you might want to enhance it
-        return 'Affected Product'
-    
-    def get_requiredAction(self, obj):
-        return "Apply vendor patch or update as available."
-    
-    def get_dueDate(self, obj):
-        # You could calculate a due date based on severity and published date
-        # For now, just return None
-        return None
 
 class IntelligenceArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = IntelligenceArticle
-        fields = "__all__"
+        exclude = ['minhash']
 
 class CrowdStrikeIntelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -133,3 +110,8 @@ class CrowdStrikeTailoredIntelSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'matched_rule_names') and obj.matched_rule_names:
             return obj.matched_rule_names
         return []
+
+class IndicatorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Indicator
+        exclude = ['reversed_domain']
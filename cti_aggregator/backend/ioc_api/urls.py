@@ -7,12 +7,23 @@ from .views import (
     CrowdStrikeMalwareViewSet,
     CISAKevViewSet,
     CrowdStrikeTailoredIntelViewSet,
+    IndicatorViewSet,
     get_cira_data,
     refresh_intelligence,
     refresh_tailored_intel,
+    task_status,
+    task_events,
     threat_intelligence_feed,
     test_crowdstrike_api,
-    health_check
+    livez,
+    readyz,
+    health_check,
+    system_health,
+    statistics,
+    vendor_rollup,
+    indicator_lookup,
+    ioc_match,
+    export_dataset
 )
 
 router = DefaultRouter()
@@ -22,13 +33,24 @@ router.register(r'crowdstrike-intel', CrowdStrikeIntelViewSet)
 router.register(r'crowdstrike/malware', CrowdStrikeMalwareViewSet, basename='crowdstrike-malware')
 router.register(r'cisa/kev', CISAKevViewSet, basename='cisa-kev')
 router.register(r'crowdstrike/tailored-intel', CrowdStrikeTailoredIntelViewSet, basename='crowdstrike-tailored-intel')
+router.register(r'indicators', IndicatorViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('cira-data/', get_cira_data, name='cira-data'),
     path('refresh-intelligence/', refresh_intelligence, name='refresh-intelligence'),
     path('refresh-tailored-intel/', refresh_tailored_intel, name='refresh-tailored-intel'),
+    path('task-status/<str:task_id>/', task_status, name='task-status'),
+    path('task-events/<str:task_id>/', task_events, name='task-events'),
     path('threat-intelligence-feed/', threat_intelligence_feed, name='threat-intelligence-feed'),
     path('test-crowdstrike-api/', test_crowdstrike_api, name='test-crowdstrike-api'),
+    path('livez/', livez, name='livez'),
+    path('readyz/', readyz, name='readyz'),
     path('health-check/', health_check, name='health-check'),
+    path('system-health/', system_health, name='system-health'),
+    path('stats/', statistics, name='stats'),
+    path('vendor-rollup/', vendor_rollup, name='vendor-rollup'),
+    path('indicator-lookup/', indicator_lookup, name='indicator-lookup'),
+    path('ioc-match/', ioc_match, name='ioc-match'),
+    path('export/<slug:dataset>/', export_dataset, name='export-dataset'),
 ]
@@ -1,30 +1,59 @@
 from rest_framework import viewsets, filters
+from rest_framework.pagination import CursorPagination
 from django_filters.rest_framework import DjangoFilterBackend, CharFilter, FilterSet
-from ioc_scraper.models import Vulnerability, IntelligenceArticle, CrowdStrikeIntel, CrowdStrikeMalware, CISAKev, CrowdStrikeTailoredIntel
+from ioc_scraper.models import (
+    Vulnerability, IntelligenceArticle, CrowdStrikeIntel, CrowdStrikeMalware, CISAKev, CrowdStrikeTailoredIntel,
+    Indicator, normalize_entity_name
+)
 from .serializers import (
     VulnerabilitySerializer, 
     IntelligenceArticleSerializer, 
     CrowdStrikeIntelSerializer, 
     CrowdStrikeMalwareSerializer, 
     CISAKevSerializer,
-    CrowdStrikeTailoredIntelSerializer
+    CrowdStrikeTailoredIntelSerializer,
+    IndicatorSerializer
 )
 from django.db import models
 import os
 import sys
+import csv
 import hashlib
 import json
 import logging
-from django.http import FileResponse, HttpResponse, JsonResponse
+import asyncio
+from asgiref.sync import sync_to_async
+from celery.result import AsyncResult
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q
-from rest_framework.decorators import api_view, permission_classes
+from django.core.cache import cache
+from django.urls import reverse
+from django.db.models import Q, F, Count
+from django.utils.html import escape
+from itertools import groupby
+from operator import itemgetter
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from ioc_scraper.tasks import fetch_all_intelligence
+from ioc_scraper.tasks import (
+    fetch_all_intelligence, update_tailored_intelligence, ALL_INTELLIGENCE_LEASE, TAILORED_INTEL_LEASE,
+    PROGRESS_STATE,
+)
+from ioc_scraper.locks import enqueue_single_flight
+from ioc_scraper.stats import get_statistics_snapshot, ARTICLE_CATEGORY
+from ioc_scraper.matcher import get_matcher
+from ioc_scraper.health import check_readiness, get_cached_health
+from ioc_scraper.indicators import (
+    MAX_LOOKUP_OBSERVABLES, classify_observable, lookup_observables, normalize_domain, reverse_domain
+)
 from datetime import datetime
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK
-from django.views.decorators.cache import cache_control
+from rest_framework.status import HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST, HTTP_503_SERVICE_UNAVAILABLE
+from django.views.decorators.cache import never_cache
+from rest_framework.throttling import UserRateThrottle
 
 # Add the data_sources directory to the path
 sys.path.insert(0, os.path.join(settings.BASE_DIR, '..', 'data_sources'))
@@ -32,58 +61,106 @@ sys.path.insert(0, os.path.join(settings.BASE_DIR, '..', 'data_sources'))
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class JSONContainsFilter(CharFilter):
+    """
+    Exact element filter for JSON list columns.
+    A comma-separated value ("Espionage,Destruction") becomes a jsonb @> containment
+    lookup, so only rows whose list contains every element match, and the query can
+    use the column's jsonb_path_ops GIN index.
+    """
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        elements = [element.strip() for element in value.split(',') if element.strip()]
+        if not elements:
+            return qs
+        return qs.filter(**{f"{self.field_name}__contains": elements})
+
 # Custom filterset class for handling JSONField
 class CustomFilterSet(FilterSet):
     class Meta:
         filter_overrides = {
             models.JSONField: {
-                'filter_class': CharFilter,
-                'extra': lambda f: {
-                    'lookup_expr': 'icontains',
-                }
+                'filter_class': JSONContainsFilter,
             },
         }
 
+class EntityFilter(CharFilter):
+    """
+    Exact, case-insensitive filter against a normalized entity join table.
+    field_name is the many-to-many relation (e.g. 'threat_group_entities'), so the
+    lookup is an index probe on normalized_name followed by an indexed join.
+    """
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return qs.filter(**{f"{self.field_name}__normalized_name": normalize_entity_name(value)})
+
+class CrowdStrikeMalwareEntityFilterSet(CustomFilterSet):
+    ttp = EntityFilter(field_name='ttp_entities')
+    targeted_industry = EntityFilter(field_name='targeted_industry_entities')
+    threat_group = EntityFilter(field_name='threat_group_entities')
+
+    class Meta:
+        model = CrowdStrikeMalware
+        fields = ['name', 'threat_groups', 'targeted_industries', 'ttps']
+        filter_overrides = CustomFilterSet.Meta.filter_overrides
+
+class CrowdStrikeTailoredIntelFilterSet(CustomFilterSet):
+    threat_group = EntityFilter(field_name='threat_group_entities')
+    targeted_sector = EntityFilter(field_name='targeted_sector_entities')
+
+    class Meta:
+        model = CrowdStrikeTailoredIntel
+        fields = ['threat_groups', 'targeted_sectors', 'threat_groups_json', 'targeted_sectors_json']
+        filter_overrides = CustomFilterSet.Meta.filter_overrides
+
+class IndicatorFilterSet(CustomFilterSet):
+    domain = CharFilter(method='filter_domain')
+    ip = CharFilter(method='filter_ip')
+    value = CharFilter(method='filter_value')
+
+    class Meta:
+        model = Indicator
+        fields = ['indicator_type', 'malicious_confidence', 'malware_families', 'threat_groups']
+        filter_overrides = CustomFilterSet.Meta.filter_overrides
+
+    def filter_domain(self, qs, name, value):
+        # The domain and its subdomains: a prefix scan on the reversed labels
+        domain = normalize_domain(value)
+        return qs.filter(reversed_domain__startswith=reverse_domain(domain)) if domain else qs
+
+    def filter_ip(self, qs, name, value):
+        indicator_type, address = classify_observable(value)
+        if indicator_type not in ('ip_address', 'ip_address_block'):
+            return qs.none()
+        return qs.filter(ip_network__net_contains_or_equals=address)
+
+    def filter_value(self, qs, name, value):
+        return qs.filter(normalized_value=classify_observable(value)[1])
+
 class VulnerabilityViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows vulnerabilities to be viewed, created, updated, or deleted.
+    Filter by ?source=, ?vendor_project= and ?product= (each backed by an index).
     """
     queryset = Vulnerability.objects.all().order_by("-published_date")
     serializer_class = VulnerabilitySerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['cve_id', 'vulnerability_name', 'description']
+    filterset_fields = ['source', 'vendor_project', 'product', 'severity']
 
 class CISAKevViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that specifically returns CISA KEV vulnerabilities.
+    Served from the 'cisa_kev' rows of Vulnerability, newest additions first
+    via the (source, date_added) index.
     """
-    # Define a more comprehensive filter to identify CISA KEV vulnerabilities
-    # This approach uses multiple signals to identify vulnerabilities that came from CISA
-    queryset = Vulnerability.objects.all().order_by("-published_date")
-    
-    def get_queryset(self):
-        """
-        Return vulnerabilities that match CISA KEV characteristics.
-        We use multiple filter criteria to identify CISA KEV data:
-        1. URLs containing cisa.gov (direct identification)
-        2. CVE IDs that follow the CVE-YYYY-NNNNN format
-        3. Vulnerabilities with the characteristics of CISA KEV data
-        """
-        # Build a comprehensive filter
-        return Vulnerability.objects.filter(
-            # Either the URL contains cisa.gov
-            Q(source_url__contains="cisa.gov") |
-            # Or it has a well-formed CVE ID and looks like KEV data
-            (
-                Q(cve_id__regex=r'^CVE-\d{4}-\d+$') &
-                # Typically CISA KEV entries have these characteristics
-                ~Q(vulnerability_name="Unknown") &
-                ~Q(description="No description provided")
-            )
-        ).order_by("-published_date")
-        
+    queryset = CISAKev.objects.all().order_by("-date_added")
     serializer_class = CISAKevSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['cve_id', 'vulnerability_name', 'description']
-    filterset_fields = ['severity']
+    filterset_fields = ['vendor_project', 'product', 'known_ransomware_campaign_use']
 
 class IntelligenceArticleViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -91,9 +168,16 @@ class IntelligenceArticleViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = IntelligenceArticle.objects.all().order_by("-published_date")
     serializer_class = IntelligenceArticleSerializer
-    filterset_fields = ['source']
+    filterset_fields = ['source', 'cluster_id']
     search_fields = ['title', 'summary']
 
+    def get_queryset(self):
+        queryset = super().get_queryset().defer('minhash')
+        # ?collapse=1 returns one article per near-duplicate cluster (its oldest remaining member)
+        if self.request.query_params.get('collapse') in ('1', 'true'):
+            queryset = queryset.filter(Q(cluster_id__isnull=True) | Q(cluster_id=F('id')))
+        return queryset
+
 class CrowdStrikeIntelViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows CrowdStrike threat intelligence to be viewed.
@@ -106,7 +190,7 @@ class CrowdStrikeIntelViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = type('CrowdStrikeIntelFilterSet', (CustomFilterSet,), {
         'Meta': type('Meta', (), {
             'model': CrowdStrikeIntel,
-            'fields': ['adversary_type'],
+            'fields': ['adversary_type', 'capabilities', 'motivations', 'origins'],
             'filter_overrides': CustomFilterSet.Meta.filter_overrides
         })
     })
@@ -142,13 +226,7 @@ class CrowdStrikeMalwareViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['name', 'threat_groups']
     search_fields = ['name', 'description', 'targeted_industries', 'ttps']
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_class = type('CrowdStrikeMalwareFilterSet', (CustomFilterSet,), {
-        'Meta': type('Meta', (), {
-            'model': CrowdStrikeMalware,
-            'fields': ['name', 'threat_groups', 'targeted_industries'],
-            'filter_overrides': CustomFilterSet.Meta.filter_overrides
-        })
-    })
+    filterset_class = CrowdStrikeMalwareEntityFilterSet
 
 class CrowdStrikeTailoredIntelViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -161,6 +239,32 @@ class CrowdStrikeTailoredIntelViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['threat_groups', 'targeted_sectors']
     search_fields = ['title', 'summary']
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    # ?threat_group=COZY BEAR&targeted_sector=Healthcare resolve through the indexed join tables
+    filterset_class = CrowdStrikeTailoredIntelFilterSet
+
+class StatsRateThrottle(UserRateThrottle):
+    # Per-client limit for the statistics endpoints (REST_FRAMEWORK DEFAULT_THROTTLE_RATES['stats'])
+    scope = 'stats'
+
+class IndicatorPagination(CursorPagination):
+    # The indicator table is too large to return unpaginated; keyset pages stay cheap at any depth
+    ordering = ('-published_date', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+class IndicatorViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint that allows indicators of compromise to be viewed.
+    ?domain= matches the domain and its subdomains (reversed-label prefix index),
+    ?ip= matches stored addresses and CIDR blocks containing the address (GiST
+    inet index) and ?value= is an exact normalized-value lookup (hash index).
+    """
+    queryset = Indicator.objects.all()
+    serializer_class = IndicatorSerializer
+    pagination_class = IndicatorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = IndicatorFilterSet
 
 # CIRA Data endpoint
 def get_cira_data(request):
@@ -187,13 +291,14 @@ def refresh_intelligence(request):
     Endpoint to manually trigger intelligence feed refresh
     """
     try:
-        # Run the task synchronously for immediate feedback
-        result = fetch_all_intelligence.delay()
+        # Attach to a queued or running refresh instead of starting a duplicate
+        task_id, started = enqueue_single_flight(fetch_all_intelligence, ALL_INTELLIGENCE_LEASE)
         
         return JsonResponse({
             "status": "success",
-            "message": "Intelligence refresh task started",
-            "task_id": result.id
+            "message": "Intelligence refresh task started" if started else "Intelligence refresh already in progress",
+            "task_id": task_id,
+            "attached": not started,
         })
     except Exception as e:
         logger.error(f"Error starting intelligence refresh: {str(e)}")
@@ -202,45 +307,218 @@ def refresh_intelligence(request):
             "message": f"Failed to start intelligence refresh: {str(e)}"
         }, status=500)
 
+# Datasets available through the streaming export endpoint.
+# Each entry gives the base queryset, the exported columns, the column used by ?since=
+# and the unique column that breaks ties between rows sharing a since value (?after_id=)
+EXPORT_DATASETS = {
+    'articles': {
+        'queryset': lambda: IntelligenceArticle.objects.all(),
+        'fields': ['id', 'title', 'source', 'url', 'published_date', 'summary',
+                   'threat_actor_type', 'target_industries'],
+        'since_field': 'published_date',
+        'key_field': 'id',
+    },
+    'kev': {
+        'queryset': lambda: CISAKev.objects.all(),
+        'fields': ['id', 'cve_id', 'vulnerability_name', 'description', 'date_added', 'due_date',
+                   'vendor_project', 'product', 'required_action', 'known_ransomware_campaign_use', 'notes',
+                   'updated_at'],
+        # date_added is a DateField; a timestamp cursor also picks up entries CISA revised
+        'since_field': 'updated_at',
+        'key_field': 'id',
+    },
+    'tailored-intel': {
+        'queryset': lambda: CrowdStrikeTailoredIntel.objects.all(),
+        'fields': ['report_id', 'title', 'publish_date', 'last_updated', 'summary', 'report_url',
+                   'threat_groups_json', 'targeted_sectors_json'],
+        'since_field': 'last_updated',
+        'key_field': 'report_id',
+    },
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+class _EchoBuffer:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+def _parse_since(value):
+    """Parse an ISO date or datetime from the since= parameter, returning an aware datetime."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            return None
+        parsed = datetime.combine(parsed_date, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+class _ExportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps microseconds, so an exported timestamp can be passed back as since=."""
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=_ExportJSONEncoder) + "\n"
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def _iter_csv(rows, fields):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+def export_dataset(request, dataset):
+    """
+    Stream a full dataset as NDJSON (default) or CSV for bulk consumers such as a SIEM.
+
+    Query parameters:
+        format: 'ndjson' or 'csv'
+        since: ISO date/datetime; only rows whose since-column is at or after it are exported
+        after_id: with since, skip the rows at exactly since whose key is not above after_id
+
+    Rows are read with a server-side cursor via .iterator(chunk_size=...) and written
+    as they are produced, so memory stays flat regardless of table size. Output is
+    ordered by (since-column, key), where the key is the dataset's unique column
+    (id, or report_id for tailored-intel), so the last row's value and key can be
+    passed as the next since= and after_id=. Timestamps are written with full
+    microsecond precision so the boundary compares equal to the stored value. since is inclusive because many rows can share one
+    value (a KEV sync stamps a whole batch with one updated_at); without after_id the
+    rows at the boundary are exported again rather than skipped.
+    """
+    config = EXPORT_DATASETS.get(dataset)
+    if config is None:
+        return JsonResponse({
+            "status": "error",
+            "message": f"Unknown dataset '{dataset}'. Available: {', '.join(EXPORT_DATASETS)}"
+        }, status=404)
+
+    export_format = request.GET.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({"status": "error", "message": "format must be 'ndjson' or 'csv'"}, status=400)
+
+    queryset = config['queryset']()
+    since_field = config['since_field']
+    key_field = config['key_field']
+    since = request.GET.get('since')
+    if since:
+        since_value = _parse_since(since)
+        if since_value is None:
+            return JsonResponse({"status": "error", "message": f"Invalid since value: {since}"}, status=400)
+        queryset = queryset.filter(**{f"{since_field}__gte": since_value})
+        after_id = request.GET.get('after_id')
+        if after_id:
+            try:
+                after_key = queryset.model._meta.get_field(key_field).to_python(after_id)
+            except ValidationError:
+                return JsonResponse({"status": "error", "message": f"Invalid after_id value: {after_id}"}, status=400)
+            queryset = queryset.exclude(**{since_field: since_value, f"{key_field}__lte": after_key})
+
+    fields = config['fields']
+    rows = queryset.order_by(since_field, key_field).values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(_iter_csv(rows, fields), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.csv"'
+    else:
+        response = StreamingHttpResponse(_iter_ndjson(rows), content_type='application/x-ndjson')
+    return response
+
+FEED_DEFAULT_PER_SOURCE = 25
+FEED_MAX_PER_SOURCE = 200
+
+FEED_STYLE = (
+    "body { font-family: Arial, sans-serif; margin: 20px; }"
+    "h1 { color: #333; }"
+    "h2 { color: #444; background-color: #f5f5f5; padding: 10px; margin-top: 30px; }"
+    ".article { margin-bottom: 15px; border-bottom: 1px solid #eee; padding-bottom: 15px; }"
+    ".article h3 { margin: 0 0 5px 0; }"
+    ".article .meta { color: #666; font-size: 0.8em; margin-bottom: 8px; }"
+    ".article .summary { font-size: 0.9em; }"
+)
+
+def _positive_int(value, default, maximum=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    if number < 1:
+        return default
+    return min(number, maximum) if maximum else number
+
+def _render_feed(rows, source_totals, total_articles, page, per_source):
+    """Yield the feed HTML piece by piece while iterating the grouped rows."""
+    yield "<html><head><title>Threat Intelligence Feed</title>"
+    yield f"<style>{FEED_STYLE}</style></head><body>"
+    yield "<h1>Threat Intelligence Feed</h1>"
+    yield f"<p>Total articles: {total_articles} | Page {page} ({per_source} articles per source)</p>"
+
+    has_more = any(total > page * per_source for total in source_totals.values())
+    for source, source_articles in groupby(rows, key=itemgetter('source')):
+        yield f"<h2>{escape(source)} ({source_totals.get(source, 0)} articles)</h2>"
+        for article in source_articles:
+            published_date = article['published_date'].strftime('%Y-%m-%d %H:%M:%S') if article['published_date'] else 'Unknown'
+            yield (
+                "<div class='article'>"
+                f"<h3><a href='{escape(article['url'])}' target='_blank'>{escape(article['title'])}</a></h3>"
+                f"<div class='meta'>Published: {published_date} | ID: {article['id']}</div>"
+                f"<div class='summary'>{escape(article['summary'] or '')}</div>"
+                "</div>"
+            )
+
+    if page > 1:
+        yield f"<p><a href='?page={page - 1}&per_source={per_source}'>Previous page</a></p>"
+    if has_more:
+        yield f"<p><a href='?page={page + 1}&per_source={per_source}'>Next page</a></p>"
+    yield "</body></html>"
+
 def threat_intelligence_feed(request):
     """
     Endpoint to display intelligence feed in a browser-friendly format.
     This is useful for debugging the backend data.
+
+    Articles are grouped by source and paginated per source (?page=, ?per_source=).
+    Each source's page is read with its own LIMIT/OFFSET over the (source,
+    published_date) index and the pages are combined with UNION ALL in a single
+    query, so no source is scanned past the requested page. Source totals come
+    from the precomputed statistics. The rows are grouped in Python as they
+    stream from the cursor and the HTML is streamed out.
     """
-    articles = IntelligenceArticle.objects.all().order_by('-published_date')
-    
-    # Group articles by source
-    sources = articles.values_list('source', flat=True).distinct()
-    articles_by_source = {}
-    for source in sources:
-        articles_by_source[source] = list(articles.filter(source=source).values('id', 'title', 'url', 'published_date', 'summary'))
-    
-    # Create a simple HTML response
-    html = "<html><head><title>Threat Intelligence Feed</title>"
-    html += "<style>"
-    html += "body { font-family: Arial, sans-serif; margin: 20px; }"
-    html += "h1 { color: #333; }"
-    html += "h2 { color: #444; background-color: #f5f5f5; padding: 10px; margin-top: 30px; }"
-    html += ".article { margin-bottom: 15px; border-bottom: 1px solid #eee; padding-bottom: 15px; }"
-    html += ".article h3 { margin: 0 0 5px 0; }"
-    html += ".article .meta { color: #666; font-size: 0.8em; margin-bottom: 8px; }"
-    html += ".article .summary { font-size: 0.9em; }"
-    html += "</style></head><body>"
-    html += "<h1>Threat Intelligence Feed</h1>"
-    html += f"<p>Total articles: {articles.count()}</p>"
-    
-    for source, source_articles in articles_by_source.items():
-        html += f"<h2>{source} ({len(source_articles)} articles)</h2>"
-        for article in source_articles:
-            published_date = article['published_date'].strftime('%Y-%m-%d %H:%M:%S') if article['published_date'] else 'Unknown'
-            html += f"<div class='article'>"
-            html += f"<h3><a href='{article['url']}' target='_blank'>{article['title']}</a></h3>"
-            html += f"<div class='meta'>Published: {published_date} | ID: {article['id']}</div>"
-            html += f"<div class='summary'>{article['summary']}</div>"
-            html += "</div>"
-    
-    html += "</body></html>"
-    return HttpResponse(html)
+    page = _positive_int(request.GET.get('page'), 1)
+    per_source = _positive_int(request.GET.get('per_source'), FEED_DEFAULT_PER_SOURCE, FEED_MAX_PER_SOURCE)
+    first_row = (page - 1) * per_source
+
+    snapshot = get_statistics_snapshot()
+    source_totals = {item['source']: item['count'] for item in snapshot["sources"]}
+    columns = ('id', 'title', 'url', 'published_date', 'summary', 'source')
+    source_pages = [
+        IntelligenceArticle.objects.filter(source=source)
+        .order_by('-published_date', '-id')
+        .values(*columns)[first_row:first_row + per_source]
+        for source in sorted(source_totals) if source_totals[source] > first_row
+    ]
+    if len(source_pages) > 1:
+        rows = source_pages[0].union(*source_pages[1:], all=True).order_by('source', '-published_date', '-id')
+    else:
+        # A single page is already in order (and a sliced query cannot be reordered)
+        rows = source_pages[0] if source_pages else IntelligenceArticle.objects.none()
+
+    total_articles = snapshot["totals"].get(ARTICLE_CATEGORY, 0)
+    return StreamingHttpResponse(
+        _render_feed(rows.iterator(chunk_size=500), source_totals, total_articles, page, per_source),
+        content_type='text/html; charset=utf-8'
+    )
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -289,85 +567,265 @@ def test_crowdstrike_api(request):
             "message": f"Error testing CrowdStrike API: {str(e)}",
         }, status=500)
 
+@never_cache
+def livez(request):
+    """
+    Liveness probe for the dashboard and orchestrators.
+    Answers from the web process alone: no database, cache or broker access.
+    """
+    return JsonResponse({"status": "ok"})
+
+@never_cache
+def readyz(request):
+    """
+    Readiness probe: round-trips to the database and Redis, each within a few milliseconds.
+    Returns 503 when either dependency is unreachable.
+    """
+    readiness = check_readiness()
+    return JsonResponse(
+        {"status": "ready" if readiness["ready"] else "not_ready", **readiness},
+        status=HTTP_200_OK if readiness["ready"] else HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+STATS_CACHE_TIMEOUT = 60  # Seconds the statistics endpoints reuse a computed payload
+
+def _health_check_payload():
+    # Get basic system statistics from the precomputed statistics table
+    snapshot = get_statistics_snapshot()
+    totals = snapshot["totals"]
+    last_updated = snapshot["last_updated"]
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "api_version": "1.0.0",
+        "stats": {
+            "article_count": totals.get(ARTICLE_CATEGORY, 0),
+            "intel_count": totals.get('tailored_intel', 0),
+            "actor_count": totals.get('threat_actor', 0),
+            "malware_count": totals.get('malware', 0),
+        },
+        "last_updated": last_updated.isoformat() if last_updated else None,
+    }
+
 @api_view(['GET', 'HEAD'])
 @permission_classes([AllowAny])
-@cache_control(max_age=300)  # Cache for 5 minutes
+@throttle_classes([StatsRateThrottle])
 def health_check(request):
     """
-    API endpoint that returns the health status of the API.
-    This can be used by frontend applications to verify connectivity.
+    API endpoint that returns API status with the headline data counts.
+    Served from the precomputed statistics table and cached for a minute;
+    use livez/ for connectivity checks and readyz/ for dependency checks.
     """
-    # Check if we're responding to a HEAD request (used for connectivity checks)
-    if request.method == 'HEAD':
-        return Response(status=HTTP_200_OK)
+    # The payload is cached inside the view so the throttle still applies to cached responses
+    data = cache.get("stats:health_check")
+    if data is None:
+        try:
+            data = _health_check_payload()
+            cache.set("stats:health_check", data, STATS_CACHE_TIMEOUT)
+        except Exception as e:
+            # If we encounter any error, still return a response but with degraded status
+            data = {
+                "status": "degraded",
+                "timestamp": datetime.now().isoformat(),
+                "api_version": "1.0.0",
+                "error": str(e),
+            }
     
-    # Get basic system statistics
-    try:
-        article_count = IntelligenceArticle.objects.count()
-        intel_count = CrowdStrikeTailoredIntel.objects.count()
-        actor_count = CrowdStrikeIntel.objects.count()
-        malware_count = CrowdStrikeMalware.objects.count()
-        
-        # Get latest update timestamps
-        latest_article = IntelligenceArticle.objects.order_by('-published_date').first()
-        latest_intel = CrowdStrikeTailoredIntel.objects.order_by('-last_updated').first()
-        
-        last_updated = latest_intel.last_updated if latest_intel else None
-        if latest_article and latest_article.published_date:
-            if not last_updated or latest_article.published_date > last_updated:
-                last_updated = latest_article.published_date
-                
-        data = {
-            "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
-            "api_version": "1.0.0",
-            "stats": {
-                "article_count": article_count,
-                "intel_count": intel_count,
-                "actor_count": actor_count,
-                "malware_count": malware_count,
-            },
-            "last_updated": last_updated.isoformat() if last_updated else None,
-        }
-    except Exception as e:
-        # If we encounter any error, still return a response but with degraded status
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([StatsRateThrottle])
+def statistics(request):
+    """
+    API endpoint that returns per-source counts, date ranges and last ingest times.
+    Reads the precomputed statistics table maintained by the ingest tasks; the
+    payload is cached for a minute.
+    """
+    data = cache.get("stats:statistics")
+    if data is None:
         data = {
-            "status": "degraded",
             "timestamp": datetime.now().isoformat(),
-            "api_version": "1.0.0",
-            "error": str(e),
+            **get_statistics_snapshot(),
         }
-    
-    # Set CORS headers to allow cross-origin requests
-    response = JsonResponse(data)
-    response["Access-Control-Allow-Origin"] = "*"
-    response["Access-Control-Allow-Methods"] = "GET, HEAD, OPTIONS"
-    response["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
-    
-    return response
+        cache.set("stats:statistics", data, STATS_CACHE_TIMEOUT)
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def system_health(request):
+    """
+    API endpoint that returns the last published system health report.
+    The probes run in the refresh_system_health task; this view only reads the cache.
+    """
+    report = get_cached_health()
+    if report is None:
+        return Response({"overall_status": "unknown", "error": "No health report has been published yet"},
+                        status=HTTP_503_SERVICE_UNAVAILABLE)
+    return Response(report, status=HTTP_503_SERVICE_UNAVAILABLE if report["overall_status"] == "unhealthy" else HTTP_200_OK)
 
 @api_view(['GET'])
+@permission_classes([AllowAny])
+def vendor_rollup(request):
+    """
+    API endpoint that returns vulnerability counts per vendor (and product with ?by=product).
+    Optional ?source= restricts the rollup to one feed, e.g. cisa_kev.
+    Answered by one aggregate over the (vendor_project, product) index.
+    """
+    group_by = ['vendor_project', 'product'] if request.GET.get('by') == 'product' else ['vendor_project']
+    queryset = Vulnerability.objects.exclude(vendor_project='')
+    source = request.GET.get('source')
+    if source:
+        queryset = queryset.filter(source=source)
+
+    rows = queryset.values(*group_by).annotate(count=Count('*')).order_by('-count', *group_by)
+    return Response({
+        "source": source or "all",
+        "results": list(rows),
+    })
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def indicator_lookup(request):
+    """
+    API endpoint that checks a batch of observables against the indicator store.
+    Accepts {"observables": [...]} (or a bare JSON list) of IPs, CIDR blocks,
+    domains, URLs, hashes and other values, and answers with one query.
+    """
+    observables = request.data.get('observables') if isinstance(request.data, dict) else request.data
+    if not isinstance(observables, list):
+        return Response({"error": "Expected a JSON list of observables"}, status=HTTP_400_BAD_REQUEST)
+    if len(observables) > MAX_LOOKUP_OBSERVABLES:
+        return Response(
+            {"error": f"At most {MAX_LOOKUP_OBSERVABLES} observables per request"},
+            status=HTTP_400_BAD_REQUEST,
+        )
+
+    results = lookup_observables(observables)
+    return Response({
+        "count": len(results),
+        "matched": sum(1 for matches in results.values() if matches),
+        "results": results,
+    })
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def ioc_match(request):
+    """
+    API endpoint that bulk-matches observables against the in-memory IOC matcher.
+    Accepts {"observables": [...]} (or a bare JSON list) and returns only the
+    observables that matched. Much faster than indicator-lookup, but it only
+    says what matched (exact value, listed domain, IP range or KEV CVE); use
+    indicator-lookup for the indicator details.
+    """
+    observables = request.data.get('observables') if isinstance(request.data, dict) else request.data
+    if not isinstance(observables, list):
+        return Response({"error": "Expected a JSON list of observables"}, status=HTTP_400_BAD_REQUEST)
+
+    matcher = get_matcher()
+    if matcher is None:
+        return Response({"error": "IOC matcher snapshot has not been built yet"}, status=HTTP_503_SERVICE_UNAVAILABLE)
+
+    results = matcher.match_many(observables)
+    return Response({
+        "count": len(observables),
+        "matched": len(results),
+        "snapshot_built_at": matcher.built_at,
+        "results": results,
+    })
+
+@api_view(['POST'])
+@permission_classes([AllowAny])  # Consider requiring authentication in production
 def refresh_tailored_intel(request):
     """
-    Endpoint to manually trigger tailored intelligence refresh
+    Endpoint to manually trigger tailored intelligence refresh.
+    Queues the sync task and returns its id at once; follow it through
+    task-status/<task_id>/ (polling) or task-events/<task_id>/ (Server-Sent Events).
     """
     try:
-        # Import the task
-        from ioc_scraper.tasks import update_tailored_intelligence
-        
-        # Run the task synchronously
-        result = update_tailored_intelligence()
+        # Attach to a queued or running refresh instead of starting a duplicate
+        task_id, started = enqueue_single_flight(update_tailored_intelligence, TAILORED_INTEL_LEASE)
         
         return JsonResponse({
             "status": "success",
-            "message": "Tailored intelligence refresh completed",
-            "result": result
-        })
+            "message": "Tailored intelligence refresh started" if started else "Tailored intelligence refresh already in progress",
+            "task_id": task_id,
+            "attached": not started,
+            "status_url": reverse('task-status', args=[task_id]),
+            "events_url": reverse('task-events', args=[task_id]),
+        }, status=HTTP_202_ACCEPTED)
     except Exception as e:
-        logger.error(f"Error refreshing tailored intelligence: {str(e)}")
+        logger.error(f"Error starting tailored intelligence refresh: {str(e)}")
         return JsonResponse(
-            {"status": "error", "message": str(e)},
+            {"status": "error", "message": f"Failed to start tailored intelligence refresh: {str(e)}"},
             status=500
         )
 
+TASK_EVENTS_POLL_INTERVAL = 1  # Seconds between result backend reads of an event stream
+TASK_EVENTS_HEARTBEAT = 15  # Seconds between keep-alive comments while nothing changes
+TASK_EVENTS_MAX_DURATION = 30 * 60  # Matches the Celery hard time limit
+
+def _task_snapshot(task_id):
+    """
+    State of a Celery task from the result backend.
+
+    PENDING is also what Celery reports for unknown ids, so a task that was
+    queued but not picked up yet looks the same as a mistyped id.
+    """
+    result = AsyncResult(task_id)
+    snapshot = {"task_id": task_id, "state": result.state, "ready": result.ready()}
+    if result.state == PROGRESS_STATE:
+        snapshot["progress"] = result.info
+    elif result.successful():
+        snapshot["result"] = result.result
+    elif result.failed():
+        snapshot["error"] = str(result.result)
+    return snapshot
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def task_status(request, task_id):
+    """
+    Poll a background task: state, progress (pages fetched, rows written) while it runs,
+    then its result or error.
+    """
+    return Response(_task_snapshot(task_id))
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+async def _iter_task_events(task_id):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    last_sent = started
+    previous = None
+    while loop.time() - started < TASK_EVENTS_MAX_DURATION:
+        snapshot = await sync_to_async(_task_snapshot, thread_sensitive=False)(task_id)
+        if snapshot["ready"]:
+            yield _sse("done", snapshot)
+            return
+        if snapshot != previous:
+            previous = snapshot
+            last_sent = loop.time()
+            yield _sse("progress", snapshot)
+        elif loop.time() - last_sent >= TASK_EVENTS_HEARTBEAT:
+            last_sent = loop.time()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(TASK_EVENTS_POLL_INTERVAL)
+    yield _sse("timeout", {"task_id": task_id, "state": previous["state"] if previous else None})
+
+@never_cache
+async def task_events(request, task_id):
+    """
+    Server-Sent Events stream for a background task: a "progress" event whenever its
+    state or progress changes and a final "done" event with the result or error.
+
+    Only for ASGI deployments (backend.asgi), where an open stream costs no worker.
+    Under WSGI each stream would hold a worker thread until the task finishes, so
+    clients there should poll task-status/ instead (the dashboard does).
+    """
+    response = StreamingHttpResponse(_iter_task_events(task_id), content_type='text/event-stream')
+    response['X-Accel-Buffering'] = 'no'  # Don't let a reverse proxy hold events back
+    return response
+
 # Create your views here.
@@ -0,0 +1,107 @@
+"""
+Set-based duplicate cleanup for intelligence articles.
+
+Duplicates are ranked with ROW_NUMBER() OVER (PARTITION BY <key>) in a single
+statement per rule, and the losing rows are deleted in small batches, each in
+its own short transaction, so cleanup never holds long row locks on the table
+the scrapers are writing to.
+
+Rules:
+- canonical URL: the same article stored under URL variants (http/https,
+  "www.", trailing slash, #fragment). url itself is unique, so exact
+  duplicates cannot exist.
+- syndicated copy: the same title published on the same day under different
+  URLs (usually by different sources). The earliest copy is kept as the
+  original. Short, generic titles are excluded.
+"""
+
+import logging
+
+from django.db import connection, transaction
+
+from .dedup import repoint_orphaned_clusters
+from .models import ArticleLSHBucket, IntelligenceArticle
+from .stats import record_source_ingest
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000
+# Titles shorter than this (after normalization) are too generic to treat as the same article
+MIN_SYNDICATED_TITLE_LENGTH = 24
+
+# SQL expressions for the partition keys (NULL excludes a row from the rule)
+CANONICAL_URL_SQL = r"""
+    rtrim(regexp_replace(lower(url), '^https?://(www\.)?|#.*$', '', 'g'), '/')
+"""
+SYNDICATED_TITLE_SQL = f"""
+    CASE WHEN length(regexp_replace(lower(title), '[^a-z0-9]+', '', 'g')) >= {MIN_SYNDICATED_TITLE_LENGTH}
+         THEN regexp_replace(lower(title), '[^a-z0-9]+', '', 'g') || '|' || (published_date AT TIME ZONE 'UTC')::date
+    END
+"""
+
+# rule name -> (partition key, ORDER BY deciding which row of a partition is kept)
+RULES = {
+    'canonical_url': (CANONICAL_URL_SQL, 'published_date DESC, id DESC'),
+    'syndicated': (SYNDICATED_TITLE_SQL, 'published_date ASC, id ASC'),
+}
+
+def find_duplicates(rule):
+    """
+    Return (id, source) of the rows that lose under rule, in one window-function query.
+    """
+    key_sql, order_sql = RULES[rule]
+    table = connection.ops.quote_name(IntelligenceArticle._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT id, source FROM (
+                SELECT id, source, ROW_NUMBER() OVER (PARTITION BY dedup_key ORDER BY {order_sql}) AS rank
+                FROM (SELECT id, source, title, url, published_date, {key_sql} AS dedup_key FROM {table}) keyed
+                WHERE dedup_key IS NOT NULL
+            ) ranked
+            WHERE rank > 1
+            ORDER BY id
+        """)
+        return cursor.fetchall()
+
+def delete_in_batches(ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete article ids batch_size at a time, committing after each batch. Returns the number deleted.
+    Near-duplicate clusters that lose their representative are re-pointed at a surviving member.
+    """
+    table = connection.ops.quote_name(IntelligenceArticle._meta.db_table)
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        with transaction.atomic():
+            ArticleLSHBucket.objects.filter(article_id__in=batch).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", [batch])
+                deleted += cursor.rowcount
+                repoint_orphaned_clusters(cursor, batch)
+    return deleted
+
+def remove_duplicate_articles(rules=tuple(RULES), dry_run=False):
+    """
+    Remove duplicate intelligence articles under each rule.
+
+    Args:
+        rules: Rule names to apply, in order
+        dry_run: Only count the duplicates
+
+    Returns:
+        dict: rule -> number of articles removed (or found, for a dry run)
+    """
+    removed = {}
+    affected_sources = set()
+    for rule in rules:
+        duplicates = find_duplicates(rule)
+        if dry_run or not duplicates:
+            removed[rule] = len(duplicates)
+            continue
+        removed[rule] = delete_in_batches([article_id for article_id, _ in duplicates])
+        affected_sources.update(source for _, source in duplicates)
+        logger.info(f"Removed {removed[rule]} duplicate intelligence articles ({rule})")
+
+    for source in affected_sources:
+        record_source_ingest(source)
+    return removed
@@ -0,0 +1,201 @@
+"""
+Incremental CrowdStrike sync cursors.
+
+Each entity type keeps its high-water last_modified_date (epoch seconds) in a
+SyncState row. Fetchers query only entities modified at or after the cursor,
+sorted oldest first, and store each page together with the advanced cursor in
+one transaction, so a failed run resumes from the last page that was written.
+
+The cursor has one-second granularity, so the query is inclusive (>=): an
+entity modified in the cursor's second after the previous run queried would
+otherwise be skipped for good. The IDs already stored at the cursor second are
+kept in the SyncState metadata and left out of the next run, as
+iter_indicator_pages does for the indicator feed.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import CrowdStrikeIntel, CrowdStrikeMalware, SyncState
+
+logger = logging.getLogger(__name__)
+
+ACTORS_SYNC_KEY = 'crowdstrike_actors'
+TAILORED_INTEL_SYNC_KEY = 'crowdstrike_tailored_intel'
+MALWARE_SYNC_KEY = 'crowdstrike_malware'
+INDICATORS_SYNC_KEY = 'crowdstrike_indicators'
+
+# Falcon sort order that lets the cursor advance page by page
+INCREMENTAL_SORT = 'last_modified_date.asc'
+# SyncState.metadata key listing the IDs stored at the cursor second
+CURSOR_IDS_KEY = 'cursor_ids'
+
+ACTOR_UPSERT_FIELDS = [
+    'name', 'description', 'capabilities', 'motivations', 'objectives',
+    'adversary_type', 'origins', 'last_update_date',
+]
+
+MALWARE_UPSERT_FIELDS = [
+    'name', 'description', 'ttps', 'targeted_industries', 'publish_date',
+    'activity_start_date', 'activity_end_date', 'threat_groups', 'last_update_date',
+]
+
+def to_datetime(value):
+    """Convert an epoch timestamp or ISO string from the Falcon API to an aware datetime."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    parsed = parse_datetime(str(value))
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+def get_cursor(key):
+    """Return the stored last_modified_date cursor (epoch seconds) for key, or None."""
+    cursor = SyncState.objects.filter(key=key).values_list('cursor', flat=True).first()
+    return int(cursor) if cursor else None
+
+def modified_since_params(cursor):
+    """Falcon query parameters selecting entities modified at or after cursor, oldest first."""
+    params = {'sort': INCREMENTAL_SORT}
+    if cursor is not None:
+        params['filter'] = f"last_modified_date:>='{cursor}'"
+    return params
+
+def unseen_at_cursor(key, modified_by_id):
+    """
+    Return the IDs of modified_by_id ({id: modified datetime}) that are not already
+    stored at the cursor second; the inclusive query returns those again.
+    """
+    state = SyncState.objects.filter(key=key).values('cursor', 'metadata').first()
+    if not state or not state['cursor']:
+        return set(modified_by_id)
+    cursor = int(state['cursor'])
+    seen = set(state['metadata'].get(CURSOR_IDS_KEY, []))
+    return {
+        entity_id for entity_id, modified in modified_by_id.items()
+        if entity_id not in seen or modified is None or int(modified.timestamp()) != cursor
+    }
+
+def advance_cursor(key, modified_dates, ids=None, **metadata):
+    """
+    Move the cursor for key to the newest of modified_dates (never backwards).
+    With ids (parallel to modified_dates), also record which IDs were stored at
+    the cursor second. Call inside the transaction that stores the corresponding rows.
+    """
+    track_ids = ids is not None
+    ids = ids if track_ids else [None] * len(modified_dates)
+    stamped = [(int(dt.timestamp()), entity_id) for dt, entity_id in zip(modified_dates, ids) if dt is not None]
+    if not stamped:
+        return get_cursor(key)
+
+    state, _ = SyncState.objects.select_for_update().get_or_create(key=key)
+    current = int(state.cursor) if state.cursor else None
+    new_cursor = max(stamp for stamp, _ in stamped)
+    if current is not None:
+        new_cursor = max(current, new_cursor)
+    if track_ids:
+        at_cursor = {entity_id for stamp, entity_id in stamped if stamp == new_cursor}
+        if new_cursor == current:
+            at_cursor.update(state.metadata.get(CURSOR_IDS_KEY, []))
+        metadata[CURSOR_IDS_KEY] = sorted(at_cursor)
+    state.cursor = str(new_cursor)
+    state.metadata = {**state.metadata, **metadata}
+    state.save(update_fields=['cursor', 'metadata', 'updated_at'])
+    return new_cursor
+
+def store_actor_page(actors):
+    """
+    Bulk upsert one page of processed actors and advance the actors cursor atomically.
+
+    Args:
+        actors: Actor dicts as returned by crowdstrike.get_actor_details
+
+    Returns:
+        tuple: (created_count, updated_count)
+    """
+    objs = {}
+    for actor in actors:
+        if not actor.get('id'):
+            continue
+        objs[actor['id']] = CrowdStrikeIntel(
+            actor_id=actor['id'],
+            name=actor.get('name') or 'Unknown',
+            description=actor.get('description'),
+            capabilities=actor.get('capabilities', []),
+            motivations=actor.get('motivations', []),
+            objectives=actor.get('objectives', []),
+            adversary_type=actor.get('adversary_type'),
+            origins=actor.get('origins', []),
+            # The API's modification time, not the time of this run
+            last_update_date=to_datetime(actor.get('last_modified_date')),
+        )
+    with transaction.atomic():
+        keep = unseen_at_cursor(ACTORS_SYNC_KEY, {actor_id: obj.last_update_date for actor_id, obj in objs.items()})
+        objs = {actor_id: obj for actor_id, obj in objs.items() if actor_id in keep}
+        if not objs:
+            return 0, 0
+        existing = set(
+            CrowdStrikeIntel.objects.filter(actor_id__in=list(objs)).values_list('actor_id', flat=True)
+        )
+        CrowdStrikeIntel.objects.bulk_create(
+            list(objs.values()),
+            update_conflicts=True,
+            unique_fields=['actor_id'],
+            update_fields=ACTOR_UPSERT_FIELDS,
+        )
+        advance_cursor(ACTORS_SYNC_KEY, [obj.last_update_date for obj in objs.values()], ids=list(objs))
+
+    return len(objs) - len(existing), len(existing)
+
+def store_malware_page(families):
+    """
+    Bulk upsert one page of processed malware families, refresh their entity
+    links and advance the malware cursor atomically.
+
+    Args:
+        families: Malware dicts as returned by malware_family.get_malware_details
+
+    Returns:
+        tuple: (created_count, updated_count)
+    """
+    objs = {}
+    for family in families:
+        if not family.get('id'):
+            continue
+        objs[family['id']] = CrowdStrikeMalware(
+            malware_id=family['id'],
+            name=(family.get('name') or 'Unknown')[:255],
+            description=family.get('description'),
+            ttps=family.get('ttps', []),
+            targeted_industries=family.get('targeted_sectors', []),
+            publish_date=to_datetime(family.get('publish_date')),
+            activity_start_date=to_datetime(family.get('activity_start_date')),
+            activity_end_date=to_datetime(family.get('activity_end_date')),
+            threat_groups=family.get('threat_groups', []),
+            last_update_date=to_datetime(family.get('last_updated')),
+        )
+    with transaction.atomic():
+        keep = unseen_at_cursor(MALWARE_SYNC_KEY, {malware_id: obj.last_update_date for malware_id, obj in objs.items()})
+        objs = {malware_id: obj for malware_id, obj in objs.items() if malware_id in keep}
+        if not objs:
+            return 0, 0
+        existing = set(
+            CrowdStrikeMalware.objects.filter(malware_id__in=list(objs)).values_list('malware_id', flat=True)
+        )
+        CrowdStrikeMalware.objects.bulk_create(
+            list(objs.values()),
+            update_conflicts=True,
+            unique_fields=['malware_id'],
+            update_fields=MALWARE_UPSERT_FIELDS,
+        )
+        CrowdStrikeMalware.sync_entities(list(objs.values()))
+        advance_cursor(MALWARE_SYNC_KEY, [obj.last_update_date for obj in objs.values()], ids=list(objs))
+
+    return len(objs) - len(existing), len(existing)
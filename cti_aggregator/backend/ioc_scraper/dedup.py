@@ -0,0 +1,168 @@
+"""
+Near-duplicate detection for intelligence articles with MinHash and LSH.
+
+Each article gets a MinHash signature of its title and leading summary words.
+The signature is split into LSH bands, and every band is hashed into a bucket
+row (ArticleLSHBucket). A new article is only compared with articles that share
+at least one bucket. That avoids pairwise comparison across the table. A
+candidate joins the article's cluster when the estimated Jaccard similarity
+of their shingles reaches SIMILARITY_THRESHOLD and the two were published
+within CLUSTER_WINDOW of each other.
+
+cluster_id is the id of the first article of a cluster, so "one row per story"
+is the filter cluster_id = id (or not yet clustered). Code that deletes or
+archives articles calls repoint_orphaned_clusters() so a cluster whose first
+article is gone gets its oldest remaining member as the representative.
+"""
+
+import hashlib
+import logging
+import random
+import re
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from .models import ArticleLSHBucket, IntelligenceArticle
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS  # Candidate threshold ~ (1/BANDS) ** (1/ROWS_PER_BAND) = 0.5
+SHINGLE_SIZE = 3
+SUMMARY_WORDS = 60
+SIMILARITY_THRESHOLD = 0.5
+CLUSTER_WINDOW = timedelta(days=14)
+BATCH_SIZE = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)  # Fixed seed: signatures must be comparable across processes and runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def shingles(title, summary=None):
+    """Word n-grams of the title and the first SUMMARY_WORDS words of the summary."""
+    words = _WORD_RE.findall((title or '').lower()) + _WORD_RE.findall((summary or '').lower())[:SUMMARY_WORDS]
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(title, summary=None):
+    """MinHash signature (NUM_PERM values below 2**61), or None if the text has no words."""
+    hashes = [_hash64(shingle) for shingle in shingles(title, summary)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def band_buckets(signature):
+    """One signed 64-bit bucket key per LSH band of a signature."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(','.join(map(str, rows)).encode(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+def estimated_similarity(signature, other):
+    """Fraction of equal MinHash values: an estimate of the shingle sets' Jaccard similarity."""
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_PERM
+
+def _find_cluster(article, signature, candidates):
+    best = None
+    for candidate in candidates:
+        if candidate.minhash is None or abs(candidate.published_date - article.published_date) > CLUSTER_WINDOW:
+            continue
+        similarity = estimated_similarity(signature, candidate.minhash)
+        if similarity >= SIMILARITY_THRESHOLD and (best is None or similarity > best[0]):
+            best = (similarity, candidate.cluster_id or candidate.id)
+    return best[1] if best else None
+
+def _cluster_batch(articles):
+    signatures = {article.id: minhash_signature(article.title, article.summary) for article in articles}
+    buckets = {article_id: band_buckets(sig) for article_id, sig in signatures.items() if sig}
+
+    # One query for every stored article sharing a bucket with this batch
+    wanted = {(band, bucket) for keys in buckets.values() for band, bucket in enumerate(keys)}
+    index = {}
+    if wanted:
+        rows = ArticleLSHBucket.objects.filter(bucket__in={bucket for _, bucket in wanted}).values_list(
+            'band', 'bucket', 'article_id')
+        for band, bucket, article_id in rows:
+            if (band, bucket) in wanted:
+                index.setdefault((band, bucket), set()).add(article_id)
+    candidate_ids = set().union(*index.values()) if index else set()
+    known = {
+        candidate.id: candidate
+        for candidate in IntelligenceArticle.objects.filter(id__in=candidate_ids).only(
+            'id', 'published_date', 'minhash', 'cluster_id')
+    }
+
+    new_buckets = []
+    for article in articles:
+        signature = signatures[article.id]
+        article.minhash = signature or []
+        if not signature:
+            article.cluster_id = article.id
+            continue
+        keys = buckets[article.id]
+        candidates = {
+            known[candidate_id]
+            for band, bucket in enumerate(keys)
+            for candidate_id in index.get((band, bucket), ())
+            if candidate_id in known and candidate_id != article.id
+        }
+        article.cluster_id = _find_cluster(article, signature, candidates) or article.id
+        # Later articles in the same batch can match this one
+        known[article.id] = article
+        for band, bucket in enumerate(keys):
+            index.setdefault((band, bucket), set()).add(article.id)
+            new_buckets.append(ArticleLSHBucket(article_id=article.id, band=band, bucket=bucket))
+
+    with transaction.atomic():
+        IntelligenceArticle.objects.bulk_update(articles, ['minhash', 'cluster_id'])
+        ArticleLSHBucket.objects.bulk_create(new_buckets)
+    return sum(1 for article in articles if article.cluster_id != article.id)
+
+def assign_clusters(batch_size=BATCH_SIZE):
+    """
+    Sign and cluster every article that has no MinHash signature yet, oldest first.
+
+    Returns:
+        tuple: (articles processed, articles attached to an existing cluster)
+    """
+    processed = 0
+    duplicates = 0
+    while True:
+        batch = list(
+            IntelligenceArticle.objects.filter(minhash__isnull=True)
+            .order_by('published_date', 'id')
+            .only('id', 'title', 'summary', 'published_date')[:batch_size]
+        )
+        if not batch:
+            break
+        duplicates += _cluster_batch(batch)
+        processed += len(batch)
+
+    if processed:
+        logger.info(f"Clustered {processed} new intelligence articles ({duplicates} near-duplicates)")
+    return processed, duplicates
+
+def repoint_orphaned_clusters(cursor, removed_ids):
+    """
+    Point the clusters of removed articles (whose representative may be among them)
+    at their oldest remaining member. Run in the transaction that removed the rows.
+    """
+    table = connection.ops.quote_name(IntelligenceArticle._meta.db_table)
+    cursor.execute(
+        f"""
+        UPDATE {table} AS article SET cluster_id = survivors.first_id
+        FROM (SELECT cluster_id, MIN(id) AS first_id FROM {table}
+              WHERE cluster_id = ANY(%s) GROUP BY cluster_id) AS survivors
+        WHERE article.cluster_id = survivors.cluster_id AND article.cluster_id <> survivors.first_id
+        """,
+        [list(removed_ids)],
+    )
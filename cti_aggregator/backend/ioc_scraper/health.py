@@ -0,0 +1,192 @@
+"""
+Time-bounded health probes and the cached health snapshot.
+
+Probes run concurrently in a thread pool under one shared deadline. A probe that
+has not finished when the deadline passes is reported as timed out instead of
+holding up the report. Its thread finishes in the background. Results are
+published to the cache by a periodic task, so the HTTP health endpoint only reads
+one cache key and never waits on the broker, the workers or the database.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+import psycopg2
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.utils import timezone
+
+from .models import CrowdStrikeIntel, CrowdStrikeTailoredIntel, IntelligenceArticle
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_KEY = "system_health_check_result"
+HEALTH_CACHE_TIMEOUT = 60 * 60 * 24
+PROBE_DEADLINE = 3.0  # Seconds for the whole probe run
+CELERY_INSPECT_TIMEOUT = 1.0  # Seconds to wait for worker replies to a broadcast
+READINESS_BUDGET = 0.01  # Seconds allowed per dependency in the readiness check
+READINESS_DB_CONNECT_TIMEOUT = 2  # Seconds (libpq minimum) before the readiness connection attempt gives up
+
+# Tables whose (estimated) emptiness degrades the database probe: label -> model
+MONITORED_TABLES = {
+    "intelligence_articles": IntelligenceArticle,
+    "tailored_intel": CrowdStrikeTailoredIntel,
+    "threat_actors": CrowdStrikeIntel,
+}
+
+def estimated_row_counts(models):
+    """
+    Planner row estimates (pg_class.reltuples) for each model's table, without scanning them.
+
+    Returns:
+        dict: model -> estimated rows, or None if the table has never been analyzed
+    """
+    tables = {model._meta.db_table: model for model in models}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(%s) AND relkind = 'r'",
+            [list(tables)],
+        )
+        rows = dict(cursor.fetchall())
+    # reltuples is -1 until the first VACUUM/ANALYZE (PostgreSQL 14+)
+    return {model: (rows[table] if rows.get(table, -1) >= 0 else None) for table, model in tables.items()}
+
+def _run_probe(probe):
+    try:
+        return probe()
+    except Exception as e:
+        logger.error(f"Health probe {probe.__name__} failed: {str(e)}")
+        return {"status": "unhealthy", "details": str(e)}
+    finally:
+        # Probe threads get their own database connections; don't leak them
+        connections.close_all()
+
+def run_probes(probes, deadline=PROBE_DEADLINE):
+    """
+    Run probes concurrently and wait at most `deadline` seconds for all of them.
+
+    Args:
+        probes: dict of component name -> callable returning {"status": ..., "details": ...}
+        deadline: Seconds before unfinished probes are reported as timed out
+
+    Returns:
+        dict: component name -> probe result
+    """
+    executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="health-probe")
+    futures = {name: executor.submit(_run_probe, probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=deadline)
+    # Don't block on stragglers; they finish (and close their connections) in the background
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done() and not future.cancelled():
+            results[name] = future.result()
+        else:
+            logger.warning(f"Health probe {name} did not finish within {deadline}s")
+            results[name] = {"status": "degraded", "details": f"Probe timed out after {deadline}s"}
+    return results
+
+def overall_status(results):
+    statuses = {result.get("status") for result in results.values()}
+    if "unhealthy" in statuses:
+        return "unhealthy"
+    if "degraded" in statuses:
+        return "degraded"
+    return "healthy"
+
+def publish_health(results):
+    """Store a health report in the cache for the health endpoint and return it."""
+    status = overall_status(results)
+    summary = f"System Health: {status.upper()}\n"
+    for component, info in results.items():
+        summary += f"- {component}: {info['status']}"
+        if info.get("details"):
+            summary += f" ({info['details']})"
+        summary += "\n"
+
+    report = {
+        "timestamp": timezone.now().isoformat(),
+        "overall_status": status,
+        "results": results,
+        "summary": summary,
+    }
+    cache.set(HEALTH_CACHE_KEY, report, timeout=HEALTH_CACHE_TIMEOUT)
+    return report
+
+def get_cached_health():
+    """Return the last published health report, or None if none has been published yet."""
+    return cache.get(HEALTH_CACHE_KEY)
+
+_readiness_redis = None
+
+def _get_readiness_redis():
+    """Redis client for the cache server with socket timeouts equal to the readiness budget."""
+    global _readiness_redis
+    if _readiness_redis is None:
+        _readiness_redis = redis.Redis.from_url(
+            settings.CACHES['default']['LOCATION'],
+            socket_connect_timeout=READINESS_BUDGET,
+            socket_timeout=READINESS_BUDGET,
+        )
+    return _readiness_redis
+
+def _timed(check):
+    started = time.perf_counter()
+    try:
+        check()
+        result = {"ok": True}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+# The database ping runs on one dedicated thread with its own connection, so the
+# request thread can stop waiting after READINESS_BUDGET even when a connect or
+# query hangs; a hung ping makes later pings queue (and be cancelled), never pile up.
+_readiness_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readiness-db")
+_readiness_db = None
+
+def _ping_database():
+    global _readiness_db
+    try:
+        if _readiness_db is None or _readiness_db.closed:
+            timeout_ms = max(1, int(READINESS_BUDGET * 1000))
+            _readiness_db = psycopg2.connect(
+                **connection.get_connection_params(),
+                connect_timeout=READINESS_DB_CONNECT_TIMEOUT,
+                options=f"-c statement_timeout={timeout_ms}",
+            )
+            _readiness_db.autocommit = True
+        with _readiness_db.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except psycopg2.Error:
+        if _readiness_db is not None:
+            _readiness_db.close()
+        _readiness_db = None
+        raise
+
+def _ping_database_within_budget():
+    future = _readiness_db_executor.submit(_ping_database)
+    try:
+        future.result(timeout=READINESS_BUDGET)
+    except FutureTimeoutError:
+        future.cancel()
+        raise FutureTimeoutError(f"No database reply within {READINESS_BUDGET * 1000:g} ms") from None
+
+def check_readiness():
+    """
+    Connectivity check of the database and Redis for the readiness endpoint.
+    Only round-trips are made (SELECT 1, PING) and each fails after READINESS_BUDGET.
+
+    Returns:
+        dict: {"ready": bool, "checks": {name: {"ok", "latency_ms", ["error"]}}}
+    """
+    checks = {
+        "database": _timed(_ping_database_within_budget),
+        "redis": _timed(lambda: _get_readiness_redis().ping()),
+    }
+    return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
@@ -0,0 +1,209 @@
+"""
+Indicator normalization and batch lookup.
+
+Indicators are keyed by (indicator_type, normalized_value). IP addresses and
+CIDR blocks are additionally stored in an inet column (GiST inet_ops index) so
+a lookup matches every block containing an address, and domains are stored
+with their labels reversed ("com.example.www.") so suffix queries become
+B-tree prefix or equality probes.
+"""
+
+import ipaddress
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from django.db import connection, models
+from django.db.models import Lookup
+
+from .models import Indicator
+
+# Largest number of observables accepted by one lookup request
+MAX_LOOKUP_OBSERVABLES = 10000
+
+IP_TYPES = {'ip_address', 'ip_address_block'}
+HASH_TYPES = {'hash_md5', 'hash_sha1', 'hash_sha256'}
+HASH_TYPES_BY_LENGTH = {32: 'hash_md5', 40: 'hash_sha1', 64: 'hash_sha256'}
+
+_HEX_RE = re.compile(r'^[0-9a-f]+$')
+_DOMAIN_RE = re.compile(r'^(?=.{1,253}$)([a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\.)+[a-z0-9-]{2,63}$')
+
+LOOKUP_COLUMNS = [
+    'id', 'indicator', 'indicator_type', 'malicious_confidence', 'published_date',
+    'last_updated', 'malware_families', 'threat_groups',
+]
+
+@models.GenericIPAddressField.register_lookup
+class NetContainsOrEquals(Lookup):
+    """ip_network__net_contains_or_equals='10.1.2.3': blocks containing the address (inet >>=)."""
+    lookup_name = 'net_contains_or_equals'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} >>= {rhs}::inet", [*lhs_params, *rhs_params]
+
+def normalize_domain(value):
+    """Lower-case a domain and drop surrounding whitespace, a trailing dot and wildcard labels."""
+    domain = value.strip().lower().rstrip('.')
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    return domain
+
+def reverse_domain(domain):
+    """'www.example.com' -> 'com.example.www.' (the trailing dot anchors label boundaries)."""
+    return '.'.join(reversed(domain.split('.'))) + '.'
+
+def domain_suffixes(domain):
+    """Reversed forms of domain and each parent domain, e.g. a.example.com -> example.com -> com."""
+    labels = domain.split('.')
+    return [reverse_domain('.'.join(labels[i:])) for i in range(len(labels))]
+
+def _normalize_url(value):
+    value = value.strip()
+    try:
+        parts = urlsplit(value)
+    except ValueError:
+        return value
+    if not parts.scheme or not parts.netloc:
+        return value
+    # Scheme and host are case-insensitive; the path and query are not
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, parts.fragment))
+
+def normalize_indicator(value, indicator_type):
+    """
+    Normalize an indicator value for storage.
+
+    Returns:
+        dict: normalized_value, ip_network (inet text or None) and reversed_domain (or None)
+    """
+    value = (value or '').strip()
+    result = {'normalized_value': value, 'ip_network': None, 'reversed_domain': None}
+
+    if indicator_type in IP_TYPES:
+        try:
+            if indicator_type == 'ip_address_block' or '/' in value:
+                network = ipaddress.ip_network(value, strict=False)
+                normalized = network.with_prefixlen if network.num_addresses > 1 else str(network.network_address)
+            else:
+                normalized = str(ipaddress.ip_address(value))
+        except ValueError:
+            result['normalized_value'] = value.lower()
+            return result
+        result['normalized_value'] = normalized
+        result['ip_network'] = normalized
+    elif indicator_type == 'domain':
+        domain = normalize_domain(value)
+        result['normalized_value'] = domain
+        result['reversed_domain'] = reverse_domain(domain) if domain else None
+    elif indicator_type == 'url':
+        result['normalized_value'] = _normalize_url(value)
+    elif indicator_type in HASH_TYPES or indicator_type == 'email_address':
+        result['normalized_value'] = value.lower()
+    return result
+
+def classify_observable(value):
+    """
+    Guess the indicator type of a raw observable submitted for lookup.
+
+    Returns:
+        tuple: (indicator_type, normalized_value); type is None when unrecognized
+    """
+    value = (value or '').strip()
+    if not value:
+        return None, value
+
+    try:
+        if '/' in value:
+            network = ipaddress.ip_network(value, strict=False)
+            if network.num_addresses > 1:
+                return 'ip_address_block', network.with_prefixlen
+            return 'ip_address', str(network.network_address)
+        return 'ip_address', str(ipaddress.ip_address(value))
+    except ValueError:
+        pass
+
+    lowered = value.lower()
+    if len(lowered) in HASH_TYPES_BY_LENGTH and _HEX_RE.match(lowered):
+        return HASH_TYPES_BY_LENGTH[len(lowered)], lowered
+    if '://' in value:
+        return 'url', _normalize_url(value)
+    if '@' in value and _DOMAIN_RE.match(lowered.rsplit('@', 1)[1]):
+        return 'email_address', lowered
+    domain = normalize_domain(value)
+    if _DOMAIN_RE.match(domain):
+        return 'domain', domain
+    return None, value
+
+def lookup_observables(observables):
+    """
+    Match raw observables against the indicator store in a single query.
+
+    Hashes, URLs and any other values probe normalized_value (hash index), so
+    values of types that cannot be recognized (file names, mutexes) still match;
+    IP addresses match every stored address or CIDR block containing them (GiST
+    inet_ops, >>=); domains match the stored domain or any parent domain
+    (reversed_domain equality on each suffix). Domain-like values also probe
+    normalized_value, since file names such as "svchost.exe" look like domains.
+
+    Args:
+        observables: Raw observable strings (at most MAX_LOOKUP_OBSERVABLES)
+
+    Returns:
+        dict: observable -> list of matching indicator dicts (observables without
+              matches map to an empty list)
+    """
+    exact_values, exact_observables = [], []
+    ip_values, ip_observables = [], []
+    suffix_values, suffix_observables = [], []
+    results = {}
+
+    for observable in observables:
+        if not isinstance(observable, str) or observable in results:
+            continue
+        results[observable] = []
+        indicator_type, normalized = classify_observable(observable)
+        if indicator_type in IP_TYPES:
+            ip_values.append(normalized)
+            ip_observables.append(observable)
+        elif indicator_type == 'domain':
+            for suffix in domain_suffixes(normalized):
+                suffix_values.append(suffix)
+                suffix_observables.append(observable)
+            exact_values.append(observable.strip())
+            exact_observables.append(observable)
+        elif normalized:
+            exact_values.append(normalized)
+            exact_observables.append(observable)
+
+    if not (exact_values or ip_values or suffix_values):
+        return results
+
+    table = connection.ops.quote_name(Indicator._meta.db_table)
+    columns = ', '.join(f'i.{connection.ops.quote_name(column)}' for column in LOOKUP_COLUMNS)
+    sql = f"""
+        SELECT o.observable, {columns}
+        FROM unnest(%s::text[], %s::text[]) AS o(observable, value)
+        JOIN {table} i ON i.normalized_value = o.value
+        UNION ALL
+        SELECT o.observable, {columns}
+        FROM unnest(%s::text[], %s::inet[]) AS o(observable, address)
+        JOIN {table} i ON i.ip_network >>= o.address
+        UNION ALL
+        SELECT o.observable, {columns}
+        FROM unnest(%s::text[], %s::text[]) AS o(observable, suffix)
+        JOIN {table} i ON i.reversed_domain = o.suffix
+    """
+    params = [
+        exact_observables, exact_values,
+        ip_observables, ip_values,
+        suffix_observables, suffix_values,
+    ]
+    # raw() applies the model's field conversions (e.g. jsonb -> list)
+    seen = set()
+    for indicator in Indicator.objects.raw(sql, params):
+        # A stored domain is found by both its value and its suffix
+        if (indicator.observable, indicator.id) in seen:
+            continue
+        seen.add((indicator.observable, indicator.id))
+        results[indicator.observable].append({column: getattr(indicator, column) for column in LOOKUP_COLUMNS})
+    return results
@@ -0,0 +1,188 @@
+"""
+Incremental ingest of the CISA Known Exploited Vulnerabilities catalog.
+
+The nightly job short-circuits when the feed's catalogVersion/dateReleased has
+not changed since the last stored run. Otherwise it diffs the (streamed) feed
+against the stored rows one chunk at a time and bulk inserts or updates only the
+CVEs that changed. Rows live in the unified Vulnerability table under the
+'cisa_kev' source (the CISAKev proxy).
+"""
+
+import logging
+from datetime import datetime
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CISAKev, SyncState, Vulnerability
+
+logger = logging.getLogger(__name__)
+
+KEV_FEED_URL = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
+KEV_CATALOG_URL = "https://www.cisa.gov/known-exploited-vulnerabilities-catalog"
+KEV_SYNC_KEY = 'cisa_kev'
+KEV_BATCH_SIZE = 500
+# Feed entries diffed per query when the catalog is streamed
+KEV_DIFF_CHUNK_SIZE = 1000
+
+# Columns compared when diffing the feed against stored rows
+KEV_FIELDS = [
+    'vulnerability_name', 'description', 'date_added', 'due_date', 'vendor_project',
+    'product', 'required_action', 'known_ransomware_campaign_use', 'notes',
+]
+KEV_UPDATE_FIELDS = KEV_FIELDS + ['published_date', 'updated_at']
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def parse_kev_entry(entry):
+    """
+    Map a KEV feed entry to CISAKev column values.
+
+    Returns:
+        dict: Column values keyed by field name (including cve_id), or None if the entry is unusable
+    """
+    cve_id = (entry.get("cveID") or "").strip()
+    date_added = _parse_date(entry.get("dateAdded"))
+    if not cve_id or not date_added:
+        return None
+
+    return {
+        'cve_id': cve_id,
+        'vulnerability_name': entry.get("vulnerabilityName") or "Unknown",
+        'description': entry.get("shortDescription") or "No description provided",
+        'date_added': date_added,
+        # dueDate is always present in the published feed; fall back to dateAdded if it is not
+        'due_date': _parse_date(entry.get("dueDate")) or date_added,
+        'vendor_project': entry.get("vendorProject") or "",
+        'product': entry.get("product") or "",
+        'required_action': entry.get("requiredAction") or "",
+        'known_ransomware_campaign_use': entry.get("knownRansomwareCampaignUse") or "",
+        'notes': entry.get("notes") or "",
+    }
+
+def catalog_version(header):
+    """Build the sync cursor for a feed from its catalogVersion and dateReleased."""
+    return f"{header.get('catalogVersion', '')}|{header.get('dateReleased', '')}"
+
+def is_catalog_unchanged(header):
+    """Return True when the stored cursor matches this feed's catalog version."""
+    version = catalog_version(header)
+    if version == "|":
+        return False
+    return SyncState.objects.filter(key=KEV_SYNC_KEY, cursor=version).exists()
+
+def _kev_instance(row, **extra):
+    """Build a CISAKev row (a 'cisa_kev' Vulnerability) from parsed feed values."""
+    return CISAKev(
+        source=Vulnerability.SOURCE_CISA_KEV,
+        # The KEV feed has no severity field
+        severity="Unknown",
+        published_date=row['date_added'],
+        source_url=f"{KEV_CATALOG_URL}?search_api_fulltext={row['cve_id']}",
+        **row,
+        **extra,
+    )
+
+def _diff_chunk(rows, now):
+    """
+    Split one chunk of parsed rows into new and changed CISAKev instances.
+    Unchanged rows are dropped.
+    Stored values are fetched for the chunk's CVEs only, so memory stays bounded by the chunk size.
+    """
+    existing = {
+        row[1]: (row[0], row[2:])
+        for row in CISAKev.objects.filter(cve_id__in=[r['cve_id'] for r in rows])
+        .values_list('id', 'cve_id', *KEV_FIELDS)
+    }
+
+    to_create = []
+    to_update = []
+    for row in rows:
+        stored = existing.get(row['cve_id'])
+        if stored is None:
+            to_create.append(_kev_instance(row))
+        elif stored[1] != tuple(row[field] for field in KEV_FIELDS):
+            to_update.append(_kev_instance(row, id=stored[0], updated_at=now))
+    return to_create, to_update
+
+def sync_kev_entries(header, entries, force=False):
+    """
+    Store a KEV catalog, writing only the CVEs that are new or changed.
+
+    Entries are consumed in chunks of KEV_DIFF_CHUNK_SIZE, so a streamed feed is
+    diffed and written without ever holding the whole catalog in memory. All
+    chunks and the catalog cursor are committed in one transaction.
+
+    Args:
+        header: Feed metadata (catalogVersion, dateReleased, count)
+        entries: Iterable of raw feed vulnerability entries (may be a generator)
+        force: Process the feed even if its catalog version was already stored
+
+    Returns:
+        dict: Result counts and the catalog version
+    """
+    version = catalog_version(header)
+    if not force and is_catalog_unchanged(header):
+        logger.info(f"CISA KEV catalog {version} unchanged, skipping ingest")
+        return {"status": "unchanged", "catalog_version": version, "created": 0, "updated": 0, "unchanged": 0}
+
+    created_count = 0
+    updated_count = 0
+    unchanged_count = 0
+    seen = set()
+    now = timezone.now()
+    iterator = iter(entries)
+
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(iterator, KEV_DIFF_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            rows = []
+            for entry in chunk:
+                row = parse_kev_entry(entry)
+                if row is None or row['cve_id'] in seen:
+                    continue
+                seen.add(row['cve_id'])
+                rows.append(row)
+            if not rows:
+                continue
+
+            to_create, to_update = _diff_chunk(rows, now)
+            CISAKev.objects.bulk_create(to_create, batch_size=KEV_BATCH_SIZE)
+            CISAKev.objects.bulk_update(to_update, KEV_UPDATE_FIELDS, batch_size=KEV_BATCH_SIZE)
+
+            created_count += len(to_create)
+            updated_count += len(to_update)
+            unchanged_count += len(rows) - len(to_create) - len(to_update)
+
+        SyncState.objects.update_or_create(
+            key=KEV_SYNC_KEY,
+            defaults={
+                'cursor': version,
+                'metadata': {
+                    'catalog_version': header.get('catalogVersion'),
+                    'date_released': header.get('dateReleased'),
+                    'count': header.get('count'),
+                },
+            }
+        )
+
+    result = {
+        "status": "updated",
+        "catalog_version": version,
+        "created": created_count,
+        "updated": updated_count,
+        "unchanged": unchanged_count,
+    }
+    logger.info(f"CISA KEV catalog {version}: {created_count} created, {updated_count} updated, "
+                f"{unchanged_count} unchanged")
+    return result
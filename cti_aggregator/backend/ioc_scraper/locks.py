@@ -0,0 +1,179 @@
+"""
+Single-flight leases in Redis for ingest tasks.
+
+A lease is a Redis key holding the id of the task that owns it, with a short
+TTL that a background thread keeps renewing while the task runs. If the worker
+dies, the key expires within LEASE_TTL and the next run can proceed. Release
+and renewal only act on the key if it still holds the owner's id, so a run that
+lost its lease can never release another run's lease.
+
+Manual triggers use enqueue_single_flight(): the lease is claimed for the new
+task id before the task is queued, and the task adopts the claim when it
+starts. A second trigger while the first is queued or running gets the first
+task's id back instead of a duplicate run.
+
+If Redis is unreachable, leases fail open (the task runs unguarded) so ingest
+keeps working without it.
+"""
+
+import functools
+import logging
+import threading
+import uuid
+
+import redis
+from celery import current_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = 60  # Seconds a lease survives without renewal
+CLAIM_TTL = 15 * 60  # Seconds a claim waits for its queued task to start
+KEY_PREFIX = 'cti:lock:'
+
+# Take the lease if it is free, or re-take it if this owner already holds it (a claim)
+_ACQUIRE = """
+local current = redis.call('GET', KEYS[1])
+if current == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if current then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return 1
+"""
+_RENEW = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_redis_client = None
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.CACHES['default']['LOCATION'], socket_timeout=2, socket_connect_timeout=2,
+        )
+    return _redis_client
+
+class Lease:
+    """
+    Renewable single-flight lease, usable as a context manager:
+
+        with Lease('source:Unit42', owner=task_id) as lease:
+            if not lease.acquired:
+                return f"already running in {lease.holder()}"
+            ...
+    """
+
+    def __init__(self, name, owner=None, ttl=LEASE_TTL):
+        self.name = name
+        self.key = KEY_PREFIX + name
+        self.owner = owner or uuid.uuid4().hex
+        self.ttl = ttl
+        self.acquired = False
+        self._stop = threading.Event()
+        self._renewer = None
+
+    def _run(self, script, *args):
+        return _get_redis().eval(script, 1, self.key, self.owner, *args)
+
+    def acquire(self):
+        try:
+            self.acquired = bool(self._run(_ACQUIRE, int(self.ttl * 1000)))
+        except redis.RedisError as e:
+            logger.warning(f"Lease {self.name} not enforced, Redis unavailable: {str(e)}")
+            self.acquired = True
+            return True
+        if self.acquired:
+            self._renewer = threading.Thread(target=self._renew_loop, name=f"lease-{self.name}", daemon=True)
+            self._renewer.start()
+        return self.acquired
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                if not self._run(_RENEW, int(self.ttl * 1000)):
+                    logger.warning(f"Lease {self.name} was lost by {self.owner}")
+                    return
+            except redis.RedisError as e:
+                logger.warning(f"Could not renew lease {self.name}: {str(e)}")
+
+    def release(self):
+        self._stop.set()
+        if not self.acquired:
+            return
+        self.acquired = False
+        try:
+            self._run(_RELEASE)
+        except redis.RedisError as e:
+            logger.warning(f"Could not release lease {self.name}; it expires in {self.ttl}s: {str(e)}")
+
+    def holder(self):
+        """Owner (task id) of the lease, or None if it is free or Redis is unavailable."""
+        try:
+            value = _get_redis().get(self.key)
+        except redis.RedisError:
+            return None
+        return value.decode() if value else None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+def lease_holder(name):
+    return Lease(name).holder()
+
+def single_flight(name):
+    """
+    Task decorator: skip the run if another run holds lease `name`.
+    Put it below @shared_task so the lease owner is the Celery task id.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            owner = current_task.request.id if current_task else None
+            with Lease(name, owner=owner) as lease:
+                if not lease.acquired:
+                    message = f"Skipped {func.__name__}: already running as task {lease.holder()}"
+                    logger.info(message)
+                    return message
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enqueue_single_flight(task, name, args=(), kwargs=None, **options):
+    """
+    Queue task unless a run holding lease `name` is queued or running.
+
+    Returns:
+        tuple: (task id, True if a new run was queued / False if attached to the existing one)
+    """
+    task_id = uuid.uuid4().hex
+    claim = Lease(name, owner=task_id, ttl=CLAIM_TTL)
+    try:
+        claimed = bool(claim._run(_ACQUIRE, CLAIM_TTL * 1000))
+    except redis.RedisError as e:
+        logger.warning(f"Lease {name} not enforced, Redis unavailable: {str(e)}")
+        claimed = True
+    if not claimed:
+        holder = claim.holder()
+        if holder:
+            return holder, False
+    task.apply_async(args=args, kwargs=kwargs, task_id=task_id, **options)
+    return task_id, True
@@ -4,7 +4,11 @@ from ioc_scraper.tasks import fetch_cisa_vulnerabilities
 class Command(BaseCommand):
     help = 'Fetches CISA KEV vulnerability data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Process the catalog even if its version has not changed')
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting CISA KEV data fetch...'))
-        result = fetch_cisa_vulnerabilities()
-        self.stdout.write(self.style.SUCCESS(f'Completed CISA KEV data fetch: {result}')) 
\ No newline at end of file
+        result = fetch_cisa_vulnerabilities(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Completed CISA KEV data fetch: {result}'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from ioc_scraper.retention import maintain_article_partitions
+
+class Command(BaseCommand):
+    help = 'Moves aged intelligence articles into the monthly archive partitions and drops expired partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hot-months', type=int, help='Whole months kept in the hot table (default: ARTICLE_HOT_MONTHS)')
+        parser.add_argument('--retention-months', type=int,
+                            help='Months kept in total, 0 keeps the archive forever (default: ARTICLE_RETENTION_MONTHS)')
+        parser.add_argument('--detach-only', action='store_true',
+                            help='Detach expired partitions but keep them as standalone tables')
+
+    def handle(self, *args, **options):
+        try:
+            result = maintain_article_partitions(
+                hot_months=options['hot_months'],
+                retention_months=options['retention_months'],
+                detach_only=options['detach_only'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result['archived']} articles published before {result['hot_cutoff']:%Y-%m-%d}"
+        ))
+        action = 'Detached' if options['detach_only'] else 'Dropped'
+        for name in result['removed_partitions']:
+            self.stdout.write(self.style.SUCCESS(f"{action} partition {name}"))
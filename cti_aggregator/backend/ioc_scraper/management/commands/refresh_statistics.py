@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ioc_scraper.stats import rebuild_all_statistics
+
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed per-source statistics table'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Rebuilding source statistics...'))
+        rebuild_all_statistics()
+        self.stdout.write(self.style.SUCCESS('Source statistics rebuilt'))
@@ -0,0 +1,372 @@
+"""
+In-process IOC matcher for high-rate observable checks.
+
+All known indicators and CISA KEV CVE IDs are compiled into one snapshot file
+that workers memory-map read-only:
+
+- exact values (hashes, URLs, e-mail addresses, ...) and KEV CVE IDs as sorted
+  arrays of 64-bit value hashes, probed with a binary search;
+- domains as a sorted hash array probed with the observable and each parent
+  domain, so a listed domain matches all of its subdomains;
+- IP addresses and CIDR blocks as merged, sorted, disjoint intervals (IPv4 is
+  mapped into the IPv6 space), probed with a binary search on the starts.
+
+The snapshot is rebuilt after each ingest: new indicators (by primary key) are
+merged into the previous arrays, and the file is replaced with an atomic
+rename, so readers always see a complete snapshot and pick up the new one on
+their next call. The matcher answers "is this observable known?"; details come
+from the indicator lookup endpoint.
+"""
+
+import hashlib
+import heapq
+import ipaddress
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from .indicators import IP_TYPES, classify_observable, normalize_domain
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'IOCMATCH'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sII')  # magic, version, header length
+
+# Sections stored as arrays of unsigned 64-bit integers
+SECTIONS = [
+    'exact', 'domains', 'kev',
+    'ip_start_hi', 'ip_start_lo', 'ip_end_hi', 'ip_end_lo',
+]
+
+_CVE_RE = re.compile(r'^CVE-\d{4}-\d{4,}$', re.IGNORECASE)
+_IPV4_MAPPED = 0xFFFF << 32
+_U64_MASK = (1 << 64) - 1
+
+def value_hash(value):
+    """64-bit hash of a normalized value (stable across processes and hosts)."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def _ip_int(address):
+    """Integer of an address in the IPv6 space (IPv4 mapped to ::ffff:0:0/96)."""
+    return int(address) | _IPV4_MAPPED if address.version == 4 else int(address)
+
+def ip_interval(value):
+    """(start, end) integers for an address or CIDR block, or None if value is not one."""
+    try:
+        network = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+    return _ip_int(network.network_address), _ip_int(network.broadcast_address)
+
+def merge_intervals(intervals):
+    """Sort (start, end) pairs and merge overlapping or adjacent ones."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def _unique_sorted(values):
+    """Sorted array('Q') of the distinct values of an iterable of sorted or unsorted ints."""
+    result = array('Q')
+    previous = None
+    for value in sorted(values):
+        if value != previous:
+            result.append(value)
+            previous = value
+    return result
+
+def _merge_sorted(old, new):
+    """Merge a sorted sequence with sorted new values, dropping duplicates."""
+    result = array('Q')
+    previous = None
+    for value in heapq.merge(old, new):
+        if value != previous:
+            result.append(value)
+            previous = value
+    return result
+
+class _U128View:
+    """Read-only sequence of 128-bit integers stored as hi/lo 64-bit arrays (for bisect)."""
+
+    def __init__(self, hi, lo):
+        self.hi = hi
+        self.lo = lo
+
+    def __len__(self):
+        return len(self.hi)
+
+    def __getitem__(self, index):
+        return (self.hi[index] << 64) | self.lo[index]
+
+class MatcherSnapshot:
+    """A memory-mapped snapshot file; use match()/match_many() to check observables."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an IOC matcher snapshot (version {FORMAT_VERSION})")
+        self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])
+
+        view = memoryview(self._mmap)
+        self.sections = {}
+        for name, (offset, count) in self.header['sections'].items():
+            self.sections[name] = view[offset:offset + 8 * count].cast('Q')
+        self.ip_starts = _U128View(self.sections['ip_start_hi'], self.sections['ip_start_lo'])
+        self.ip_ends = _U128View(self.sections['ip_end_hi'], self.sections['ip_end_lo'])
+
+    def close(self):
+        for section in self.sections.values():
+            section.release()
+        self.sections = {}
+        self._mmap.close()
+
+    @property
+    def built_at(self):
+        return self.header.get('built_at')
+
+    def _contains(self, section, value):
+        values = self.sections[section]
+        index = bisect_left(values, value)
+        return index < len(values) and values[index] == value
+
+    def _ip_range(self, value):
+        index = bisect_right(self.ip_starts, value) - 1
+        if index >= 0 and self.ip_ends[index] >= value:
+            return index
+        return None
+
+    def _format_range(self, index):
+        start, end = self.ip_starts[index], self.ip_ends[index]
+        if start & ~0xFFFFFFFF == _IPV4_MAPPED and end & ~0xFFFFFFFF == _IPV4_MAPPED:
+            start, end = ipaddress.IPv4Address(start & 0xFFFFFFFF), ipaddress.IPv4Address(end & 0xFFFFFFFF)
+        else:
+            start, end = ipaddress.IPv6Address(start), ipaddress.IPv6Address(end)
+        return str(start) if start == end else f"{start}-{end}"
+
+    def match(self, observable):
+        """
+        Check one raw observable.
+
+        Returns:
+            list: Match dicts ({"kind": "exact"|"domain"|"ip"|"cisa_kev", "value": ...}),
+                  empty when the observable is unknown
+        """
+        matches = []
+        indicator_type, normalized = classify_observable(observable)
+        if not normalized:
+            return matches
+
+        if indicator_type in IP_TYPES:
+            interval = ip_interval(normalized)
+            # A block matches when its first and last address fall in one listed range
+            start_index = self._ip_range(interval[0])
+            if start_index is not None and self._ip_range(interval[1]) == start_index:
+                matches.append({'kind': 'ip', 'value': self._format_range(start_index)})
+            return matches
+
+        if indicator_type == 'domain':
+            labels = normalize_domain(normalized).split('.')
+            for i in range(len(labels)):
+                suffix = '.'.join(labels[i:])
+                if self._contains('domains', value_hash(suffix)):
+                    matches.append({'kind': 'domain', 'value': suffix})
+            # File names and mutexes such as "svchost.exe" look like domains too
+            value = observable.strip()
+            if self._contains('exact', value_hash(value)):
+                matches.append({'kind': 'exact', 'value': value})
+            return matches
+
+        if self._contains('exact', value_hash(normalized)):
+            matches.append({'kind': 'exact', 'value': normalized})
+        if _CVE_RE.match(normalized) and self._contains('kev', value_hash(normalized.upper())):
+            matches.append({'kind': 'cisa_kev', 'value': normalized.upper()})
+        return matches
+
+    def match_many(self, observables):
+        """Check a batch of observables; returns {observable: matches} for the matched ones only."""
+        results = {}
+        for observable in observables:
+            if isinstance(observable, str) and observable not in results:
+                matches = self.match(observable)
+                if matches:
+                    results[observable] = matches
+        return results
+
+def write_snapshot(path, exact, domains, kev, intervals, **metadata):
+    """
+    Write a snapshot atomically (temporary file in the same directory, then rename).
+
+    Args:
+        path: Destination file
+        exact, domains, kev: Sorted, distinct array('Q') of value hashes
+        intervals: Sorted, disjoint [start, end] pairs of 128-bit integers
+        **metadata: Extra header fields (watermarks, counts)
+    """
+    arrays = {
+        'exact': exact,
+        'domains': domains,
+        'kev': kev,
+        'ip_start_hi': array('Q', (start >> 64 for start, _ in intervals)),
+        'ip_start_lo': array('Q', (start & _U64_MASK for start, _ in intervals)),
+        'ip_end_hi': array('Q', (end >> 64 for _, end in intervals)),
+        'ip_end_lo': array('Q', (end & _U64_MASK for _, end in intervals)),
+    }
+
+    # Offsets depend on the header length, which depends on the offsets: size for the worst case
+    header = {
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'counts': {name: len(values) for name, values in arrays.items() if not name.startswith('ip_')},
+        **metadata,
+    }
+    header['counts']['ip_ranges'] = len(intervals)
+    placeholder = {name: [2 ** 63, len(values)] for name, values in arrays.items()}
+    reserved = len(json.dumps({**header, 'sections': placeholder}).encode()) + 64
+    offset = (_PREAMBLE.size + reserved + 7) // 8 * 8
+    sections = {}
+    for name in SECTIONS:
+        sections[name] = [offset, len(arrays[name])]
+        offset += 8 * len(arrays[name])
+    header_bytes = json.dumps({**header, 'sections': sections}).encode().ljust(reserved)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.ioc_matcher.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * (sections[SECTIONS[0]][0] - f.tell()))
+            for name in SECTIONS:
+                arrays[name].tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return header
+
+def snapshot_path():
+    return settings.IOC_MATCHER_SNAPSHOT
+
+def _indicator_rows(since_pk=None):
+    from .models import Indicator
+
+    queryset = Indicator.objects.order_by()
+    if since_pk:
+        queryset = queryset.filter(pk__gt=since_pk)
+    return queryset.values_list('pk', 'indicator_type', 'normalized_value', 'ip_network').iterator(chunk_size=10000)
+
+def rebuild_snapshot(path=None, full=False):
+    """
+    Rebuild the matcher snapshot from the database.
+
+    Indicators are only ever added or updated in place by the ingest path
+    (their type and normalized value never change), so an incremental rebuild
+    merges indicators with a primary key above the previous snapshot's
+    watermark into its arrays. A full rebuild is done when there is no usable
+    previous snapshot, when full=True, or when indicators were deleted since.
+    KEV CVE IDs are a small set and are always reloaded.
+
+    Returns:
+        dict: The new snapshot header
+    """
+    from .models import CISAKev, Indicator
+
+    path = path or snapshot_path()
+    previous = None
+    if not full:
+        try:
+            previous = MatcherSnapshot(path)
+        except (OSError, ValueError):
+            previous = None
+    indicator_count = Indicator.objects.count()
+    if previous is not None and indicator_count < previous.header.get('indicator_count', 0):
+        previous.close()
+        previous = None
+
+    since_pk = previous.header.get('indicator_watermark') if previous is not None else None
+    exact, domains, intervals = [], [], []
+    watermark = since_pk or 0
+    for pk, indicator_type, normalized_value, ip_network in _indicator_rows(since_pk):
+        watermark = max(watermark, pk)
+        if indicator_type in IP_TYPES:
+            interval = ip_interval(ip_network or normalized_value)
+            if interval is not None:
+                intervals.append(interval)
+        elif indicator_type == 'domain':
+            domains.append(value_hash(normalized_value))
+        else:
+            exact.append(value_hash(normalized_value))
+
+    kev = _unique_sorted(value_hash(cve_id.upper()) for cve_id in CISAKev.objects.values_list('cve_id', flat=True))
+
+    try:
+        if previous is not None:
+            exact = _merge_sorted(previous.sections['exact'], sorted(set(exact)))
+            domains = _merge_sorted(previous.sections['domains'], sorted(set(domains)))
+            intervals = merge_intervals(
+                [[previous.ip_starts[i], previous.ip_ends[i]] for i in range(len(previous.ip_starts))] + intervals
+            )
+        else:
+            exact = _unique_sorted(exact)
+            domains = _unique_sorted(domains)
+            intervals = merge_intervals(intervals)
+        header = write_snapshot(
+            path, exact, domains, kev, intervals,
+            indicator_watermark=watermark,
+            indicator_count=indicator_count,
+            incremental=previous is not None,
+        )
+    finally:
+        if previous is not None:
+            previous.close()
+
+    logger.info(f"IOC matcher snapshot rebuilt ({'incremental' if header['incremental'] else 'full'}): {header['counts']}")
+    return header
+
+_matcher = None
+_matcher_key = None
+_matcher_lock = threading.Lock()
+
+def get_matcher(path=None):
+    """
+    Return the process-wide snapshot, reopening it when the file has been replaced.
+
+    Returns:
+        MatcherSnapshot or None if no snapshot has been built yet
+    """
+    global _matcher, _matcher_key
+    path = path or snapshot_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    with _matcher_lock:
+        if key != _matcher_key:
+            # The previous mapping stays valid for callers still holding it; it is closed when collected
+            _matcher = MatcherSnapshot(path)
+            _matcher_key = key
+        return _matcher
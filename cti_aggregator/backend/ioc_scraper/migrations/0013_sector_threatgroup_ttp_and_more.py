@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0012_intelligencearticle_target_industries_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Sector',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ThreatGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Threat Group',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TTP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name': 'TTP',
+                'verbose_name_plural': 'TTPs',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='crowdstrikemalware',
+            name='targeted_industry_entities',
+            field=models.ManyToManyField(blank=True, related_name='malware', to='ioc_scraper.sector'),
+        ),
+        migrations.AddField(
+            model_name='crowdstriketailoredintel',
+            name='targeted_sector_entities',
+            field=models.ManyToManyField(blank=True, related_name='tailored_intel', to='ioc_scraper.sector'),
+        ),
+        migrations.AddField(
+            model_name='crowdstrikemalware',
+            name='threat_group_entities',
+            field=models.ManyToManyField(blank=True, related_name='malware', to='ioc_scraper.threatgroup'),
+        ),
+        migrations.AddField(
+            model_name='crowdstriketailoredintel',
+            name='threat_group_entities',
+            field=models.ManyToManyField(blank=True, related_name='tailored_intel', to='ioc_scraper.threatgroup'),
+        ),
+        migrations.AddField(
+            model_name='crowdstrikemalware',
+            name='ttp_entities',
+            field=models.ManyToManyField(blank=True, related_name='malware', to='ioc_scraper.ttp'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.db import migrations
+
+
+def _normalize(name):
+    return " ".join(str(name).split()).casefold()
+
+
+def _as_list(json_value, text_value=None):
+    """Return a clean list of names from a JSON list, falling back to a comma-separated string."""
+    if json_value:
+        values = json_value if isinstance(json_value, list) else [json_value]
+    elif text_value:
+        values = text_value.split(',')
+    else:
+        values = []
+    return [str(v).strip() for v in values if v is not None and str(v).strip()]
+
+
+def _link(model, relation, entity_model, rows):
+    """
+    Bulk-create entities and join rows for (pk, names) pairs.
+    """
+    field = model._meta.get_field(relation)
+    through = field.remote_field.through
+    source_column = f"{field.m2m_field_name()}_id"
+    target_column = f"{field.m2m_reverse_field_name()}_id"
+
+    display_names = {}
+    for _, names in rows:
+        for name in names:
+            display_names.setdefault(_normalize(name), " ".join(name.split()))
+    if not display_names:
+        return
+
+    entity_model.objects.bulk_create(
+        [entity_model(name=name, normalized_name=key) for key, name in display_names.items()],
+        ignore_conflicts=True,
+    )
+    entity_ids = dict(
+        entity_model.objects.filter(normalized_name__in=display_names).values_list('normalized_name', 'id')
+    )
+
+    links = []
+    for pk, names in rows:
+        for key in {_normalize(name) for name in names}:
+            links.append(through(**{source_column: pk, target_column: entity_ids[key]}))
+    through.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+def backfill_entity_links(apps, schema_editor):
+    """
+    Populate the normalized entity tables from the existing JSON and comma-separated columns.
+    """
+    CrowdStrikeTailoredIntel = apps.get_model('ioc_scraper', 'CrowdStrikeTailoredIntel')
+    CrowdStrikeMalware = apps.get_model('ioc_scraper', 'CrowdStrikeMalware')
+    ThreatGroup = apps.get_model('ioc_scraper', 'ThreatGroup')
+    Sector = apps.get_model('ioc_scraper', 'Sector')
+    TTP = apps.get_model('ioc_scraper', 'TTP')
+
+    reports = list(CrowdStrikeTailoredIntel.objects.values_list(
+        'report_id', 'threat_groups_json', 'threat_groups', 'targeted_sectors_json', 'targeted_sectors'
+    ))
+    _link(CrowdStrikeTailoredIntel, 'threat_group_entities', ThreatGroup,
+          [(pk, _as_list(groups_json, groups)) for pk, groups_json, groups, _, _ in reports])
+    _link(CrowdStrikeTailoredIntel, 'targeted_sector_entities', Sector,
+          [(pk, _as_list(sectors_json, sectors)) for pk, _, _, sectors_json, sectors in reports])
+
+    malware = list(CrowdStrikeMalware.objects.values_list(
+        'malware_id', 'ttps', 'targeted_industries', 'threat_groups'
+    ))
+    _link(CrowdStrikeMalware, 'ttp_entities', TTP,
+          [(pk, _as_list(ttps)) for pk, ttps, _, _ in malware])
+    _link(CrowdStrikeMalware, 'targeted_industry_entities', Sector,
+          [(pk, _as_list(industries)) for pk, _, industries, _ in malware])
+    _link(CrowdStrikeMalware, 'threat_group_entities', ThreatGroup,
+          [(pk, _as_list(groups)) for pk, _, _, groups in malware])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0013_sector_threatgroup_ttp_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_entity_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0014_backfill_entity_links'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crowdstrikeintel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['capabilities'], name='csintel_capabilities_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstrikeintel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['motivations'], name='csintel_motivations_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstrikeintel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['origins'], name='csintel_origins_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstrikemalware',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ttps'], name='csmalware_ttps_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstrikemalware',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['targeted_industries'], name='csmalware_industries_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstrikemalware',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['threat_groups'], name='csmalware_threat_groups_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstriketailoredintel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['threat_groups_json'], name='cstailored_groups_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='crowdstriketailoredintel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['targeted_sectors_json'], name='cstailored_sectors_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0015_jsonb_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('source', models.CharField(blank=True, default='', max_length=100)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('earliest_date', models.DateTimeField(blank=True, null=True)),
+                ('latest_date', models.DateTimeField(blank=True, null=True)),
+                ('last_ingest_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Source Statistics',
+                'verbose_name_plural': 'Source Statistics',
+                'ordering': ['category', 'source'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'source'), name='unique_source_statistics')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0016_sourcestatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('cursor', models.CharField(blank=True, default='', max_length=255)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sync State',
+            },
+        ),
+        migrations.AddField(
+            model_name='cisakev',
+            name='known_ransomware_campaign_use',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='cisakev',
+            name='notes',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='cisakev',
+            name='required_action',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
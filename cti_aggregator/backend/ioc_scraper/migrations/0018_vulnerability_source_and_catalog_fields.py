@@ -0,0 +1,118 @@
+from django.db import migrations, models
+from django.db.models import F, Q
+import django.utils.timezone
+
+KEV_CATALOG_URL = "https://www.cisa.gov/known-exploited-vulnerabilities-catalog"
+KEV_COLUMNS = [
+    'vulnerability_name', 'description', 'date_added', 'due_date', 'vendor_project', 'product',
+    'required_action', 'known_ransomware_campaign_use', 'notes',
+]
+CHUNK_SIZE = 1000
+
+
+def merge_kev_into_vulnerability(apps, schema_editor):
+    """
+    Tag the KEV rows already mirrored into Vulnerability and copy the CISAKev
+    catalog columns onto them, creating any rows that were never mirrored.
+
+    A row is a KEV row if its CVE is in the CISAKev catalog or it carries the
+    KEV feed's signature: the feed has no url key, so the KEV sync saved
+    source_url as "Unknown" (or a cisa.gov link when one was given). Rows entered
+    any other way keep source 'other'.
+    cve_id is still unique here, so tagging cannot create duplicates for the
+    (source, cve_id) constraint added in 0019.
+    """
+    Vulnerability = apps.get_model('ioc_scraper', 'Vulnerability')
+    CISAKev = apps.get_model('ioc_scraper', 'CISAKev')
+
+    kev_origin = (
+        Q(cve_id__in=CISAKev.objects.values('cve_id'))
+        | Q(source_url='Unknown')
+        | Q(source_url__icontains='cisa.gov')
+    )
+    mirrored = Vulnerability.objects.filter(kev_origin)
+    mirrored.update(source='cisa_kev')
+    mirrored.filter(date_added__isnull=True).update(date_added=F('published_date'))
+
+    kev_rows = CISAKev.objects.order_by('id').values('cve_id', *KEV_COLUMNS)
+    for start in range(0, kev_rows.count(), CHUNK_SIZE):
+        chunk = list(kev_rows[start:start + CHUNK_SIZE])
+        ids = dict(
+            Vulnerability.objects.filter(cve_id__in=[row['cve_id'] for row in chunk]).values_list('cve_id', 'id')
+        )
+        to_create = []
+        to_update = []
+        for row in chunk:
+            vulnerability = Vulnerability(
+                id=ids.get(row['cve_id']),
+                source='cisa_kev',
+                severity='Unknown',
+                published_date=row['date_added'],
+                source_url=f"{KEV_CATALOG_URL}?search_api_fulltext={row['cve_id']}",
+                **row,
+            )
+            (to_update if vulnerability.id else to_create).append(vulnerability)
+        Vulnerability.objects.bulk_create(to_create)
+        Vulnerability.objects.bulk_update(to_update, ['source', 'published_date'] + KEV_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0017_cisakev_feed_fields_syncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vulnerability',
+            name='source',
+            field=models.CharField(default='other', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='date_added',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='due_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='vendor_project',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='product',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='required_action',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='known_ransomware_campaign_use',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='notes',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='vulnerability',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(merge_kev_into_vulnerability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0018_vulnerability_source_and_catalog_fields'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='CISAKev',
+        ),
+        migrations.AlterField(
+            model_name='vulnerability',
+            name='cve_id',
+            field=models.CharField(default='2000-01-01', max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='vulnerability',
+            constraint=models.UniqueConstraint(fields=('source', 'cve_id'), name='vulnerability_source_cve_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(fields=['source', '-date_added'], include=('cve_id', 'vulnerability_name', 'due_date'), name='vuln_source_date_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(fields=['vendor_project', 'product'], include=('source', 'cve_id'), name='vuln_vendor_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerability',
+            index=models.Index(fields=['cve_id'], name='ioc_scraper_cve_id_c82357_idx'),
+        ),
+        migrations.CreateModel(
+            name='CISAKev',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'CISA Known Exploited Vulnerability',
+                'verbose_name_plural': 'CISA Known Exploited Vulnerabilities',
+                'ordering': ['-date_added'],
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('ioc_scraper.vulnerability',),
+        ),
+    ]
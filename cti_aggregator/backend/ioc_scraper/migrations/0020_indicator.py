@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:08
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0019_cisakev_proxy_and_vulnerability_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Indicator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indicator_id', models.CharField(max_length=512, unique=True)),
+                ('indicator', models.TextField()),
+                ('indicator_type', models.CharField(max_length=50)),
+                ('source', models.CharField(blank=True, max_length=255, null=True)),
+                ('malicious_confidence', models.CharField(blank=True, max_length=50, null=True)),
+                ('matched_rule_names', models.JSONField(blank=True, default=list)),
+                ('details', models.TextField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(blank=True, null=True)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('published_date', models.DateTimeField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(blank=True, null=True)),
+                ('malware_families', models.JSONField(blank=True, default=list)),
+                ('threat_groups', models.JSONField(blank=True, default=list)),
+                ('reports', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['published_date'], name='indicator_published_idx'), models.Index(fields=['indicator_type', '-published_date'], name='indicator_type_published_idx'), django.contrib.postgres.indexes.GinIndex(fields=['malware_families'], name='indicator_malware_gin', opclasses=['jsonb_path_ops']), django.contrib.postgres.indexes.GinIndex(fields=['threat_groups'], name='indicator_groups_gin', opclasses=['jsonb_path_ops'])],
+            },
+        ),
+    ]
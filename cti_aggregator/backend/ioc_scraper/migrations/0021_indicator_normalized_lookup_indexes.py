@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def backfill_normalized_values(apps, schema_editor):
+    """Fill the lookup columns and keep one row (the newest) per (type, normalized value)."""
+    from ioc_scraper.indicators import normalize_indicator
+
+    Indicator = apps.get_model('ioc_scraper', 'Indicator')
+    seen = set()
+    duplicates = []
+    batch = []
+    for indicator in Indicator.objects.order_by('-last_updated', '-id').iterator(chunk_size=2000):
+        normalized = normalize_indicator(indicator.indicator, indicator.indicator_type)
+        key = (indicator.indicator_type, normalized['normalized_value'])
+        if key in seen:
+            duplicates.append(indicator.pk)
+            continue
+        seen.add(key)
+        indicator.normalized_value = normalized['normalized_value']
+        indicator.ip_network = normalized['ip_network']
+        indicator.reversed_domain = normalized['reversed_domain']
+        batch.append(indicator)
+        if len(batch) >= 2000:
+            Indicator.objects.bulk_update(batch, ['normalized_value', 'ip_network', 'reversed_domain'])
+            batch = []
+    if batch:
+        Indicator.objects.bulk_update(batch, ['normalized_value', 'ip_network', 'reversed_domain'])
+    if duplicates:
+        Indicator.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0020_indicator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicator',
+            name='ip_network',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='indicator',
+            name='normalized_value',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='indicator',
+            name='reversed_domain',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_normalized_values, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='indicator',
+            name='normalized_value',
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='indicator_id',
+            field=models.CharField(db_index=True, max_length=512),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['normalized_value'], name='indicator_value_hash'),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['ip_network'], name='indicator_ip_network_gist', opclasses=['inet_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=models.Index(fields=['reversed_domain'], name='indicator_rdomain_pattern', opclasses=['text_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='indicator',
+            constraint=models.UniqueConstraint(fields=('indicator_type', 'normalized_value'), name='indicator_type_value_uniq'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0021_indicator_normalized_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='intelligencearticle',
+            name='cluster_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='intelligencearticle',
+            name='minhash',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='intelligencearticle',
+            index=models.Index(fields=['cluster_id'], name='article_cluster_idx'),
+        ),
+        migrations.AddField(
+            model_name='articlelshbucket',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='ioc_scraper.intelligencearticle'),
+        ),
+        migrations.AddIndex(
+            model_name='articlelshbucket',
+            index=models.Index(fields=['band', 'bucket'], name='article_lsh_band_bucket_idx'),
+        ),
+    ]
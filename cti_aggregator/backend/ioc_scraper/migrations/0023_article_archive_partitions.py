@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0022_article_minhash_clusters'),
+    ]
+
+    operations = [
+        # Monthly partitions are created on demand by ioc_scraper.retention
+        migrations.RunSQL(
+            """
+            CREATE TABLE ioc_scraper_intelligencearticle_archive (
+                id bigint NOT NULL,
+                title varchar(255) NOT NULL,
+                source varchar(100) NOT NULL,
+                url varchar(200) NOT NULL,
+                published_date timestamp with time zone NOT NULL,
+                summary text NULL,
+                threat_actor_type varchar(100) NULL,
+                target_industries text NULL,
+                cluster_id bigint NULL,
+                archived_at timestamp with time zone NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, published_date)
+            ) PARTITION BY RANGE (published_date);
+            CREATE INDEX article_archive_published_idx ON ioc_scraper_intelligencearticle_archive (published_date);
+            CREATE INDEX article_archive_source_idx ON ioc_scraper_intelligencearticle_archive (source);
+            """,
+            "DROP TABLE ioc_scraper_intelligencearticle_archive;",
+        ),
+        migrations.CreateModel(
+            name='ArchivedIntelligenceArticle',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('source', models.CharField(max_length=100)),
+                ('url', models.URLField()),
+                ('published_date', models.DateTimeField()),
+                ('summary', models.TextField(blank=True, null=True)),
+                ('threat_actor_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('target_industries', models.TextField(blank=True, null=True)),
+                ('cluster_id', models.BigIntegerField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'ioc_scraper_intelligencearticle_archive',
+                'ordering': ['-published_date'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0023_article_archive_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100, unique=True)),
+                ('interval_seconds', models.PositiveIntegerField()),
+                ('next_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_new_items', models.PositiveIntegerField(default=0)),
+                ('items_per_hour', models.FloatField(blank=True, null=True)),
+                ('consecutive_failures', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['source'],
+            },
+        ),
+    ]
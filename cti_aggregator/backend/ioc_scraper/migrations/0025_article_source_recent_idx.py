@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ioc_scraper', '0024_source_schedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='intelligencearticle',
+            index=models.Index(fields=['source', '-published_date', '-id'], name='article_source_recent_idx'),
+        ),
+    ]
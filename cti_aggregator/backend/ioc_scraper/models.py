@@ -1,19 +1,51 @@
-from django.db import models
-from django.db.models import Index
+from itertools import chain
 
-# TODO: Consider consolidating Vulnerability and CISAKev models
-# There is significant overlap between these models, and they could be merged
-# into a single model with a source field to differentiate between different vulnerability sources.
-# This would reduce data redundancy and make querying more efficient.
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, GistIndex, HashIndex
+from django.db import models, transaction
+from django.db.models import Index
 
 class Vulnerability(models.Model):
-    cve_id = models.CharField(max_length=50, unique=True, null=False,default="2000-01-01")
+    """
+    Unified vulnerability store. Every feed writes here, tagged with a source;
+    CISAKev is a proxy over the rows whose source is 'cisa_kev'.
+    """
+    SOURCE_CISA_KEV = 'cisa_kev'
+    SOURCE_OTHER = 'other'
+
+    source = models.CharField(max_length=50, default=SOURCE_OTHER)
+    cve_id = models.CharField(max_length=50, null=False, default="2000-01-01")
     vulnerability_name = models.CharField(max_length=500)
     description = models.TextField()
     severity = models.CharField(max_length=50)
     published_date = models.DateField()
     source_url = models.URLField()
 
+    # Catalog fields (populated by KEV; empty for sources that do not provide them)
+    date_added = models.DateField(null=True, blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    vendor_project = models.CharField(max_length=255, blank=True, default='')
+    product = models.CharField(max_length=255, blank=True, default='')
+    required_action = models.TextField(blank=True, default='')
+    known_ransomware_campaign_use = models.CharField(max_length=50, blank=True, default='')
+    notes = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'cve_id'], name='vulnerability_source_cve_uniq'),
+        ]
+        indexes = [
+            # Per-source lists newest first, e.g. the KEV catalog
+            Index(fields=['source', '-date_added'], include=['cve_id', 'vulnerability_name', 'due_date'],
+                  name='vuln_source_date_added_idx'),
+            # Vendor/product lookups and per-vendor rollups as index-only scans
+            Index(fields=['vendor_project', 'product'], include=['source', 'cve_id'],
+                  name='vuln_vendor_product_idx'),
+            Index(fields=['cve_id']),
+        ]
+
     def __str__(self):
         return f"{self.cve_id} - {self.vulnerability_name}"
 
@@ -26,17 +58,167 @@ class IntelligenceArticle(models.Model):
     # New fields for threat intelligence data
     threat_actor_type = models.CharField(max_length=100, blank=True, null=True)
     target_industries = models.TextField(blank=True, null=True)
+    # Near-duplicate detection (see ioc_scraper.dedup): MinHash signature and the id of
+    # the first article of its cluster (equal to id for the representative row)
+    minhash = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    cluster_id = models.BigIntegerField(null=True, blank=True)
     
     class Meta:
         ordering = ['-published_date']
         indexes = [
             models.Index(fields=['source']),
             models.Index(fields=['published_date']),
+            models.Index(fields=['cluster_id'], name='article_cluster_idx'),
+            # Newest-first page of one source (threat_intelligence_feed)
+            models.Index(fields=['source', '-published_date', '-id'], name='article_source_recent_idx'),
         ]
     
     def __str__(self):
         return f"{self.source}: {self.title}"
 
+class ArchivedIntelligenceArticle(models.Model):
+    """
+    Intelligence articles that aged out of the hot table. The table is range-partitioned
+    by published month in PostgreSQL and maintained by ioc_scraper.retention, so it is
+    not managed by Django migrations.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    source = models.CharField(max_length=100)
+    url = models.URLField()
+    published_date = models.DateTimeField()
+    summary = models.TextField(blank=True, null=True)
+    threat_actor_type = models.CharField(max_length=100, blank=True, null=True)
+    target_industries = models.TextField(blank=True, null=True)
+    cluster_id = models.BigIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'ioc_scraper_intelligencearticle_archive'
+        ordering = ['-published_date']
+
+    def __str__(self):
+        return f"{self.source}: {self.title}"
+
+class ArticleLSHBucket(models.Model):
+    """
+    Locality-sensitive hashing index over article MinHash signatures: one row per
+    (band, bucket) of each article. Articles sharing any bucket are candidate duplicates.
+    """
+    article = models.ForeignKey(IntelligenceArticle, on_delete=models.CASCADE, related_name='lsh_buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='article_lsh_band_bucket_idx'),
+        ]
+
+def normalize_entity_name(name):
+    """
+    Normalize an entity name for exact matching.
+    Collapses whitespace and case-folds, so "Cozy Bear" and "COZY  BEAR" share a key.
+    """
+    return " ".join(str(name).split()).casefold()
+
+class NamedEntity(models.Model):
+    """
+    Abstract base for normalized lookup entities (threat groups, sectors, TTPs).
+    The unique normalized_name doubles as the index used for exact filters.
+    """
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def resolve(cls, names):
+        """
+        Return the entities for the given names, creating any that are missing.
+        Runs a fixed number of queries regardless of how many names are passed.
+        """
+        display_names = {}
+        for name in names or []:
+            if name is None or not str(name).strip():
+                continue
+            display_names.setdefault(normalize_entity_name(name), " ".join(str(name).split()))
+
+        if not display_names:
+            return []
+
+        existing = {e.normalized_name: e for e in cls.objects.filter(normalized_name__in=display_names)}
+        missing = [
+            cls(name=name, normalized_name=key)
+            for key, name in display_names.items() if key not in existing
+        ]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            existing = {e.normalized_name: e for e in cls.objects.filter(normalized_name__in=display_names)}
+
+        return [existing[key] for key in display_names if key in existing]
+
+class ThreatGroup(NamedEntity):
+    """Threat group / adversary referenced by CrowdStrike reports and malware families."""
+
+    class Meta(NamedEntity.Meta):
+        verbose_name = "Threat Group"
+
+class Sector(NamedEntity):
+    """Targeted sector or industry."""
+
+    class Meta(NamedEntity.Meta):
+        verbose_name = "Sector"
+
+class TTP(NamedEntity):
+    """Tactic, technique or procedure."""
+
+    class Meta(NamedEntity.Meta):
+        verbose_name = "TTP"
+        verbose_name_plural = "TTPs"
+
+def sync_entity_links(instances, relation, names_for):
+    """
+    Replace the join table rows of a many-to-many entity relation in bulk.
+
+    Args:
+        instances: Saved model instances that own the relation
+        relation: Name of the ManyToManyField (e.g. 'threat_group_entities')
+        names_for: Callable returning the list of entity names for an instance
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+
+    field = instances[0]._meta.get_field(relation)
+    entity_model = field.related_model
+    through = field.remote_field.through
+    source_column = f"{field.m2m_field_name()}_id"
+    target_column = f"{field.m2m_reverse_field_name()}_id"
+
+    names_by_pk = {instance.pk: names_for(instance) or [] for instance in instances}
+    entities = {
+        entity.normalized_name: entity
+        for entity in entity_model.resolve(chain.from_iterable(names_by_pk.values()))
+    }
+
+    links = []
+    for pk, names in names_by_pk.items():
+        keys = {normalize_entity_name(name) for name in names if name is not None and str(name).strip()}
+        links.extend(
+            through(**{source_column: pk, target_column: entities[key].pk})
+            for key in keys if key in entities
+        )
+
+    with transaction.atomic():
+        through.objects.filter(**{f"{source_column}__in": list(names_by_pk)}).delete()
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
 class CrowdStrikeIntel(models.Model):
     actor_id = models.CharField(max_length=255, primary_key=True)
     name = models.CharField(max_length=255)
@@ -47,6 +229,14 @@ class CrowdStrikeIntel(models.Model):
     adversary_type = models.CharField(max_length=100, null=True, blank=True)
     origins = models.JSONField(null=True, blank=True)
     last_update_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # jsonb_path_ops GIN indexes back the @> containment filters in the API
+            GinIndex(fields=['capabilities'], opclasses=['jsonb_path_ops'], name='csintel_capabilities_gin'),
+            GinIndex(fields=['motivations'], opclasses=['jsonb_path_ops'], name='csintel_motivations_gin'),
+            GinIndex(fields=['origins'], opclasses=['jsonb_path_ops'], name='csintel_origins_gin'),
+        ]
     
     def __str__(self):
         return self.name
@@ -62,37 +252,48 @@ class CrowdStrikeMalware(models.Model):
     activity_end_date = models.DateTimeField(null=True, blank=True)
     threat_groups = models.JSONField(null=True, blank=True)  # Associated threat groups/actors
     last_update_date = models.DateTimeField(null=True, blank=True)
+
+    # Normalized copies of the JSON lists above, used for exact filtering
+    ttp_entities = models.ManyToManyField(TTP, related_name='malware', blank=True)
+    targeted_industry_entities = models.ManyToManyField(Sector, related_name='malware', blank=True)
+    threat_group_entities = models.ManyToManyField(ThreatGroup, related_name='malware', blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['ttps'], opclasses=['jsonb_path_ops'], name='csmalware_ttps_gin'),
+            GinIndex(fields=['targeted_industries'], opclasses=['jsonb_path_ops'], name='csmalware_industries_gin'),
+            GinIndex(fields=['threat_groups'], opclasses=['jsonb_path_ops'], name='csmalware_threat_groups_gin'),
+        ]
     
     def __str__(self):
         return self.name
 
-class CISAKev(models.Model):
+    @classmethod
+    def sync_entities(cls, malware_list):
+        """Mirror the JSON list columns of the given malware families into the join tables."""
+        sync_entity_links(malware_list, 'ttp_entities', lambda m: m.ttps)
+        sync_entity_links(malware_list, 'targeted_industry_entities', lambda m: m.targeted_industries)
+        sync_entity_links(malware_list, 'threat_group_entities', lambda m: m.threat_groups)
+
+class CISAKevManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(source=Vulnerability.SOURCE_CISA_KEV)
+
+class CISAKev(Vulnerability):
     """
-    Model for CISA Known Exploited Vulnerabilities.
+    CISA Known Exploited Vulnerabilities: the 'cisa_kev' rows of Vulnerability.
     """
-    cve_id = models.CharField(max_length=50, unique=True)
-    vulnerability_name = models.CharField(max_length=500)
-    description = models.TextField()
-    date_added = models.DateField()
-    due_date = models.DateField()
-    vendor_project = models.CharField(max_length=255)
-    product = models.CharField(max_length=255)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    objects = CISAKevManager()
 
     class Meta:
+        proxy = True
         verbose_name = "CISA Known Exploited Vulnerability"
         verbose_name_plural = "CISA Known Exploited Vulnerabilities"
         ordering = ['-date_added']
-        indexes = [
-            models.Index(fields=['cve_id']),
-            models.Index(fields=['date_added']),
-            models.Index(fields=['vendor_project']),
-            models.Index(fields=['product']),
-        ]
 
-    def __str__(self):
-        return f"{self.cve_id} - {self.vulnerability_name}"
+    def save(self, *args, **kwargs):
+        self.source = Vulnerability.SOURCE_CISA_KEV
+        super().save(*args, **kwargs)
 
 class CrowdStrikeTailoredIntel(models.Model):
     """
@@ -112,6 +313,10 @@ class CrowdStrikeTailoredIntel(models.Model):
     # Add new JSON fields
     threat_groups_json = models.JSONField(default=list, null=True, blank=True)
     targeted_sectors_json = models.JSONField(default=list, null=True, blank=True)
+
+    # Normalized entities, populated from the JSON fields by the ingest path
+    threat_group_entities = models.ManyToManyField(ThreatGroup, related_name='tailored_intel', blank=True)
+    targeted_sector_entities = models.ManyToManyField(Sector, related_name='tailored_intel', blank=True)
     
     class Meta:
         verbose_name = "CrowdStrike Tailored Intel"
@@ -120,6 +325,8 @@ class CrowdStrikeTailoredIntel(models.Model):
             models.Index(fields=['publish_date']),
             models.Index(fields=['last_updated']),
             models.Index(fields=['title']),
+            GinIndex(fields=['threat_groups_json'], opclasses=['jsonb_path_ops'], name='cstailored_groups_gin'),
+            GinIndex(fields=['targeted_sectors_json'], opclasses=['jsonb_path_ops'], name='cstailored_sectors_gin'),
         ]
     
     def __str__(self):
@@ -134,3 +341,116 @@ class CrowdStrikeTailoredIntel(models.Model):
             self.targeted_sectors_json = [sector.strip() for sector in self.targeted_sectors.split(',') if sector.strip()]
         
         super().save(*args, **kwargs)
+
+    @classmethod
+    def sync_entities(cls, reports):
+        """Mirror the JSON list columns of the given reports into the join tables."""
+        sync_entity_links(reports, 'threat_group_entities', lambda r: r.threat_groups_json)
+        sync_entity_links(reports, 'targeted_sector_entities', lambda r: r.targeted_sectors_json)
+
+class Indicator(models.Model):
+    """
+    Indicator of compromise (IP, domain, URL, file hash, ...) from the CrowdStrike
+    Intel indicators feed, keyed by type and normalized value.
+
+    ip_network holds addresses and CIDR blocks as inet (GiST inet_ops, so a lookup
+    finds every block containing an address) and reversed_domain holds domains
+    with reversed labels ("com.example.www.") for prefix/suffix queries; see
+    ioc_scraper.indicators for normalization and batch lookups.
+    """
+    indicator_id = models.CharField(max_length=512, db_index=True)  # Falcon ID, e.g. domain_example.com
+    indicator = models.TextField()
+    indicator_type = models.CharField(max_length=50)
+    normalized_value = models.TextField()
+    ip_network = models.GenericIPAddressField(null=True, blank=True)  # inet: address or CIDR block
+    reversed_domain = models.TextField(null=True, blank=True)
+    source = models.CharField(max_length=255, null=True, blank=True)
+    malicious_confidence = models.CharField(max_length=50, null=True, blank=True)  # "hit type"
+    matched_rule_names = models.JSONField(default=list, blank=True)
+    details = models.TextField(null=True, blank=True)
+    first_seen = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    published_date = models.DateTimeField(null=True, blank=True)
+    last_updated = models.DateTimeField(null=True, blank=True)
+    malware_families = models.JSONField(default=list, blank=True)
+    threat_groups = models.JSONField(default=list, blank=True)
+    reports = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['indicator_type', 'normalized_value'], name='indicator_type_value_uniq'),
+        ]
+        indexes = [
+            # Equality probes on the value alone (Postgres hash indexes cannot be unique)
+            HashIndex(fields=['normalized_value'], name='indicator_value_hash'),
+            GistIndex(fields=['ip_network'], opclasses=['inet_ops'], name='indicator_ip_network_gist'),
+            models.Index(fields=['reversed_domain'], opclasses=['text_pattern_ops'], name='indicator_rdomain_pattern'),
+            models.Index(fields=['published_date'], name='indicator_published_idx'),
+            models.Index(fields=['indicator_type', '-published_date'], name='indicator_type_published_idx'),
+            GinIndex(fields=['malware_families'], opclasses=['jsonb_path_ops'], name='indicator_malware_gin'),
+            GinIndex(fields=['threat_groups'], opclasses=['jsonb_path_ops'], name='indicator_groups_gin'),
+        ]
+
+    def __str__(self):
+        return f"{self.indicator_type}:{self.indicator}"
+
+class SourceStatistics(models.Model):
+    """
+    Precomputed per-source aggregates (row counts, date ranges, last ingest time).
+    Rows are refreshed by the ingest pipeline so dashboards and health checks can
+    read them without scanning the underlying tables.
+    """
+    category = models.CharField(max_length=50)  # intelligence_article, tailored_intel, threat_actor, ...
+    source = models.CharField(max_length=100, blank=True, default='')  # Empty for whole-table rows
+    item_count = models.PositiveIntegerField(default=0)
+    earliest_date = models.DateTimeField(null=True, blank=True)
+    latest_date = models.DateTimeField(null=True, blank=True)
+    last_ingest_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Source Statistics"
+        verbose_name_plural = "Source Statistics"
+        ordering = ['category', 'source']
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'source'], name='unique_source_statistics'),
+        ]
+
+    def __str__(self):
+        return f"{self.category}:{self.source or '*'} ({self.item_count})"
+
+class SourceSchedule(models.Model):
+    """
+    Adaptive polling state of one intelligence article source (see ioc_scraper.sources).
+    """
+    source = models.CharField(max_length=100, unique=True)
+    interval_seconds = models.PositiveIntegerField()
+    next_run_at = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)  # Last successful fetch
+    last_new_items = models.PositiveIntegerField(default=0)
+    items_per_hour = models.FloatField(null=True, blank=True)  # Smoothed publication rate
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['source']
+
+    def __str__(self):
+        return f"{self.source}: every {self.interval_seconds}s"
+
+class SyncState(models.Model):
+    """
+    Per-feed synchronization cursor (catalog version, last modified timestamp, ...).
+    Ingest tasks update the cursor in the same transaction as their bulk writes, so a
+    failed run never advances it past data that was not stored.
+    """
+    key = models.CharField(max_length=100, unique=True)  # e.g. cisa_kev, crowdstrike_actors
+    cursor = models.CharField(max_length=255, blank=True, default='')
+    metadata = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sync State"
+
+    def __str__(self):
+        return f"{self.key}: {self.cursor}"
@@ -0,0 +1,175 @@
+"""
+Retention for intelligence articles: hot table plus a monthly-partitioned archive.
+
+The hot table (IntelligenceArticle) only keeps the last ARTICLE_HOT_MONTHS whole
+months, so the API's default "newest first" lists and the scrapers' upserts work
+on a small table. Older rows are moved in batches into
+ioc_scraper_intelligencearticle_archive, which is range-partitioned by
+published_date with one partition per calendar month (UTC). Partitions are
+created when the first row of their month is archived.
+
+Archive months older than ARTICLE_RETENTION_MONTHS are detached from the parent
+and dropped. That takes constant time regardless of how many rows the month holds,
+and there is no row-by-row DELETE or vacuum afterwards. With detach_only the detached table
+is kept as a standalone table (e.g. to dump it to cold storage first).
+"""
+
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .dedup import repoint_orphaned_clusters
+from .models import ArchivedIntelligenceArticle, ArticleLSHBucket, IntelligenceArticle
+from .stats import record_source_ingest
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_COLUMNS = (
+    'id', 'title', 'source', 'url', 'published_date', 'summary', 'threat_actor_type', 'target_industries',
+    'cluster_id',
+)
+_PARTITION_SUFFIX_RE = re.compile(r'_p(\d{4})_(\d{2})$')
+
+def month_start(value, months_back=0):
+    """First instant (UTC) of value's month, moved months_back calendar months earlier."""
+    value = value.astimezone(dt_timezone.utc)
+    index = value.year * 12 + value.month - 1 - months_back
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+def partition_name(month):
+    return f"{ArchivedIntelligenceArticle._meta.db_table}_p{month:%Y_%m}"
+
+def ensure_partition(cursor, month):
+    """Create the archive partition holding month (a month_start value) if it does not exist."""
+    parent = connection.ops.quote_name(ArchivedIntelligenceArticle._meta.db_table)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(partition_name(month))} "
+        f"PARTITION OF {parent} FOR VALUES FROM (%s) TO (%s)",
+        [month, month_start(month, months_back=-1)],
+    )
+
+def list_partitions():
+    """Return [(month, partition name)] for every archive partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [ArchivedIntelligenceArticle._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = _PARTITION_SUFFIX_RE.search(name)
+        if match:
+            partitions.append((datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc), name))
+    return sorted(partitions)
+
+def _move_batch(before, batch_size):
+    hot = connection.ops.quote_name(IntelligenceArticle._meta.db_table)
+    archive = connection.ops.quote_name(ArchivedIntelligenceArticle._meta.db_table)
+    columns = ', '.join(ARCHIVE_COLUMNS)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Oldest rows first, locked so a concurrent run cannot archive them twice
+            cursor.execute(
+                f"SELECT id, source, published_date FROM {hot} WHERE published_date < %s "
+                f"ORDER BY published_date, id LIMIT %s FOR UPDATE SKIP LOCKED",
+                [before, batch_size],
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return 0, set()
+            ids = [row[0] for row in rows]
+            for month in sorted({month_start(row[2]) for row in rows}):
+                ensure_partition(cursor, month)
+
+            ArticleLSHBucket.objects.filter(article_id__in=ids).delete()
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {hot} WHERE id = ANY(%s) RETURNING {columns}) "
+                f"INSERT INTO {archive} ({columns}) SELECT {columns} FROM moved",
+                [ids],
+            )
+            moved = cursor.rowcount
+            # Clusters whose representative was archived get their oldest remaining member instead
+            repoint_orphaned_clusters(cursor, ids)
+    return moved, {row[1] for row in rows}
+
+def archive_articles(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move hot articles published before `before` into the archive, one short transaction per batch.
+
+    Returns:
+        int: Number of articles archived
+    """
+    archived = 0
+    affected_sources = set()
+    while True:
+        moved, sources = _move_batch(before, batch_size)
+        if not moved:
+            break
+        archived += moved
+        affected_sources.update(sources)
+
+    for source in affected_sources:
+        record_source_ingest(source)
+    if archived:
+        logger.info(f"Archived {archived} intelligence articles published before {before:%Y-%m-%d}")
+    return archived
+
+def drop_expired_partitions(before, detach_only=False):
+    """
+    Detach (and unless detach_only, drop) archive partitions whose whole month is before `before`.
+
+    Returns:
+        list: Names of the partitions removed from the archive
+    """
+    parent = connection.ops.quote_name(ArchivedIntelligenceArticle._meta.db_table)
+    removed = []
+    for month, name in list_partitions():
+        if month_start(month, months_back=-1) > before:
+            break
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {connection.ops.quote_name(name)}")
+                if not detach_only:
+                    cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+        removed.append(name)
+        logger.info(f"{'Detached' if detach_only else 'Dropped'} archive partition {name}")
+    return removed
+
+def maintain_article_partitions(hot_months=None, retention_months=None, detach_only=False, now=None):
+    """
+    Apply the retention policy: archive articles past the hot window and drop expired archive months.
+
+    Args:
+        hot_months: Whole months kept in the hot table (default settings.ARTICLE_HOT_MONTHS)
+        retention_months: Months kept in total, 0 for no limit (default settings.ARTICLE_RETENTION_MONTHS)
+        detach_only: Keep expired partitions as standalone tables instead of dropping them
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        dict: archived count, removed partition names and the cutoffs applied
+    """
+    hot_months = settings.ARTICLE_HOT_MONTHS if hot_months is None else hot_months
+    retention_months = settings.ARTICLE_RETENTION_MONTHS if retention_months is None else retention_months
+    if hot_months < 1:
+        raise ValueError("hot_months must be at least 1")
+    if retention_months and retention_months < hot_months:
+        raise ValueError("retention_months must not be shorter than hot_months")
+
+    now = now or timezone.now()
+    hot_cutoff = month_start(now, months_back=hot_months - 1)
+    result = {'hot_cutoff': hot_cutoff, 'archived': archive_articles(hot_cutoff), 'removed_partitions': []}
+    if retention_months:
+        result['retention_cutoff'] = month_start(now, months_back=retention_months - 1)
+        result['removed_partitions'] = drop_expired_partitions(result['retention_cutoff'], detach_only)
+    return result
@@ -0,0 +1,197 @@
+"""
+Intelligence article sources and their adaptive polling schedule.
+
+Each source in INTEL_SOURCES gets its own beat entry (see backend/celery.py) that
+runs fetch_intel_source for it. Instead of a fixed period, the entry uses
+AdaptiveSourceSchedule, which fires when the source's SourceSchedule row says
+the next fetch is due. After every fetch, next_interval() derives the next
+interval from what the fetch found:
+
+- new articles: the interval is set from the observed publication rate
+  (an exponentially weighted average of new articles per hour), aiming for
+  about TARGET_NEW_PER_FETCH new articles per fetch. A burst (BURST_SIZE or more
+  new articles) also halves the current interval, so busy periods are followed closely.
+- nothing new: the interval grows by QUIET_GROWTH, so quiet blogs are polled
+  less and less often.
+- failure: the interval doubles (backoff) without touching the rate estimate.
+
+Intervals are clamped to the source's [min_interval, max_interval]. Every
+due time gets +/-JITTER of random spread, so sources drift apart instead of
+firing in the same minute.
+
+This module is imported by backend/celery.py before Django is set up, so it
+only imports models lazily.
+"""
+
+import logging
+import random
+import zlib
+from datetime import timedelta
+
+from celery.schedules import schedule
+
+logger = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+
+# source name (as stored in IntelligenceArticle.source) -> fetch task, Celery queue (see backend/celery.py)
+# and polling bounds in seconds
+INTEL_SOURCES = {
+    'Cisco Talos': {
+        'task': 'ioc_scraper.tasks.fetch_cisco_talos_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR // 2, 'max_interval': 12 * HOUR,
+    },
+    'Microsoft Security': {
+        'task': 'ioc_scraper.tasks.fetch_microsoft_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR // 2, 'max_interval': 12 * HOUR,
+    },
+    'Mandiant': {
+        'task': 'ioc_scraper.tasks.fetch_mandiant_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR, 'max_interval': 24 * HOUR,
+    },
+    'Unit42': {
+        'task': 'ioc_scraper.tasks.fetch_unit42_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR // 2, 'max_interval': 12 * HOUR,
+    },
+    'Zscaler': {
+        'task': 'ioc_scraper.tasks.fetch_zscaler_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR, 'max_interval': 24 * HOUR,
+    },
+    'Google TAG': {
+        'task': 'ioc_scraper.tasks.fetch_google_tag_intelligence',
+        'queue': 'http-scrape',
+        'min_interval': HOUR, 'max_interval': 24 * HOUR,
+    },
+    'Dark Reading': {
+        # Falls back to the basic scraper when the enhanced one is not installed
+        'task': 'ioc_scraper.tasks.fetch_dark_reading_enhanced',
+        'queue': 'headless',
+        'min_interval': HOUR // 4, 'max_interval': 6 * HOUR,
+    },
+}
+
+DEFAULT_INTERVAL = HOUR  # Until a source has history, poll it as often as the old hourly run
+TARGET_NEW_PER_FETCH = 1.0
+BURST_SIZE = 3
+QUIET_GROWTH = 1.5
+FAILURE_BACKOFF = 2.0
+RATE_SMOOTHING = 0.3  # Weight of the latest observation in the items-per-hour average
+JITTER = 0.1
+MAX_CHECK_INTERVAL = 5 * 60  # Longest beat sleep between two looks at a source's due time
+
+def _clamp(value, config):
+    return max(config['min_interval'], min(config['max_interval'], value))
+
+def update_rate(rate, new_items, elapsed_seconds):
+    """Fold one fetch's observation into the items-per-hour moving average."""
+    observed = new_items / max(elapsed_seconds / HOUR, 1 / 60)
+    if rate is None:
+        return observed
+    return RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+
+def next_interval(config, interval, rate, new_items, succeeded):
+    """
+    Seconds until the source should be fetched again.
+
+    Args:
+        config: The source's INTEL_SOURCES entry
+        interval: Current interval in seconds
+        rate: Smoothed new articles per hour (after this fetch)
+        new_items: New articles stored by this fetch
+        succeeded: Whether the fetch succeeded
+    """
+    if not succeeded:
+        return _clamp(interval * FAILURE_BACKOFF, config)
+    if not new_items:
+        return _clamp(interval * QUIET_GROWTH, config)
+    target = TARGET_NEW_PER_FETCH / rate * HOUR if rate else interval
+    if new_items >= BURST_SIZE:
+        target = min(target, interval / 2)
+    return _clamp(target, config)
+
+def jittered(seconds):
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+def record_fetch(source, new_items, succeeded, now=None):
+    """
+    Update a source's schedule after a fetch and return the SourceSchedule row.
+    """
+    from django.utils import timezone
+    from .models import SourceSchedule
+
+    config = INTEL_SOURCES[source]
+    now = now or timezone.now()
+    state, _ = SourceSchedule.objects.get_or_create(
+        source=source, defaults={'interval_seconds': _clamp(DEFAULT_INTERVAL, config)},
+    )
+    if succeeded:
+        elapsed = (now - state.last_run_at).total_seconds() if state.last_run_at else state.interval_seconds
+        state.items_per_hour = update_rate(state.items_per_hour, new_items, elapsed)
+        state.last_run_at = now
+        state.consecutive_failures = 0
+    else:
+        state.consecutive_failures += 1
+    state.last_new_items = new_items
+    state.interval_seconds = round(next_interval(
+        config, state.interval_seconds, state.items_per_hour, new_items, succeeded,
+    ))
+    state.next_run_at = now + timedelta(seconds=jittered(state.interval_seconds))
+    state.save()
+    return state
+
+class AdaptiveSourceSchedule(schedule):
+    """
+    Beat schedule that is due when the source's SourceSchedule.next_run_at has passed.
+
+    Sources without a row yet (or when the database is unreachable) fall back to
+    DEFAULT_INTERVAL from the entry's last run, plus a fixed per-source offset so
+    that a fresh beat does not fire every source in the same minute.
+    """
+
+    def __init__(self, source, nowfun=None, app=None):
+        self.source = source
+        offset = zlib.crc32(source.encode()) % int(DEFAULT_INTERVAL * JITTER)
+        super().__init__(run_every=timedelta(seconds=DEFAULT_INTERVAL + offset), nowfun=nowfun, app=app)
+
+    def _state(self):
+        try:
+            from .models import SourceSchedule
+            return SourceSchedule.objects.filter(source=self.source).values_list('next_run_at', 'updated_at').first()
+        except Exception as e:
+            logger.warning(f"Could not read the schedule of {self.source}: {str(e)}")
+            return None
+
+    def is_due(self, last_run_at):
+        state = self._state()
+        if state is None or state[0] is None:
+            due, next_check = super().is_due(last_run_at)
+            return due, min(next_check, MAX_CHECK_INTERVAL)
+        next_run_at, updated_at = state
+        now = self.now()
+        remaining = (next_run_at - now).total_seconds()
+        if remaining > 0:
+            return False, min(remaining, MAX_CHECK_INTERVAL)
+        # A run was sent after the last recorded fetch and is still in flight; don't send another
+        last_run_at = self.maybe_make_aware(last_run_at)
+        if last_run_at > updated_at and (now - last_run_at).total_seconds() < INTEL_SOURCES[self.source]['min_interval']:
+            return False, MAX_CHECK_INTERVAL
+        return True, MAX_CHECK_INTERVAL
+
+    def __reduce__(self):
+        return self.__class__, (self.source, self.nowfun)
+
+    def __repr__(self):
+        return f'<adaptive source schedule: {self.source}>'
+
+    def __eq__(self, other):
+        if isinstance(other, AdaptiveSourceSchedule):
+            return self.source == other.source
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.__class__, self.source))
@@ -0,0 +1,133 @@
+"""
+Maintenance and lookup of the precomputed SourceStatistics table.
+
+The ingest tasks call the refresh functions after each write so that the
+dashboard, health checks and the /stats/ endpoint read a handful of rows
+instead of running COUNT(*) / GROUP BY / ORDER BY ... LIMIT 1 queries.
+"""
+
+import logging
+from datetime import date, datetime, time
+
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import (
+    CISAKev, CrowdStrikeIntel, CrowdStrikeMalware, CrowdStrikeTailoredIntel,
+    IntelligenceArticle, SourceStatistics, Vulnerability
+)
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_CATEGORY = 'intelligence_article'
+
+# Whole-table statistics: category -> (model, date field used for the date range)
+ENTITY_STATS = {
+    'tailored_intel': (CrowdStrikeTailoredIntel, 'last_updated'),
+    'threat_actor': (CrowdStrikeIntel, 'last_update_date'),
+    'malware': (CrowdStrikeMalware, 'last_update_date'),
+    'vulnerability': (Vulnerability, 'published_date'),
+    'cisa_kev': (CISAKev, 'date_added'),
+}
+
+def _as_datetime(value):
+    """Coerce DateField aggregates to aware datetimes so every row stores the same type."""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return timezone.make_aware(datetime.combine(value, time.min))
+    return value
+
+def _store(category, source, aggregates):
+    stats, _ = SourceStatistics.objects.update_or_create(
+        category=category,
+        source=source,
+        defaults={
+            'item_count': aggregates['item_count'] or 0,
+            'earliest_date': _as_datetime(aggregates['earliest_date']),
+            'latest_date': _as_datetime(aggregates['latest_date']),
+            'last_ingest_at': timezone.now(),
+        }
+    )
+    return stats
+
+def record_source_ingest(source_name):
+    """
+    Refresh the statistics row for one intelligence article source.
+    The aggregate is restricted to that source, so it is served by the source index.
+    """
+    try:
+        aggregates = IntelligenceArticle.objects.filter(source=source_name).aggregate(
+            item_count=Count('id'),
+            earliest_date=Min('published_date'),
+            latest_date=Max('published_date'),
+        )
+        return _store(ARTICLE_CATEGORY, source_name, aggregates)
+    except Exception as e:
+        logger.error(f"Error refreshing statistics for {source_name}: {str(e)}")
+        return None
+
+def source_article_count(source_name):
+    """Stored article count of one source, read from its statistics row."""
+    count = SourceStatistics.objects.filter(category=ARTICLE_CATEGORY, source=source_name).values_list(
+        'item_count', flat=True).first()
+    return count or 0
+
+def record_entity_ingest(category):
+    """Refresh the whole-table statistics row for a CrowdStrike or vulnerability category."""
+    model, date_field = ENTITY_STATS[category]
+    try:
+        aggregates = model.objects.aggregate(
+            item_count=Count('pk'),
+            earliest_date=Min(date_field),
+            latest_date=Max(date_field),
+        )
+        return _store(category, '', aggregates)
+    except Exception as e:
+        logger.error(f"Error refreshing {category} statistics: {str(e)}")
+        return None
+
+def rebuild_all_statistics():
+    """Recompute every statistics row from scratch (used for backfills)."""
+    sources = IntelligenceArticle.objects.values_list('source', flat=True).distinct()
+    for source_name in sources:
+        record_source_ingest(source_name)
+    SourceStatistics.objects.filter(category=ARTICLE_CATEGORY).exclude(source__in=list(sources)).delete()
+    for category in ENTITY_STATS:
+        record_entity_ingest(category)
+
+def get_statistics_snapshot():
+    """
+    Return all precomputed statistics in one query.
+
+    Returns:
+        dict: {
+            "totals": {category: count},
+            "latest": {category: latest date},
+            "sources": [{"source", "count", "earliest_date", "latest_date", "last_ingest_at"}],
+            "last_updated": most recent article or tailored intel date,
+        }
+    """
+    totals = {}
+    latest = {}
+    sources = []
+    for stats in SourceStatistics.objects.all():
+        totals[stats.category] = totals.get(stats.category, 0) + stats.item_count
+        if stats.latest_date and (stats.category not in latest or stats.latest_date > latest[stats.category]):
+            latest[stats.category] = stats.latest_date
+        if stats.category == ARTICLE_CATEGORY:
+            sources.append({
+                "source": stats.source,
+                "count": stats.item_count,
+                "earliest_date": stats.earliest_date,
+                "latest_date": stats.latest_date,
+                "last_ingest_at": stats.last_ingest_at,
+            })
+
+    update_dates = [latest[c] for c in (ARTICLE_CATEGORY, 'tailored_intel') if latest.get(c)]
+    return {
+        "totals": totals,
+        "latest": latest,
+        "sources": sources,
+        "last_updated": max(update_dates) if update_dates else None,
+    }
@@ -6,7 +6,22 @@ from bs4 import BeautifulSoup
 import logging
 from django.utils import timezone
 from django.db.models import Count
-from ioc_scraper.models import CrowdStrikeIntel, CrowdStrikeMalware
+from ioc_scraper.models import CrowdStrikeIntel, CrowdStrikeMalware, CrowdStrikeTailoredIntel
+from ioc_scraper.kev import KEV_FEED_URL, sync_kev_entries
+from ioc_scraper.crowdstrike_sync import (
+    ACTORS_SYNC_KEY, MALWARE_SYNC_KEY, get_cursor, modified_since_params, store_actor_page, store_malware_page,
+)
+from ioc_scraper.cleanup import remove_duplicate_articles
+from ioc_scraper.dedup import assign_clusters
+from ioc_scraper.retention import maintain_article_partitions
+from ioc_scraper.health import (
+    CELERY_INSPECT_TIMEOUT, MONITORED_TABLES, estimated_row_counts, get_cached_health, publish_health, run_probes,
+)
+from ioc_scraper.sources import INTEL_SOURCES, record_fetch
+from ioc_scraper.locks import Lease, single_flight
+from ioc_scraper.stats import (
+    record_source_ingest, record_entity_ingest, get_statistics_snapshot, source_article_count, ARTICLE_CATEGORY,
+)
 import sys
 import os
 import json
@@ -19,6 +34,16 @@ from backend.celery import app as celery_app
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Single-flight lease names (see ioc_scraper.locks); per-source leases are "source:<name>"
+ALL_INTELLIGENCE_LEASE = 'fetch_all_intelligence'
+TAILORED_INTEL_LEASE = 'update_tailored_intelligence'
+CROWDSTRIKE_ACTORS_LEASE = 'crowdstrike_actors'
+CROWDSTRIKE_MALWARE_LEASE = 'crowdstrike_malware'
+CROWDSTRIKE_INDICATORS_LEASE = 'crowdstrike_indicators'
+
+# Custom task state carrying progress metadata, read by the task-status endpoints
+PROGRESS_STATE = 'PROGRESS'
+
 # Import Celery inspect functionality - Use direct import for Celery 5.x
 try:
     from celery.app.control import Inspect as inspect
@@ -29,14 +54,15 @@ except ImportError:
 
 # Add the parent directory to sys.path to allow importing from data_sources
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from data_sources.crowdstrike import falcon, fetch_threat_actors, get_actor_details
+from data_sources.crowdstrike import get_actor_details
+from data_sources.falcon_client import get_intel_client, get_token_stats
+from data_sources.streaming_json import StreamingJSONDocument, DECODE_ERRORS
+from data_sources.falcon_paging import iter_pages
+from data_sources.malware_family import iter_malware_pages
 
 # Add the data_sources directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data_sources'))
 
-# Import crowdstrike module with improved functions
-from crowdstrike import fetch_threat_actors, get_actor_details
-
 # Try to import the enhanced scraper (free version)
 try:
     from data_sources.free_enhanced_scraper import FreeEnhancedScraper, scrape_intelligence_articles, is_free_proxy_configured
@@ -48,78 +74,85 @@ else:
     logger = logging.getLogger(__name__)
 
 @shared_task
-def fetch_cisa_vulnerabilities():
-    """Fetches CISA KEV vulnerabilities and updates the database."""
-    url = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
-    response = requests.get(url)
-
-    if response.status_code !=200:
-        print(f" Error: Unable to fetch data (Status Code {response.status_code})")
+def fetch_cisa_vulnerabilities(force=False):
+    """
+    Fetches the CISA KEV catalog and stores new or changed CVEs.
+    The feed is decoded incrementally from the response stream, and the download
+    stops after the header when the catalogVersion/dateReleased is unchanged.
+    """
+    try:
+        response = requests.get(KEV_FEED_URL, timeout=60, stream=True)
+    except requests.RequestException as e:
+        logger.error(f"Error fetching CISA KEV data: {str(e)}")
         return "failed to fetch CISA KEV data"
 
-    data = response.json().get("vulnerabilities", [])
-
-
-    for vuln in data:
-        cve_id = vuln.get("cveID")
-        published_date = vuln.get("dateAdded", "1970-01-01") #Ensure no missing dates
-        published_date = datetime.strptime(published_date, "%Y-%m-%d").date() 
+    with response:
+        if response.status_code != 200:
+            logger.error(f"Unable to fetch CISA KEV data (Status Code {response.status_code})")
+            return "failed to fetch CISA KEV data"
 
-        print(f" Process {cve_id} - Published: {published_date}")
+        # Let urllib3 undo any gzip transfer encoding on the raw stream
+        response.raw.decode_content = True
+        try:
+            feed = StreamingJSONDocument(response.raw, 'vulnerabilities')
+            result = sync_kev_entries(feed.header, feed.items(), force=force)
+        except DECODE_ERRORS + (requests.RequestException,) as e:
+            logger.error(f"Error reading CISA KEV feed: {str(e)}")
+            return "failed to read CISA KEV data"
 
-        Vulnerability.objects.update_or_create(
-            cve_id=cve_id,
-            defaults={
-                "vulnerability_name": vuln.get("vulnerabilityName", "Unknown"),
-                "description": vuln.get("shortDescription", "No description provided"),
-                "severity": vuln.get("serverity", "Unknown"),
-                "published_date": published_date,
-                "source_url": vuln.get("url", "Unknown"),
-            }
-        )
+    if result["status"] == "unchanged":
+        return f"CISA KEV catalog {result['catalog_version']} unchanged"
 
-    print(f" Updated {len(data)} vulnerabilities from CISA KEV")
-    return (f"Updated {len(data)} vulnerabilities from CISA KEV")
+    record_entity_ingest('cisa_kev')
+    record_entity_ingest('vulnerability')
+    rebuild_ioc_matcher.delay()
+    return (f"CISA KEV catalog {result['catalog_version']}: {result['created']} created, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged")
 
 @shared_task
+@single_flight(ALL_INTELLIGENCE_LEASE)
 def fetch_all_intelligence():
     """
-    Orchestrate the fetching of intelligence articles from all sources in parallel,
-    followed by post-processing tasks.
+    Fetch every intelligence article source in parallel, followed by post-processing tasks.
+    Each source runs as fetch_intel_source on its own queue (see backend.celery.route_task);
+    sources whose own scheduled fetch is in flight are skipped.
     """
-    # Create a list of task signatures to execute in parallel
-    scraper_tasks = [
-        fetch_cisco_talos_intelligence.s(),
-        fetch_microsoft_intelligence.s(),
-        fetch_mandiant_intelligence.s(),
-        fetch_unit42_intelligence.s(),
-        fetch_zscaler_intelligence.s(),
-        fetch_google_tag_intelligence.s(),
-    ]
-    
-    # Add the appropriate dark reading scraper based on availability
-    if ENHANCED_SCRAPER_AVAILABLE:
-        scraper_tasks.append(fetch_dark_reading_enhanced.s())
-    else:
-        scraper_tasks.append(fetch_dark_reading_intelligence.s())
+    fetches = [fetch_intel_source.s(source_name) for source_name in INTEL_SOURCES]
+    result = chord(fetches)(process_intelligence_data.s())
     
-    # Instead of using a chord, run the tasks sequentially
-    results = []
-    for task in scraper_tasks:
+    return f"Dispatched {len(fetches)} source fetches, processing in task {result.id}"
+
+@shared_task
+def fetch_intel_source(source_name):
+    """
+    Fetch one intelligence article source and reschedule it from what the fetch found.
+    Run by the per-source beat entries (see ioc_scraper.sources).
+    """
+    return fetch_source(source_name)
+
+def fetch_source(source_name):
+    """Run a source's scraper under its single-flight lease and record the outcome in its schedule."""
+    config = INTEL_SOURCES[source_name]
+    with Lease(f"source:{source_name}") as lease:
+        if not lease.acquired:
+            return f"Skipped {source_name}: a fetch is already running"
+        
+        before = source_article_count(source_name)
         try:
-            result = task.apply()
-            results.append(result.get())
+            # Called from fetch_intel_source, which route_task already sent to this source's queue
+            result = celery_app.tasks[config['task']]()
         except Exception as e:
-            logger.error(f"Error running scraper task: {str(e)}")
-            results.append(f"Error: {str(e)}")
-    
-    # Process the results
-    try:
-        process_intelligence_data(results)
-    except Exception as e:
-        logger.error(f"Error processing intelligence data: {str(e)}")
-    
-    return f"Intelligence data collection process completed"
+            logger.error(f"Error fetching {source_name} intelligence: {str(e)}")
+            result = f"Error fetching {source_name} intelligence: {str(e)}"
+        
+        # The scraper tasks report success as "Updated N ..." and failures as "Failed ..."/"Error ..."
+        succeeded = isinstance(result, str) and result.startswith("Updated")
+        new_items = max(source_article_count(source_name) - before, 0)
+        if new_items:
+            assign_clusters()
+        
+        schedule_state = record_fetch(source_name, new_items, succeeded)
+    return f"{result} ({new_items} new, next fetch in {schedule_state.interval_seconds // 60} minutes)"
 
 @shared_task
 def process_intelligence_data(results):
@@ -131,28 +164,27 @@ def process_intelligence_data(results):
         results: List of results from all scraper tasks
     """
     try:
-        # Count total articles
-        total_articles = IntelligenceArticle.objects.count()
-        
-        # Get stats on sources
-        source_counts = IntelligenceArticle.objects.values('source').annotate(count=Count('source'))
+        # Read the precomputed per-source statistics instead of aggregating the table
+        snapshot = get_statistics_snapshot()
+        total_articles = snapshot["totals"].get(ARTICLE_CATEGORY, 0)
+        source_counts = snapshot["sources"]
         sources_summary = ", ".join([f"{item['source']}: {item['count']}" for item in source_counts])
         
         # Get the date range of intelligence articles
-        latest_date = IntelligenceArticle.objects.order_by('-published_date').first()
-        earliest_date = IntelligenceArticle.objects.order_by('published_date').first()
+        earliest_dates = [item['earliest_date'] for item in source_counts if item['earliest_date']]
+        latest_dates = [item['latest_date'] for item in source_counts if item['latest_date']]
         
         date_range = ""
-        if latest_date and earliest_date:
-            date_range = f"ranging from {earliest_date.published_date.strftime('%Y-%m-%d')} to {latest_date.published_date.strftime('%Y-%m-%d')}"
+        if earliest_dates and latest_dates:
+            date_range = f"ranging from {min(earliest_dates).strftime('%Y-%m-%d')} to {max(latest_dates).strftime('%Y-%m-%d')}"
         
-        # Calculate how many new articles were fetched in this run
+        # Calculate how many new articles were fetched in this run (index range scan on published_date)
         one_day_ago = timezone.now() - timedelta(days=1)
         recent_articles = IntelligenceArticle.objects.filter(published_date__gte=one_day_ago).count()
         
-        # Identify potential overlap or duplicate articles (articles with similar titles)
-        # This is a simplified check - a more sophisticated approach could use text similarity
-        message = f"Intelligence data processed: {total_articles} total articles from {len(source_counts)} sources ({sources_summary}) {date_range}. {recent_articles} new articles in the last 24 hours."
+        # Group near-duplicate coverage of the same story across sources (MinHash/LSH)
+        clustered, near_duplicates = assign_clusters()
+        message = f"Intelligence data processed: {total_articles} total articles from {len(source_counts)} sources ({sources_summary}) {date_range}. {recent_articles} new articles in the last 24 hours. {near_duplicates} of {clustered} newly clustered articles are near-duplicates."
         
         logger.info(message)
         return message
@@ -200,6 +232,8 @@ def fetch_cisco_talos_intelligence():
                 )
                 count += 1
             
+            record_source_ingest(source_name)
+            
             logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
             return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
         
@@ -275,6 +309,8 @@ def fetch_cisco_talos_intelligence():
                 logger.error(f"Error processing article from {source_name}: {str(e)}")
                 continue
                 
+        record_source_ingest(source_name)
+                
         logger.info(f"Updated {count} {source_name} intelligence articles using basic scraper")
         return f"Updated {count} {source_name} intelligence articles using basic scraper"
     
@@ -338,6 +374,8 @@ def fetch_microsoft_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -379,6 +417,8 @@ def fetch_mandiant_intelligence():
                 )
                 count += 1
             
+            record_source_ingest(source_name)
+            
             logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
             return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
         
@@ -446,6 +486,8 @@ def fetch_mandiant_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -462,11 +504,13 @@ def fetch_crowdstrike_intel():
     # Create a chain of tasks with dependencies
     # 1. Fetch threat actors
     # 2. Fetch malware data
-    # 3. Fetch tailored intelligence (via update_tailored_intelligence task)
-    # 4. Process and summarize all collected data
+    # 3. Fetch indicators
+    # 4. Fetch tailored intelligence (via update_tailored_intelligence task)
+    # 5. Process and summarize all collected data
     workflow = chain(
         fetch_crowdstrike_actors.s(),
         fetch_crowdstrike_malware.s(),
+        fetch_crowdstrike_indicators.s(),
         update_tailored_intelligence.s(),
         summarize_crowdstrike_intel.s()
     )
@@ -477,47 +521,36 @@ def fetch_crowdstrike_intel():
     return "CrowdStrike intelligence collection workflow initiated"
 
 @shared_task
+@single_flight(CROWDSTRIKE_ACTORS_LEASE)
 def fetch_crowdstrike_actors():
     """
     Fetch threat actors from CrowdStrike API.
     This is step 1 in the CrowdStrike intelligence collection workflow.
+    Only actors modified since the stored cursor are requested; each page is
+    written together with the advanced cursor.
     """
     logger.info("Fetching CrowdStrike threat actors...")
     
     try:
-        # Get threat actors from CrowdStrike API
-        actors_data = fetch_threat_actors()
-        
-        if not actors_data:
-            logger.warning("No threat actors data received from CrowdStrike API.")
-            return "No threat actors data received"
-            
-        # Process actor data directly from the response
-        processed_actors = get_actor_details(actors_data)
+        falcon = get_intel_client()
+        if falcon is None:
+            return "CrowdStrike API credentials not configured"
         
+        cursor = get_cursor(ACTORS_SYNC_KEY)
         created_count = 0
         updated_count = 0
         
-        for actor in processed_actors:
-            # Update or create actor
-            obj, created = CrowdStrikeIntel.objects.update_or_create(
-                actor_id=actor['id'],
-                defaults={
-                    'name': actor['name'],
-                    'description': actor.get('description'),
-                    'capabilities': actor.get('capabilities', []),
-                    'motivations': actor.get('motivations', []),
-                    'objectives': actor.get('objectives', []),
-                    'adversary_type': actor.get('type'),
-                    'origins': actor.get('origins', []),
-                    'last_update_date': timezone.now()
-                }
-            )
-            
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        for page in iter_pages(falcon.query_actor_entities, strict=True, **modified_since_params(cursor)):
+            # Process actor data directly from the response
+            created, updated = store_actor_page(get_actor_details(page))
+            created_count += created
+            updated_count += updated
+        
+        if created_count + updated_count == 0:
+            logger.info(f"No CrowdStrike threat actors modified since cursor {cursor}")
+            return "No threat actor changes"
+        
+        record_entity_ingest('threat_actor')
         
         result_message = f"CrowdStrike Actors: Created {created_count}, Updated {updated_count}"
         logger.info(result_message)
@@ -529,10 +562,13 @@ def fetch_crowdstrike_actors():
         return error_message
 
 @shared_task
+@single_flight(CROWDSTRIKE_MALWARE_LEASE)
 def fetch_crowdstrike_malware(previous_result=None):
     """
     Fetch malware data from CrowdStrike API.
     This is step 2 in the CrowdStrike intelligence collection workflow.
+    Only families modified since the stored cursor are requested; each page of
+    details is bulk upserted together with the advanced cursor.
     
     Args:
         previous_result: Result from the previous task in the chain (fetch_crowdstrike_actors)
@@ -540,11 +576,26 @@ def fetch_crowdstrike_malware(previous_result=None):
     logger.info(f"Fetching CrowdStrike malware data... (Previous task result: {previous_result})")
     
     try:
-        # TODO: Implement actual malware data fetching from CrowdStrike API
-        # This is a placeholder - in a real implementation, you'd call the API to get malware data
+        falcon = get_intel_client()
+        if falcon is None:
+            return "CrowdStrike API credentials not configured"
+        
+        cursor = get_cursor(MALWARE_SYNC_KEY)
+        created_count = 0
+        updated_count = 0
+        
+        for page in iter_malware_pages(falcon, since=cursor):
+            created, updated = store_malware_page(page)
+            created_count += created
+            updated_count += updated
         
-        # For now, we'll just log that this was called
-        result_message = "CrowdStrike Malware: Collection not yet implemented"
+        if created_count + updated_count == 0:
+            logger.info(f"No CrowdStrike malware families modified since cursor {cursor}")
+            return "No malware family changes"
+        
+        record_entity_ingest('malware')
+        
+        result_message = f"CrowdStrike Malware: Created {created_count}, Updated {updated_count}"
         logger.info(result_message)
         return result_message
     
@@ -553,6 +604,50 @@ def fetch_crowdstrike_malware(previous_result=None):
         logger.error(error_message)
         return error_message
 
+@shared_task
+@single_flight(CROWDSTRIKE_INDICATORS_LEASE)
+def fetch_crowdstrike_indicators(previous_result=None):
+    """
+    Fetch indicators from the CrowdStrike Intel indicators feed.
+    This is step 3 in the CrowdStrike intelligence collection workflow.
+    Indicators published since the stored cursor are streamed page by page
+    into the Indicator table.
+    
+    Args:
+        previous_result: Result from the previous task in the chain (fetch_crowdstrike_malware)
+    """
+    logger.info(f"Fetching CrowdStrike indicators... (Previous task result: {previous_result})")
+    
+    try:
+        from data_sources.tailored_intel_extended import sync_indicators
+        result = sync_indicators()
+        if result.get("status") == "success":
+            rebuild_ioc_matcher.delay()
+        
+        logger.info(f"CrowdStrike Indicators: {result}")
+        return result
+    
+    except Exception as e:
+        error_message = f"Error fetching CrowdStrike indicators: {str(e)}"
+        logger.error(error_message)
+        return error_message
+
+@shared_task
+def rebuild_ioc_matcher(full=False):
+    """
+    Rebuild the memory-mapped IOC matcher snapshot after an indicator or KEV ingest.
+    New indicators are merged into the previous snapshot unless full=True.
+    """
+    from ioc_scraper.matcher import rebuild_snapshot
+    
+    try:
+        header = rebuild_snapshot(full=full)
+        return f"IOC matcher snapshot rebuilt: {header['counts']}"
+    except Exception as e:
+        error_message = f"Error rebuilding IOC matcher snapshot: {str(e)}"
+        logger.error(error_message)
+        return error_message
+
 @shared_task
 def summarize_crowdstrike_intel(previous_result=None):
     """
@@ -565,17 +660,14 @@ def summarize_crowdstrike_intel(previous_result=None):
     logger.info(f"Summarizing CrowdStrike intelligence... (Previous task result: {previous_result})")
     
     try:
-        # Count total entities
-        actor_count = CrowdStrikeIntel.objects.count()
-        malware_count = CrowdStrikeMalware.objects.count()
-        tailored_intel_count = CrowdStrikeTailoredIntel.objects.count()
+        # Read counts and last-update times from the precomputed statistics
+        snapshot = get_statistics_snapshot()
+        actor_count = snapshot["totals"].get('threat_actor', 0)
+        malware_count = snapshot["totals"].get('malware', 0)
+        tailored_intel_count = snapshot["totals"].get('tailored_intel', 0)
         
-        # Get timestamp of most recent data
-        most_recent_actor = CrowdStrikeIntel.objects.order_by('-last_update_date').first()
-        most_recent_actor_date = most_recent_actor.last_update_date if most_recent_actor else "N/A"
-        
-        most_recent_intel = CrowdStrikeTailoredIntel.objects.order_by('-last_updated').first()
-        most_recent_intel_date = most_recent_intel.last_updated if most_recent_intel else "N/A"
+        most_recent_actor_date = snapshot["latest"].get('threat_actor') or "N/A"
+        most_recent_intel_date = snapshot["latest"].get('tailored_intel') or "N/A"
         
         # Create summary
         summary = (
@@ -593,11 +685,18 @@ def summarize_crowdstrike_intel(previous_result=None):
         logger.error(error_message)
         return error_message
 
-@shared_task
-def update_tailored_intelligence():
+@shared_task(bind=True)
+@single_flight(TAILORED_INTEL_LEASE)
+def update_tailored_intelligence(self, previous_result=None):
     """
     Celery task to update CrowdStrike Tailored Intelligence data.
-    This task runs the tailored_intelligence.py update function.
+    This task streams reports from the Falcon API into the database in chunks,
+    publishing a PROGRESS state (pages fetched, rows written) after each page.
+    Errors are re-raised so the task ends in FAILURE (pages already stored stay
+    stored, and the next run resumes from the cursor).
+    
+    Args:
+        previous_result: Result from the previous task when run in the CrowdStrike chain
     """
     logger.info("Starting scheduled update of CrowdStrike Tailored Intelligence data")
     
@@ -608,15 +707,21 @@ def update_tailored_intelligence():
         if data_sources_dir not in sys.path:
             sys.path.insert(0, data_sources_dir)
         
-        # Import and run the update function
-        from data_sources.tailored_intelligence import run_update
-        result = run_update()
-        
-        logger.info(f"Completed scheduled update of Tailored Intelligence data: {result}")
-        return result
+        # Import and run the streaming sync
+        from data_sources.tailored_intelligence import sync_tailored_intel
+        result = sync_tailored_intel(progress=lambda meta: report_progress(self, meta))
     except Exception as e:
         logger.error(f"Error in scheduled update of Tailored Intelligence data: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        raise
+    
+    record_entity_ingest('tailored_intel')
+    logger.info(f"Completed scheduled update of Tailored Intelligence data: {result}")
+    return result
+
+def report_progress(task, meta):
+    """Publish a PROGRESS state for the running task (no-op when called outside a worker)."""
+    if task.request.id and not task.request.called_directly:
+        task.update_state(state=PROGRESS_STATE, meta=meta)
 
 @shared_task
 def fetch_unit42_intelligence():
@@ -653,6 +758,8 @@ def fetch_unit42_intelligence():
                 )
                 count += 1
             
+            record_source_ingest(source_name)
+            
             logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
             return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
         
@@ -712,6 +819,8 @@ def fetch_unit42_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -753,6 +862,8 @@ def fetch_zscaler_intelligence():
                 )
                 count += 1
             
+            record_source_ingest(source_name)
+            
             logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
             return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
         
@@ -816,6 +927,8 @@ def fetch_zscaler_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -878,6 +991,8 @@ def fetch_orange_defense_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -955,6 +1070,8 @@ def fetch_dark_reading_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -997,6 +1114,8 @@ def fetch_google_tag_intelligence():
                 )
                 count += 1
             
+            record_source_ingest(source_name)
+            
             logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
             return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
         
@@ -1060,6 +1179,8 @@ def fetch_google_tag_intelligence():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles")
         return f"Updated {count} {source_name} intelligence articles"
     except Exception as e:
@@ -1121,6 +1242,8 @@ def fetch_dark_reading_enhanced():
             )
             count += 1
         
+        record_source_ingest(source_name)
+        
         logger.info(f"Updated {count} {source_name} intelligence articles using enhanced scraper")
         return f"Updated {count} {source_name} intelligence articles using enhanced scraper"
     except Exception as e:
@@ -1136,30 +1259,8 @@ def system_health_check():
     """
     logger.info("Running system health check...")
     
-    # Collect health check results with error handling
-    results = {
-        "database": check_database_health(),
-    }
-    
-    # Check Celery health with additional error handling
-    try:
-        results["celery"] = check_celery_health()
-    except Exception as e:
-        logger.error(f"Celery health check completely failed: {str(e)}")
-        results["celery"] = {
-            "status": "unhealthy", 
-            "details": f"Health check error: {str(e)}"
-        }
-    
-    # Continue with other checks
-    try:
-        results["data_sources"] = check_data_sources_health()
-    except Exception as e:
-        logger.error(f"Data sources health check failed: {str(e)}")
-        results["data_sources"] = {
-            "status": "unhealthy", 
-            "details": f"Health check error: {str(e)}"
-        }
+    # Probes run concurrently under one deadline (see ioc_scraper.health)
+    results = run_probes(HEALTH_PROBES)
     
     try:
         results["cleanup"] = perform_cleanup_tasks()
@@ -1170,66 +1271,46 @@ def system_health_check():
             "details": f"Cleanup error: {str(e)}"
         }
     
-    # Generate overall status
-    unhealthy_count = sum(1 for v in results.values() if v.get("status") == "unhealthy")
-    degraded_count = sum(1 for v in results.values() if v.get("status") == "degraded")
-    
-    if unhealthy_count > 0:
-        overall_status = "unhealthy"
-    elif degraded_count > 0:
-        overall_status = "degraded"
-    else:
-        overall_status = "healthy"
-    
-    # Create summary
-    summary = f"System Health: {overall_status.upper()}\n"
-    for component, info in results.items():
-        summary += f"- {component}: {info['status']}"
-        if info.get("details"):
-            summary += f" ({info['details']})"
-        summary += "\n"
-    
-    logger.info(summary)
-    
     # Store the health check result in cache for dashboard display
-    cache.set("system_health_check_result", {
-        "timestamp": timezone.now().isoformat(),
-        "overall_status": overall_status,
-        "results": results,
-        "summary": summary,
-    }, timeout=86400)  # Cache for 24 hours
+    report = publish_health(results)
+    logger.info(report["summary"])
+    return report["summary"]
+
+@shared_task
+def refresh_system_health():
+    """
+    Re-run the health probes and publish the report for the health endpoint.
+    Runs every few minutes; the cleanup result of the last daily check is carried over.
+    """
+    results = run_probes(HEALTH_PROBES)
     
-    return summary
+    previous = get_cached_health()
+    if previous and "cleanup" in previous.get("results", {}):
+        results["cleanup"] = previous["results"]["cleanup"]
+    
+    return publish_health(results)["overall_status"]
 
 def check_database_health():
-    """Check database connection and integrity."""
+    """Check database connection and whether the main tables hold data (planner estimates, no scans)."""
     try:
         # Check database connection
         with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
             cursor.fetchone()
         
-        # Get database stats
-        article_count = IntelligenceArticle.objects.count()
-        intel_count = CrowdStrikeTailoredIntel.objects.count()
-        actor_count = CrowdStrikeIntel.objects.count()
-        
-        # Check for any tables with 0 records (potential issues)
-        empty_tables = []
-        if article_count == 0:
-            empty_tables.append("intelligence_articles")
-        if intel_count == 0:
-            empty_tables.append("tailored_intel")
-        if actor_count == 0:
-            empty_tables.append("threat_actors")
+        estimates = estimated_row_counts(MONITORED_TABLES.values())
+        counts = {label: estimates[model] for label, model in MONITORED_TABLES.items()}
         
+        # Check for any tables with 0 records (potential issues); unanalyzed tables are unknown, not empty
+        empty_tables = [label for label, count in counts.items() if count == 0]
         if empty_tables:
             return {
                 "status": "degraded", 
                 "details": f"Empty tables: {', '.join(empty_tables)}"
             }
         
-        return {"status": "healthy", "details": f"{article_count} articles, {intel_count} intel reports, {actor_count} actors"}
+        described = ", ".join(f"~{count if count is not None else '?'} {label}" for label, count in counts.items())
+        return {"status": "healthy", "details": described}
     
     except Exception as e:
         logger.error(f"Database health check failed: {str(e)}")
@@ -1246,41 +1327,31 @@ def check_celery_health():
                 "details": "Celery inspect functionality not available. Install the appropriate Celery version."
             }
             
-        # Initialize inspector
         try:
-            # Create an inspector instance for Celery 5.x
-            from backend.celery import app as celery_app
-            inspector = inspect(app=celery_app)
-            
-            if inspector is None:
-                logger.warning("Celery health check degraded: inspector could not be initialized")
-                return {
-                    "status": "degraded", 
-                    "details": "Celery inspector could not be initialized."
-                }
-                
-            # Check if Celery workers are running
-            active_workers = inspector.active()
+            # One broadcast to discover the workers; it waits the full timeout
+            # because the number of replies is not known in advance
+            replies = inspect(app=celery_app, timeout=CELERY_INSPECT_TIMEOUT).ping()
             
-            if not active_workers:
+            if not replies:
                 logger.warning("Celery health check failed: No active workers found")
                 return {"status": "unhealthy", "details": "No active workers found. Make sure Celery workers are running."}
             
-            # Check for tasks stuck in reserved state
-            reserved = inspector.reserved()
-            reserved_count = sum(len(tasks) for tasks in reserved.values()) if reserved else 0
-            
-            # Check scheduled tasks
-            scheduled = inspector.scheduled()
-            scheduled_count = sum(len(tasks) for tasks in scheduled.values()) if scheduled else 0
+            # Address the known workers and return as soon as each one has replied
+            inspector = inspect(
+                app=celery_app, destination=list(replies), limit=len(replies), timeout=CELERY_INSPECT_TIMEOUT,
+            )
+            active = inspector.active() or {}
+            reserved = inspector.reserved() or {}
+            scheduled = inspector.scheduled() or {}
             
-            # Get stats about workers
-            stats = inspector.stats()
-            worker_count = len(stats) if stats else 0
+            active_count = sum(len(tasks) for tasks in active.values())
+            reserved_count = sum(len(tasks) for tasks in reserved.values())
+            scheduled_count = sum(len(tasks) for tasks in scheduled.values())
             
             return {
                 "status": "healthy",
-                "details": f"Active workers: {worker_count}, Reserved tasks: {reserved_count}, Scheduled tasks: {scheduled_count}"
+                "details": (f"Active workers: {len(replies)}, Active tasks: {active_count}, "
+                            f"Reserved tasks: {reserved_count}, Scheduled tasks: {scheduled_count}")
             }
         except Exception as e:
             logger.error(f"Error while using Celery inspector: {str(e)}")
@@ -1299,17 +1370,19 @@ def check_data_sources_health():
         # Check when data was last updated
         current_time = timezone.now()
         
+        latest = get_statistics_snapshot()["latest"]
+        
         # Intelligence articles - should be updated at least every 12 hours
-        latest_article = IntelligenceArticle.objects.order_by('-published_date').first()
+        latest_article_date = latest.get(ARTICLE_CATEGORY)
         latest_article_age = None
-        if latest_article:
-            latest_article_age = (current_time - latest_article.published_date).total_seconds() / 3600  # in hours
+        if latest_article_date:
+            latest_article_age = (current_time - latest_article_date).total_seconds() / 3600  # in hours
         
         # CrowdStrike data - should be updated at least daily
-        latest_intel = CrowdStrikeTailoredIntel.objects.order_by('-last_updated').first()
+        latest_intel_date = latest.get('tailored_intel')
         latest_intel_age = None
-        if latest_intel and latest_intel.last_updated:
-            latest_intel_age = (current_time - latest_intel.last_updated).total_seconds() / 3600  # in hours
+        if latest_intel_date:
+            latest_intel_age = (current_time - latest_intel_date).total_seconds() / 3600  # in hours
         
         # Check if data is stale
         stale_sources = []
@@ -1328,39 +1401,46 @@ def check_data_sources_health():
         logger.error(f"Data sources health check failed: {str(e)}")
         return {"status": "degraded", "details": str(e)}
 
+def check_falcon_auth_health():
+    """Report Falcon token reuse (shared client cache) for this process."""
+    token_stats = get_token_stats()
+    return {
+        "status": "healthy",
+        "details": (f"{token_stats['refreshes']} token refreshes, "
+                    f"{token_stats['local_hits'] + token_stats['shared_hits']} cache hits in this process"),
+        **token_stats,
+    }
+
+# Probes run concurrently by system_health_check and refresh_system_health
+HEALTH_PROBES = {
+    "database": check_database_health,
+    "celery": check_celery_health,
+    "data_sources": check_data_sources_health,
+    "falcon_auth": check_falcon_auth_health,
+}
+
 def perform_cleanup_tasks():
     """Perform cleanup tasks to maintain system health."""
     try:
         cleanup_actions = []
         
-        # Remove duplicate intelligence articles (based on URL)
-        with connection.cursor() as cursor:
-            # Find duplicate URLs
-            cursor.execute("""
-                SELECT url, COUNT(*) as count 
-                FROM ioc_scraper_intelligencearticle 
-                GROUP BY url 
-                HAVING COUNT(*) > 1
-            """)
-            duplicates = cursor.fetchall()
-            
-            # Remove duplicates (keep the most recent)
-            for url, count in duplicates:
-                # Get IDs of all articles with this URL, ordered by published_date (latest first)
-                articles = IntelligenceArticle.objects.filter(url=url).order_by('-published_date')
-                
-                # Keep the first one (most recent), delete the rest
-                if articles.count() > 1:
-                    for article in articles[1:]:
-                        article.delete()
-                        
-                    cleanup_actions.append(f"Removed {count-1} duplicate articles for URL: {url}")
+        # Remove duplicate intelligence articles (URL variants and syndicated copies)
+        for rule, count in remove_duplicate_articles().items():
+            if count:
+                cleanup_actions.append(f"Removed {count} duplicate articles ({rule})")
+        
+        # Move articles past the hot window into the archive and drop expired archive months
+        retention = maintain_article_partitions()
+        if retention['archived']:
+            cleanup_actions.append(f"Archived {retention['archived']} articles published before {retention['hot_cutoff']:%Y-%m-%d}")
+        if retention['removed_partitions']:
+            cleanup_actions.append(f"Dropped archive partitions {', '.join(retention['removed_partitions'])}")
         
         # Clean up any temporary cached data older than 30 days
         # (Implementation would depend on your caching strategy)
         
         if cleanup_actions:
-            return {"status": "healthy", "details": f"Performed {len(cleanup_actions)} cleanup actions"}
+            return {"status": "healthy", "details": "; ".join(cleanup_actions)}
         else:
             return {"status": "healthy", "details": "No cleanup needed"}
     
@@ -1,3 +1,616 @@
-from django.test import TestCase
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .cleanup import remove_duplicate_articles
+from .dedup import SIMILARITY_THRESHOLD, band_buckets, estimated_similarity, minhash_signature
+from .crowdstrike_sync import MALWARE_SYNC_KEY, get_cursor, store_malware_page
+from .health import overall_status, run_probes
+from .indicators import MAX_LOOKUP_OBSERVABLES, lookup_observables, normalize_indicator
+from .kev import sync_kev_entries
+from .locks import Lease, _get_redis, enqueue_single_flight, lease_holder, single_flight
+from .models import (
+    CISAKev, CrowdStrikeMalware, CrowdStrikeTailoredIntel, Indicator, IntelligenceArticle, Vulnerability,
+)
+from .sources import HOUR, INTEL_SOURCES, next_interval, update_rate
+from .stats import rebuild_all_statistics
+from .tasks import update_tailored_intelligence
+from .retention import month_start, partition_name
+from .matcher import (
+    MatcherSnapshot, get_matcher, ip_interval, merge_intervals, rebuild_snapshot, value_hash, write_snapshot,
+    _merge_sorted, _unique_sorted,
+)
+
+# data_sources lives next to the backend project, as in tasks.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from data_sources.malware_family import MALWARE_ENTITY_BATCH_SIZE, iter_malware_pages
+from data_sources.tailored_intelligence import _upsert_reports, iter_tailored_intel, process_api_report
+
+def _build(path, exact=(), domains=(), kev=(), networks=()):
+    return write_snapshot(
+        path,
+        _unique_sorted(value_hash(value) for value in exact),
+        _unique_sorted(value_hash(value) for value in domains),
+        _unique_sorted(value_hash(value) for value in kev),
+        merge_intervals(ip_interval(network) for network in networks),
+    )
+
+class MatcherSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ioc_matcher.snap')
+        _build(
+            self.path,
+            exact=['d41d8cd98f00b204e9800998ecf8427e', 'http://evil.example/Payload.exe'],
+            domains=['evil.com'],
+            kev=['CVE-2024-3400'],
+            networks=['10.0.0.0/8', '10.128.0.0/9', '192.0.2.7', '2001:db8::/32'],
+        )
+        self.snapshot = MatcherSnapshot(self.path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.tmp.cleanup()
+
+    def test_exact_values_are_normalized_before_matching(self):
+        self.assertEqual(
+            self.snapshot.match('D41D8CD98F00B204E9800998ECF8427E'),
+            [{'kind': 'exact', 'value': 'd41d8cd98f00b204e9800998ecf8427e'}],
+        )
+        self.assertTrue(self.snapshot.match('HTTP://EVIL.EXAMPLE/Payload.exe'))
+        self.assertEqual(self.snapshot.match('http://evil.example/payload.exe'), [])
+
+    def test_domains_match_their_subdomains(self):
+        self.assertEqual(self.snapshot.match('a.b.Evil.com.'), [{'kind': 'domain', 'value': 'evil.com'}])
+        self.assertEqual(self.snapshot.match('notevil.com'), [])
+
+    def test_domain_like_file_names_match_exact_values(self):
+        path = os.path.join(self.tmp.name, 'file_names.snap')
+        _build(path, exact=['svchost.exe'], domains=['evil.com'])
+        snapshot = MatcherSnapshot(path)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(snapshot.match('svchost.exe'), [{'kind': 'exact', 'value': 'svchost.exe'}])
+        self.assertEqual(snapshot.match('evil.com'), [{'kind': 'domain', 'value': 'evil.com'}])
+
+    def test_ip_ranges(self):
+        self.assertEqual(self.snapshot.match('10.200.1.1'), [{'kind': 'ip', 'value': '10.0.0.0-10.255.255.255'}])
+        self.assertEqual(self.snapshot.match('192.0.2.7'), [{'kind': 'ip', 'value': '192.0.2.7'}])
+        self.assertEqual(self.snapshot.match('192.0.2.8'), [])
+        self.assertTrue(self.snapshot.match('2001:db8::1'))
+        self.assertTrue(self.snapshot.match('10.1.0.0/16'))
+        self.assertEqual(self.snapshot.match('10.0.0.0/7'), [])
+
+    def test_kev_cve_ids(self):
+        self.assertEqual(self.snapshot.match('cve-2024-3400'), [{'kind': 'cisa_kev', 'value': 'CVE-2024-3400'}])
+
+    def test_match_many_returns_only_matches(self):
+        results = self.snapshot.match_many(['8.8.8.8', 'www.evil.com', 'nothing', 'www.evil.com'])
+        self.assertEqual(list(results), ['www.evil.com'])
+
+    def test_get_matcher_reopens_replaced_snapshot(self):
+        first = get_matcher(self.path)
+        self.assertEqual(first.match('other.org'), [])
+        _build(self.path, domains=['other.org'])
+        second = get_matcher(self.path)
+        self.assertIsNot(first, second)
+        self.assertTrue(second.match('www.other.org'))
+
+    def test_incremental_merge_keeps_arrays_sorted_and_distinct(self):
+        merged = _merge_sorted(self.snapshot.sections['exact'], sorted([value_hash('new'), value_hash('d41d8cd98f00b204e9800998ecf8427e')]))
+        self.assertEqual(list(merged), sorted(set(merged)))
+        self.assertEqual(len(merged), 3)
+
+def _indicator(value, indicator_type):
+    return Indicator.objects.create(
+        indicator_id=f"{indicator_type}_{value}", indicator=value, indicator_type=indicator_type,
+        **normalize_indicator(value, indicator_type),
+    )
+
+class IndicatorLookupTests(TestCase):
+    def test_domain_like_file_name_matches_file_name_indicator(self):
+        stored = _indicator('svchost.exe', 'file_name')
+        results = lookup_observables(['svchost.exe'])
+        self.assertEqual([match['id'] for match in results['svchost.exe']], [stored.id])
+
+    def test_domain_matches_once_and_covers_subdomains(self):
+        stored = _indicator('evil.com', 'domain')
+        results = lookup_observables(['evil.com', 'cdn.evil.com'])
+        self.assertEqual([match['id'] for match in results['evil.com']], [stored.id])
+        self.assertEqual([match['id'] for match in results['cdn.evil.com']], [stored.id])
+
+class IndicatorLookupEndpointTests(TestCase):
+    def setUp(self):
+        self.block = _indicator('10.0.0.0/8', 'ip_address_block')
+        self.hash = _indicator('D41D8CD98F00B204E9800998ECF8427E', 'hash_md5')
+        self.domain = _indicator('evil.com', 'domain')
+
+    def _lookup(self, payload):
+        return self.client.post('/api/indicator-lookup/', payload, content_type='application/json')
+
+    def test_batch_matches_each_observable_kind(self):
+        response = self._lookup({"observables": ['10.1.2.3', 'd41d8cd98f00b204e9800998ecf8427e', 'cdn.evil.com', 'benign.org']})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['count'], body['matched']), (4, 3))
+        results = body['results']
+        self.assertEqual([match['id'] for match in results['10.1.2.3']], [self.block.id])
+        self.assertEqual([match['id'] for match in results['d41d8cd98f00b204e9800998ecf8427e']], [self.hash.id])
+        self.assertEqual([match['id'] for match in results['cdn.evil.com']], [self.domain.id])
+        self.assertEqual(results['benign.org'], [])
+
+    def test_bare_list_is_accepted(self):
+        self.assertEqual(self._lookup(['evil.com']).json()['matched'], 1)
+
+    def test_invalid_and_oversized_batches_are_rejected(self):
+        self.assertEqual(self._lookup({"observables": 'evil.com'}).status_code, 400)
+        self.assertEqual(self._lookup(['x.com'] * (MAX_LOOKUP_OBSERVABLES + 1)).status_code, 400)
+
+class IocMatchEndpointTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(IOC_MATCHER_SNAPSHOT=os.path.join(tmp.name, 'ioc_matcher.snap'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _match(self, observables):
+        return self.client.post('/api/ioc-match/', {"observables": observables}, content_type='application/json')
+
+    def test_unavailable_until_a_snapshot_is_built(self):
+        self.assertEqual(self._match(['evil.com']).status_code, 503)
+
+    def test_matches_the_snapshot_built_from_the_database(self):
+        _indicator('192.0.2.0/24', 'ip_address_block')
+        _indicator('evil.com', 'domain')
+        CISAKev.objects.create(
+            cve_id='CVE-2024-3400', vulnerability_name='v', description='d', severity='Unknown',
+            published_date=datetime(2024, 4, 12).date(), source_url='https://www.cisa.gov/',
+        )
+        rebuild_snapshot()
+
+        body = self._match(['192.0.2.9', 'www.evil.com', 'cve-2024-3400', 'benign.org']).json()
+        self.assertEqual((body['count'], body['matched']), (4, 3))
+        self.assertEqual(body['results']['192.0.2.9'], [{'kind': 'ip', 'value': '192.0.2.0-192.0.2.255'}])
+        self.assertEqual(body['results']['www.evil.com'], [{'kind': 'domain', 'value': 'evil.com'}])
+        self.assertEqual(body['results']['cve-2024-3400'], [{'kind': 'cisa_kev', 'value': 'CVE-2024-3400'}])
+
+    def test_incremental_rebuild_is_served_without_a_restart(self):
+        _indicator('evil.com', 'domain')
+        rebuild_snapshot()
+        self.assertEqual(self._match(['svchost.exe']).json()['matched'], 0)
+
+        _indicator('svchost.exe', 'file_name')
+        self.assertTrue(rebuild_snapshot()['incremental'])
+        self.assertEqual(self._match(['svchost.exe', 'evil.com']).json()['matched'], 2)
+
+class ExportCursorTests(TestCase):
+    """Resuming an export from its last row's since/after_id yields exactly the remaining rows."""
+    stamp = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+    def _export(self, dataset, **params):
+        response = self.client.get(f'/api/export/{dataset}/', params)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def _assert_pages_resume(self, dataset, since_field, key_field, page_size):
+        rows = self._export(dataset)
+        seen = rows[:page_size]
+        while len(seen) < len(rows):
+            last = seen[-1]
+            seen += self._export(dataset, since=last[since_field], after_id=last[key_field])[:page_size]
+        self.assertEqual([row[key_field] for row in seen], [row[key_field] for row in rows])
+
+    def test_kev_pages_through_rows_sharing_one_updated_at(self):
+        for number in range(5):
+            CISAKev.objects.create(
+                cve_id=f'CVE-2026-000{number}', vulnerability_name='v', description='d',
+                severity='High', published_date=self.stamp.date(), source_url='https://www.cisa.gov/',
+            )
+        # A KEV sync stamps its whole batch with one updated_at
+        CISAKev.objects.filter(cve_id__lt='CVE-2026-0003').update(updated_at=self.stamp)
+        CISAKev.objects.filter(cve_id__gte='CVE-2026-0003').update(updated_at=self.stamp + timedelta(microseconds=1))
+        self._assert_pages_resume('kev', 'updated_at', 'id', page_size=2)
+
+    def test_tailored_intel_pages_by_report_id(self):
+        for report_id in ('CSIT-3', 'CSIT-1', 'CSIT-2', 'CSIT-4'):
+            CrowdStrikeTailoredIntel.objects.create(report_id=report_id, title=report_id, last_updated=self.stamp)
+        rows = self._export('tailored-intel')
+        self.assertEqual([row['report_id'] for row in rows], ['CSIT-1', 'CSIT-2', 'CSIT-3', 'CSIT-4'])
+        self._assert_pages_resume('tailored-intel', 'last_updated', 'report_id', page_size=3)
+
+class ThreatFeedTests(TestCase):
+    def setUp(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for source, count in (('Unit42', 3), ('Mandiant', 1)):
+            for day in range(count):
+                IntelligenceArticle.objects.create(
+                    title=f'{source} {day}', source=source, url=f'https://example.com/{source}/{day}',
+                    published_date=start + timedelta(days=day),
+                )
+        rebuild_all_statistics()
+
+    def _feed(self, page):
+        response = self.client.get('/api/threat-intelligence-feed/', {'page': page, 'per_source': 2})
+        return b''.join(response.streaming_content).decode()
+
+    def test_each_source_is_paged_newest_first(self):
+        html = self._feed(1)
+        self.assertLess(html.index('Mandiant (1 articles)'), html.index('Unit42 (3 articles)'))
+        self.assertLess(html.index('Unit42 2'), html.index('Unit42 1'))
+        self.assertNotIn('Unit42 0', html)
+        self.assertIn('?page=2&per_source=2', html)
+
+        html = self._feed(2)
+        self.assertIn('Unit42 0', html)
+        self.assertNotIn('Mandiant 0', html)
+        self.assertNotIn('Next page', html)
+
+def _kev_entry(cve_id, **overrides):
+    entry = {
+        "cveID": cve_id, "vulnerabilityName": f"{cve_id} flaw", "shortDescription": "d",
+        "dateAdded": "2026-01-05", "dueDate": "2026-01-26", "vendorProject": "Acme", "product": "Widget",
+        "requiredAction": "Patch", "knownRansomwareCampaignUse": "Unknown", "notes": "",
+    }
+    entry.update(overrides)
+    return entry
+
+class KevSyncTests(TestCase):
+    def _sync(self, version, entries):
+        return sync_kev_entries({"catalogVersion": version, "dateReleased": "2026-01-05"}, iter(entries))
+
+    def test_only_new_and_changed_cves_are_written(self):
+        first = self._sync("1", [_kev_entry("CVE-2026-0001"), _kev_entry("CVE-2026-0002")])
+        self.assertEqual((first["created"], first["updated"], first["unchanged"]), (2, 0, 0))
+        stamps = dict(CISAKev.objects.values_list('cve_id', 'updated_at'))
+
+        second = self._sync("2", [
+            _kev_entry("CVE-2026-0001"),
+            _kev_entry("CVE-2026-0002", knownRansomwareCampaignUse="Known"),
+            _kev_entry("CVE-2026-0003"),
+        ])
+        self.assertEqual((second["created"], second["updated"], second["unchanged"]), (1, 1, 1))
+        stored = {kev.cve_id: kev for kev in CISAKev.objects.all()}
+        self.assertEqual(stored["CVE-2026-0001"].updated_at, stamps["CVE-2026-0001"])
+        self.assertGreater(stored["CVE-2026-0002"].updated_at, stamps["CVE-2026-0002"])
+        self.assertEqual(stored["CVE-2026-0002"].known_ransomware_campaign_use, "Known")
+
+    def test_unchanged_catalog_version_short_circuits(self):
+        self._sync("1", [_kev_entry("CVE-2026-0001")])
+        result = self._sync("1", [_kev_entry("CVE-2026-0001", notes="edited")])
+        self.assertEqual(result["status"], "unchanged")
+        self.assertEqual(CISAKev.objects.get().notes, "")
+
+    def test_other_sources_for_the_same_cve_are_left_alone(self):
+        other = Vulnerability.objects.create(
+            cve_id="CVE-2026-0001", vulnerability_name="nvd", description="d", severity="High",
+            published_date=datetime(2026, 1, 1).date(), source_url="https://nvd.nist.gov/",
+        )
+        self._sync("1", [_kev_entry("CVE-2026-0001")])
+        self.assertEqual(Vulnerability.objects.filter(cve_id="CVE-2026-0001").count(), 2)
+        other.refresh_from_db()
+        self.assertEqual((other.source, other.vulnerability_name), (Vulnerability.SOURCE_OTHER, "nvd"))
+
+class DuplicateCleanupTests(TestCase):
+    day = datetime(2026, 2, 1, 9, tzinfo=timezone.utc)
+    title = 'Threat actor exploits edge appliances in new campaign'
+
+    def _article(self, url, source='Unit42', title=None, hours=0, **fields):
+        return IntelligenceArticle.objects.create(
+            title=title or url, source=source, url=url, published_date=self.day + timedelta(hours=hours), **fields,
+        )
+
+    def test_url_variants_keep_the_newest_copy(self):
+        self._article('http://www.example.com/post/')
+        newest = self._article('https://example.com/post#comments', hours=1)
+        self._article('https://example.com/other')
+        self.assertEqual(remove_duplicate_articles(rules=('canonical_url',)), {'canonical_url': 1})
+        self.assertEqual(IntelligenceArticle.objects.filter(url__contains='/post').get().id, newest.id)
+
+    def test_syndicated_copies_keep_the_original(self):
+        original = self._article('https://vendor.example/a', title=self.title)
+        self._article('https://news.example/b', source='Dark Reading', title=self.title.upper() + '!', hours=3)
+        self._article('https://news.example/c', title='Weekly update')
+        self._article('https://news.example/d', source='Dark Reading', title='Weekly update', hours=1)
+        self.assertEqual(remove_duplicate_articles(rules=('syndicated',)), {'syndicated': 1})
+        self.assertTrue(IntelligenceArticle.objects.filter(id=original.id).exists())
+        self.assertEqual(IntelligenceArticle.objects.filter(title='Weekly update').count(), 2)
+
+    def test_dry_run_only_counts(self):
+        self._article('https://example.com/post')
+        self._article('https://example.com/post/', hours=1)
+        self.assertEqual(remove_duplicate_articles(rules=('canonical_url',), dry_run=True), {'canonical_url': 1})
+        self.assertEqual(IntelligenceArticle.objects.count(), 2)
+
+    def test_cluster_of_a_removed_representative_is_repointed(self):
+        representative = self._article('https://example.com/post')
+        self._article('https://www.example.com/post', hours=1)
+        member = self._article('https://other.example/story', source='Mandiant', hours=2)
+        IntelligenceArticle.objects.filter(id__in=[representative.id, member.id]).update(cluster_id=representative.id)
+        remove_duplicate_articles(rules=('canonical_url',))
+        member.refresh_from_db()
+        self.assertEqual(member.cluster_id, member.id)
+
+class FakeIntel:
+    """
+    Falcon Intel stand-in serving malware families from memory.
+
+    Supports the offset/limit/sort/filter/q parameters used by malware_family
+    and records every request so batching and paging can be checked.
+    """
+
+    def __init__(self, count=250):
+        start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=count)
+        self.families = [{
+            "id": f"family-{i:04d}",
+            "name": f"Family {i:04d}",
+            "description": ["Ransomware", "Trojan", "Wiper"][i % 3],
+            "created_timestamp": (start + timedelta(days=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "last_updated": (start + timedelta(days=i, hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "actors": [{"name": "FANCY BEAR"}],
+            "mitre_attack": [{"technique_id": "T1486"}],
+            "targeted_industries": [{"value": "Healthcare"}],
+        } for i in range(count)]
+        self.queries = []
+        self.entity_batches = []
+        self._lock = threading.Lock()
+
+    def query_malware(self, offset=0, limit=50, sort=None, filter=None, q=None):
+        with self._lock:
+            self.queries.append({"offset": offset, "limit": limit, "sort": sort, "filter": filter, "q": q})
+        families = self.families
+        if filter and filter.startswith("last_updated:>='"):
+            since = filter.split(":>='")[1].rstrip("'")
+            families = [f for f in families if f["last_updated"] >= since]
+        if q:
+            families = [f for f in families if q.lower() in json.dumps(f).lower()]
+        if sort and sort.endswith("|desc"):
+            families = list(reversed(families))
+        page = families[offset:offset + limit]
+        return {
+            "status_code": 200,
+            "headers": {},
+            "body": {"resources": [f["id"] for f in page], "meta": {"pagination": {"total": len(families)}}},
+        }
+
+    def get_malware_entities(self, ids):
+        with self._lock:
+            self.entity_batches.append(list(ids))
+        wanted = set(ids)
+        return {
+            "status_code": 200,
+            "headers": {},
+            "body": {"resources": [f for f in self.families if f["id"] in wanted]},
+        }
+
+class MalwarePagingTests(SimpleTestCase):
+    def setUp(self):
+        self.falcon = FakeIntel()
+
+    def test_full_sync_pages_through_every_family(self):
+        pages = list(iter_malware_pages(self.falcon, page_size=100))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(sorted(family["id"] for page in pages for family in page),
+                         [family["id"] for family in self.falcon.families])
+        self.assertTrue(all(len(batch) <= MALWARE_ENTITY_BATCH_SIZE for batch in self.falcon.entity_batches))
+
+    def test_incremental_sync_requests_families_at_or_after_the_cursor(self):
+        cursor_value = self.falcon.families[200]["last_updated"]
+        cursor = datetime.strptime(cursor_value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        changed = [family for page in iter_malware_pages(self.falcon, since=int(cursor.timestamp())) for family in page]
+        self.assertEqual(self.falcon.queries[0]["filter"], f"last_updated:>='{cursor_value}'")
+        self.assertEqual([family["id"] for family in changed], [f["id"] for f in self.falcon.families[200:]])
+
+    def test_entity_fields_are_mapped(self):
+        family = next(iter_malware_pages(self.falcon, page_size=1))[0]
+        self.assertEqual(family["threat_groups"], ["FANCY BEAR"])
+        self.assertEqual(family["ttps"], ["T1486"])
+
+class MalwareStoreTests(TestCase):
+    def test_store_page_upserts_and_advances_the_cursor(self):
+        falcon = FakeIntel(count=3)
+        page = next(iter_malware_pages(falcon))
+        self.assertEqual(store_malware_page(page), (3, 0))
+        self.assertEqual(CrowdStrikeMalware.objects.count(), 3)
+        newest = max(datetime.strptime(f["last_updated"], '%Y-%m-%dT%H:%M:%SZ') for f in falcon.families)
+        self.assertEqual(get_cursor(MALWARE_SYNC_KEY), int(newest.replace(tzinfo=timezone.utc).timestamp()))
+
+    def test_families_stored_at_the_cursor_are_skipped_until_they_change(self):
+        falcon = FakeIntel(count=3)
+        store_malware_page(next(iter_malware_pages(falcon)))
+
+        def next_page():
+            return next(iter_malware_pages(falcon, since=get_cursor(MALWARE_SYNC_KEY)))
+
+        self.assertEqual(store_malware_page(next_page()), (0, 0))
+        later = datetime.now(timezone.utc) + timedelta(hours=1)
+        falcon.families[-1]["last_updated"] = later.strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.assertEqual(store_malware_page(next_page()), (0, 1))
+
+class FakeReports:
+    """Falcon Intel stand-in serving tailored intelligence reports, recording entity batches."""
+
+    def __init__(self, count):
+        start = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.reports = [{
+            "id": f"report-{i:04d}",
+            "name": f"Report {i:04d}",
+            "created_date": start + i * 3600,
+            "last_modified_date": start + i * 3600,
+        } for i in range(count)]
+        self.entity_batches = []
+        self._lock = threading.Lock()
+
+    def query_report_ids(self, offset=0, limit=50, sort=None, filter=None):
+        reports = list(reversed(self.reports)) if sort == "last_modified_date.desc" else self.reports
+        return {
+            "status_code": 200,
+            "headers": {},
+            "body": {"resources": [r["id"] for r in reports[offset:offset + limit]],
+                     "meta": {"pagination": {"total": len(reports)}}},
+        }
+
+    def get_report_entities(self, ids):
+        with self._lock:
+            self.entity_batches.append(list(ids))
+        wanted = set(ids)
+        return {"status_code": 200, "headers": {}, "body": {"resources": [r for r in self.reports if r["id"] in wanted]}}
+
+class TailoredIntelPagingTests(TestCase):
+    def test_newest_first_fetch_stops_at_the_first_unchanged_batch(self):
+        falcon = FakeReports(count=500)
+        _upsert_reports([process_api_report(report) for report in falcon.reports[:460]])
+
+        changed = list(iter_tailored_intel(falcon, max_workers=2))
+
+        self.assertEqual(sorted(report["id"] for report in changed), [r["id"] for r in falcon.reports[460:]])
+        # Two changed batches, the batch that hit a stored report and at most the prefetched ones
+        self.assertLessEqual(len(falcon.entity_batches), 5)
+
+class TailoredIntelTaskTests(SimpleTestCase):
+    def test_sync_error_fails_the_task(self):
+        with mock.patch('data_sources.tailored_intelligence.sync_tailored_intel', side_effect=RuntimeError('falcon down')):
+            result = update_tailored_intelligence.apply()
+        self.assertEqual(result.state, 'FAILURE')
+        self.assertIsInstance(result.result, RuntimeError)
+
+class FakeTask:
+    def __init__(self):
+        self.queued = []
+
+    def apply_async(self, args=(), kwargs=None, task_id=None, **options):
+        self.queued.append(task_id)
+
+class LeaseTests(SimpleTestCase):
+    """Single-flight leases against the configured Redis (skipped when it is unreachable)."""
+
+    def setUp(self):
+        try:
+            _get_redis().ping()
+        except redis.RedisError:
+            self.skipTest("Redis is not available")
+        self.name = f"test:{uuid.uuid4().hex}"
+        self.addCleanup(lambda: _get_redis().delete(Lease(self.name).key))
+
+    def test_lease_is_exclusive_until_released(self):
+        with Lease(self.name, owner='first') as first:
+            self.assertTrue(first.acquired)
+            with Lease(self.name, owner='second') as second:
+                self.assertFalse(second.acquired)
+            self.assertEqual(lease_holder(self.name), 'first')
+        self.assertIsNone(lease_holder(self.name))
+        with Lease(self.name, owner='second') as second:
+            self.assertTrue(second.acquired)
+
+    def test_lost_lease_does_not_release_the_new_holder(self):
+        stale = Lease(self.name, owner='stale')
+        stale.acquire()
+        _get_redis().set(stale.key, 'current')
+        stale.release()
+        self.assertEqual(lease_holder(self.name), 'current')
+
+    def test_single_flight_skips_while_the_lease_is_held(self):
+        runs = []
+        guarded = single_flight(self.name)(lambda: runs.append(1) or 'ran')
+        with Lease(self.name, owner='other'):
+            self.assertIn('already running as task other', guarded())
+        self.assertEqual(guarded(), 'ran')
+        self.assertEqual(runs, [1])
+
+    def test_enqueue_attaches_to_the_queued_run_until_it_finishes(self):
+        task = FakeTask()
+        task_id, queued = enqueue_single_flight(task, self.name)
+        self.assertTrue(queued)
+        self.assertEqual(enqueue_single_flight(task, self.name), (task_id, False))
+        self.assertEqual(task.queued, [task_id])
+
+        # The queued task adopts the claim when it starts; nobody else can take it
+        self.assertFalse(Lease(self.name, owner='other').acquire())
+        with Lease(self.name, owner=task_id) as lease:
+            self.assertTrue(lease.acquired)
+        self.assertTrue(enqueue_single_flight(task, self.name)[1])
+
+class MinHashTests(SimpleTestCase):
+    TITLE = 'Volt Typhoon exploits Fortinet zero-day to breach US critical infrastructure'
+    SUMMARY = ('Chinese state-sponsored actors used a previously unknown vulnerability in FortiOS '
+               'SSL VPN appliances to gain initial access to water and energy utilities.')
+
+    def test_signature_is_deterministic_and_fits_bigint(self):
+        signature = minhash_signature(self.TITLE, self.SUMMARY)
+        self.assertEqual(signature, minhash_signature(self.TITLE, self.SUMMARY))
+        self.assertTrue(all(0 <= value < 2 ** 63 for value in signature))
+        self.assertIsNone(minhash_signature('', None))
+
+    def test_syndicated_copy_is_similar_and_shares_a_bucket(self):
+        original = minhash_signature(self.TITLE, self.SUMMARY)
+        copy = minhash_signature(self.TITLE + ' - Report', self.SUMMARY.replace('Chinese', 'China'))
+        self.assertGreaterEqual(estimated_similarity(original, copy), SIMILARITY_THRESHOLD)
+        self.assertTrue(set(enumerate(band_buckets(original))) & set(enumerate(band_buckets(copy))))
+
+    def test_unrelated_story_is_not_similar(self):
+        original = minhash_signature(self.TITLE, self.SUMMARY)
+        other = minhash_signature(
+            'LockBit affiliate arrested in Poland',
+            'Europol announced the arrest of a ransomware affiliate accused of attacks on hospitals.',
+        )
+        self.assertLess(estimated_similarity(original, other), SIMILARITY_THRESHOLD)
+
+class RetentionTests(SimpleTestCase):
+    def test_month_start_crosses_year_boundaries(self):
+        now = datetime(2025, 2, 14, 23, 30, tzinfo=timezone.utc)
+        self.assertEqual(month_start(now), datetime(2025, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(month_start(now, months_back=3), datetime(2024, 11, 1, tzinfo=timezone.utc))
+        self.assertEqual(month_start(datetime(2024, 12, 31, tzinfo=timezone.utc), months_back=-1),
+                         datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    def test_partition_name_sorts_by_month(self):
+        self.assertEqual(partition_name(datetime(2024, 3, 1, tzinfo=timezone.utc)),
+                         'ioc_scraper_intelligencearticle_archive_p2024_03')
+
+class HealthProbeTests(SimpleTestCase):
+    def test_slow_probe_times_out_without_delaying_the_others(self):
+        def fast():
+            return {"status": "healthy", "details": "ok"}
+
+        def slow():
+            time.sleep(2)
+            return {"status": "healthy"}
+
+        def broken():
+            raise RuntimeError("boom")
+
+        started = time.monotonic()
+        results = run_probes({"fast": fast, "slow": slow, "broken": broken}, deadline=0.2)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(results["fast"]["status"], "healthy")
+        self.assertEqual(results["slow"]["status"], "degraded")
+        self.assertEqual(results["broken"], {"status": "unhealthy", "details": "boom"})
+        self.assertEqual(overall_status(results), "unhealthy")
+
+class AdaptiveIntervalTests(SimpleTestCase):
+    config = INTEL_SOURCES['Mandiant']
+
+    def test_quiet_source_backs_off_to_the_maximum(self):
+        interval = HOUR
+        for _ in range(20):
+            interval = next_interval(self.config, interval, 0.0, 0, True)
+        self.assertEqual(interval, self.config['max_interval'])
+
+    def test_burst_shortens_the_interval(self):
+        rate = update_rate(0.1, 6, 8 * HOUR)
+        self.assertLessEqual(next_interval(self.config, 8 * HOUR, rate, 6, True), 4 * HOUR)
+
+    def test_interval_follows_the_publication_rate(self):
+        self.assertEqual(next_interval(self.config, 8 * HOUR, 0.25, 1, True), 4 * HOUR)
+        self.assertEqual(next_interval(self.config, 8 * HOUR, 50.0, 1, True), self.config['min_interval'])
+
+    def test_failures_back_off_without_new_items(self):
+        self.assertEqual(next_interval(self.config, 2 * HOUR, 1.0, 0, False), 4 * HOUR)
@@ -1,28 +1,12 @@
-from falconpy import Intel
+import os
+import sys
 
-CLIENT_ID = "fe308421c90f49bdbd35af9a707b223b"
-CLIENT_SECRET = "StWbg65m8NL0woZf32D1XGUeTOCusEvp7V4K9kyq"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_sources.falcon_client import get_intel_client
+from data_sources.falcon_paging import FalconAPIError, iter_pages
 
-# Use the Intel service specifically instead of the generic APIHarness
-falcon = Intel(client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-
-def fetch_threat_actors():
-    """Fetch threat actors from CrowdStrike."""
-    # Using the correct method for the Intel service
-    response = falcon.query_actor_entities(limit=50)  # Increased limit to get more actors
-
-    # Check for HTTP status code
-    if response["status_code"] != 200:
-        print(f"❌ Authentication Failed: {response}")
-        return []
-
-    # Check if we actually got threat actors
-    if "resources" in response["body"] and response["body"]["resources"]:
-        print("✅ Authentication Successful! Falcon API is working.")
-        return response["body"]["resources"]
-    else:
-        print("⚠️ No Threat Actor Data Found, but authentication succeeded.")
-        return []
+CLIENT_ID = os.environ.get('FALCON_CLIENT_ID')
+CLIENT_SECRET = os.environ.get('FALCON_CLIENT_SECRET')
 
 def get_actor_details(actor_data_list):
     """
@@ -82,32 +66,42 @@ def _format_timestamp(timestamp):
     if not timestamp:
         return None
     
-    from datetime import datetime
+    from datetime import datetime, timezone
     
     try:
         # If it's already a string date, return as is
         if isinstance(timestamp, str):
             return timestamp
             
-        # Convert UNIX timestamp to ISO format
-        dt = datetime.fromtimestamp(timestamp)
-        return dt.isoformat() + "Z"
+        # Convert UNIX timestamp to ISO format (UTC)
+        dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return dt.isoformat()
     except:
         return None
 
 # Test function
 def test_connection():
-    actors_data = fetch_threat_actors()
-    if actors_data:
-        processed_actors = get_actor_details(actors_data)
-        print(f"Retrieved and processed details for {len(processed_actors)} actors")
-        
-        # Print sample data
-        if processed_actors:
-            print("\nSample actor data:")
-            import json
-            print(json.dumps(processed_actors[0], indent=2))
-            
+    """Fetch and print one small page of actors (actor syncs run in ioc_scraper.tasks)."""
+    falcon = get_intel_client()
+    if falcon is None:
+        print("❌ CrowdStrike API credentials not configured (FALCON_CLIENT_ID / FALCON_CLIENT_SECRET)")
+        return []
+
+    try:
+        actors_data = next(iter_pages(falcon.query_actor_entities, max_items=10, strict=True), [])
+    except FalconAPIError as e:
+        print(f"❌ Authentication Failed: {e}")
+        return []
+
+    processed_actors = get_actor_details(actors_data)
+    print(f"Retrieved and processed details for {len(processed_actors)} actors")
+
+    # Print sample data
+    if processed_actors:
+        print("\nSample actor data:")
+        import json
+        print(json.dumps(processed_actors[0], indent=2))
+
     return actors_data
 
 # Run test when script is executed directly
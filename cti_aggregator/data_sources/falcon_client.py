@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Process-wide CrowdStrike Falcon client factory with shared token caching.
+
+Every Falcon service class built here shares one SharedTokenAuth object per
+set of credentials. Its OAuth2 bearer token is cached in-process and in Redis
+until shortly before expiry, so tasks, threads and Celery worker processes
+reuse one token instead of each performing its own token exchange. falconpy
+still refreshes automatically: when the token goes stale, the next request
+calls login(), which consults the shared cache before asking the API.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# Try to import FalconPy, handle if not available
+try:
+    from falconpy import OAuth2, Intel
+    FALCONPY_AVAILABLE = True
+except ImportError:
+    FALCONPY_AVAILABLE = False
+
+# Try to import redis, handle if not available
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.crowdstrike.com'
+
+# Treat tokens as expired this many seconds early (falconpy's own renew window is 120s)
+TOKEN_EXPIRY_MARGIN = 180
+TOKEN_KEY_PREFIX = 'crowdstrike:falcon_token:'
+TOKEN_REFRESH_COUNTER_KEY = 'crowdstrike:falcon_token:refreshes'
+
+# Counters for this process; refreshes across all processes are counted in Redis
+_token_stats = {'refreshes': 0, 'local_hits': 0, 'shared_hits': 0}
+_stats_lock = threading.Lock()
+
+_auth_objects = {}
+_clients = {}
+_factory_lock = threading.Lock()
+
+_redis_client = None
+
+def _get_redis():
+    """Return a Redis client for the shared token cache, or None if Redis is unavailable."""
+    global _redis_client
+    if not REDIS_AVAILABLE:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=os.environ.get('REDIS_HOST', 'localhost'),
+            port=int(os.environ.get('REDIS_PORT', 6379)),
+            db=int(os.environ.get('REDIS_DB', 0)),
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+    return _redis_client
+
+def _count(stat):
+    with _stats_lock:
+        _token_stats[stat] += 1
+
+def _credentials(client_id=None, client_secret=None, base_url=None):
+    return (
+        client_id or os.environ.get('FALCON_CLIENT_ID'),
+        client_secret or os.environ.get('FALCON_CLIENT_SECRET'),
+        base_url or os.environ.get('FALCON_API_BASE_URL', DEFAULT_BASE_URL),
+    )
+
+if FALCONPY_AVAILABLE:
+    class SharedTokenAuth(OAuth2):
+        """
+        falconpy OAuth2 object whose token exchange goes through the shared cache.
+
+        Service classes created with auth_object=SharedTokenAuth(...) call login()
+        whenever their token is stale; login() here returns a cached token when one
+        with enough remaining lifetime exists and only otherwise hits the API.
+        """
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._login_lock = threading.Lock()
+            digest = hashlib.sha256(f"{self.creds.get('client_id')}|{self.base_url}".encode()).hexdigest()[:16]
+            self._cache_key = f"{TOKEN_KEY_PREFIX}{digest}"
+
+        def _use_token(self, token, expires_at):
+            remaining = int(expires_at - time.time())
+            self.token_value = token
+            self.token_expiration = remaining
+            self.token_time = time.time()
+            self.token_status = 201
+            return {"status_code": 201, "headers": {}, "body": {"access_token": token, "expires_in": remaining}}
+
+        def _read_shared_token(self):
+            client = _get_redis()
+            if client is None:
+                return None
+            try:
+                cached = client.get(self._cache_key)
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Could not read shared Falcon token: {str(e)}")
+                return None
+            if not cached:
+                return None
+            cached = json.loads(cached)
+            if cached.get('expires_at', 0) - time.time() <= TOKEN_EXPIRY_MARGIN:
+                return None
+            return cached
+
+        def _write_shared_token(self, token, expires_at):
+            client = _get_redis()
+            if client is None:
+                return
+            ttl = int(expires_at - time.time() - TOKEN_EXPIRY_MARGIN)
+            if ttl <= 0:
+                return
+            try:
+                client.setex(self._cache_key, ttl, json.dumps({
+                    'access_token': token,
+                    'expires_at': expires_at,
+                    'base_url': self.base_url,
+                }))
+                client.incr(TOKEN_REFRESH_COUNTER_KEY)
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Could not share Falcon token: {str(e)}")
+
+        def _login_handler(self, stateful=True):
+            if not stateful:
+                return super()._login_handler(stateful=stateful)
+
+            with self._login_lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self.token_value and self.token_expiration - (time.time() - self.token_time) > TOKEN_EXPIRY_MARGIN:
+                    _count('local_hits')
+                    return {"status_code": 201, "headers": {}, "body": {"access_token": self.token_value}}
+
+                cached = self._read_shared_token()
+                if cached:
+                    _count('shared_hits')
+                    self.base_url = cached.get('base_url') or self.base_url
+                    return self._use_token(cached['access_token'], cached['expires_at'])
+
+                returned = super()._login_handler(stateful=stateful)
+                if returned.get("status_code") == 201:
+                    _count('refreshes')
+                    expires_at = time.time() + int(returned["body"].get("expires_in", 0))
+                    self._write_shared_token(returned["body"]["access_token"], expires_at)
+                    logger.info("Obtained new CrowdStrike Falcon API token")
+                return returned
+
+def get_auth(client_id=None, client_secret=None, base_url=None):
+    """
+    Return the process-wide auth object for these credentials (environment by default).
+
+    Returns:
+        SharedTokenAuth: Shared auth object, or None if FalconPy or credentials are missing
+    """
+    if not FALCONPY_AVAILABLE:
+        logger.error("FalconPy library not installed. Please install it with: pip install crowdstrike-falconpy")
+        return None
+
+    client_id, client_secret, base_url = _credentials(client_id, client_secret, base_url)
+    if not client_id or not client_secret:
+        logger.error("CrowdStrike API credentials not found in environment variables")
+        logger.error("Please set FALCON_CLIENT_ID and FALCON_CLIENT_SECRET in your .env file")
+        return None
+
+    key = (client_id, client_secret, base_url)
+    with _factory_lock:
+        if key not in _auth_objects:
+            _auth_objects[key] = SharedTokenAuth(client_id=client_id, client_secret=client_secret, base_url=base_url)
+        return _auth_objects[key]
+
+def get_client(service_class, client_id=None, client_secret=None, base_url=None):
+    """
+    Return a cached falconpy service class instance (e.g. Intel) using the shared auth object.
+
+    Returns:
+        Service class instance, or None if FalconPy or credentials are missing
+    """
+    auth = get_auth(client_id, client_secret, base_url)
+    if auth is None:
+        return None
+
+    key = (service_class, id(auth))
+    with _factory_lock:
+        if key not in _clients:
+            _clients[key] = service_class(auth_object=auth)
+        return _clients[key]
+
+def get_intel_client(client_id=None, client_secret=None, base_url=None):
+    """Return the shared Falcon Intel client (None if FalconPy or credentials are missing)."""
+    if not FALCONPY_AVAILABLE:
+        logger.error("FalconPy library not installed. Please install it with: pip install crowdstrike-falconpy")
+        return None
+    return get_client(Intel, client_id, client_secret, base_url)
+
+def get_token_stats():
+    """
+    Return token cache counters.
+
+    Returns:
+        dict: refreshes/local_hits/shared_hits for this process, plus total_refreshes
+              across all processes (None when Redis is unavailable)
+    """
+    with _stats_lock:
+        stats = dict(_token_stats)
+
+    stats['total_refreshes'] = None
+    client = _get_redis()
+    if client is not None:
+        try:
+            stats['total_refreshes'] = int(client.get(TOKEN_REFRESH_COUNTER_KEY) or 0)
+        except redis.exceptions.RedisError:
+            pass
+    return stats
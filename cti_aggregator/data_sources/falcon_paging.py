@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Pagination and concurrent entity fetching for the CrowdStrike Falcon APIs.
+
+Falcon "query" endpoints return pages of IDs (offset/limit with a total in
+meta.pagination) and "get entities" endpoints return details for a batch of
+IDs. This module walks every ID page and fetches entity batches through a
+bounded thread pool, pausing whenever the X-Ratelimit-* headers say the
+client is about to be throttled.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+# Concurrency and paging defaults (override via environment)
+FALCON_MAX_WORKERS = int(os.environ.get('FALCON_MAX_WORKERS', 4))
+QUERY_PAGE_SIZE = 500
+ENTITY_BATCH_SIZE = 20
+
+# Pause once fewer than this many requests remain in the rate-limit window
+RATE_LIMIT_RESERVE = 5
+# Wait used when a 429 arrives without a usable Retryafter header
+DEFAULT_RETRY_AFTER = 10
+MAX_RETRIES = 3
+
+class FalconAPIError(Exception):
+    """A Falcon request failed and the caller asked for strict handling."""
+
+def _header(headers, name):
+    """Case-insensitive header lookup (falconpy returns a plain dict)."""
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+class RateLimiter:
+    """
+    Shared, thread-safe view of the Falcon rate-limit window.
+
+    Every response updates it from X-Ratelimit-Remaining/X-Ratelimit-Retryafter;
+    callers wait() before each request so workers stop together when the
+    window is nearly spent and resume when it resets.
+    """
+
+    def __init__(self, reserve=RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def update(self, response):
+        headers = response.get("headers") or {}
+        remaining = _header(headers, "X-Ratelimit-Remaining")
+        retry_after = _header(headers, "X-Ratelimit-Retryafter")
+        throttled = response.get("status_code") == 429
+
+        try:
+            remaining = int(remaining) if remaining is not None else None
+        except (TypeError, ValueError):
+            remaining = None
+
+        if not throttled and (remaining is None or remaining > self.reserve):
+            return
+
+        # Retryafter is an epoch timestamp for when the window resets
+        try:
+            resume_at = float(retry_after)
+        except (TypeError, ValueError):
+            resume_at = time.time() + DEFAULT_RETRY_AFTER
+        with self._lock:
+            self._resume_at = max(self._resume_at, resume_at)
+        logger.info(f"Falcon rate limit nearly exhausted (remaining={remaining}), pausing until {resume_at:.0f}")
+
+    def wait(self):
+        with self._lock:
+            delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+def call_with_rate_limit(method, limiter, **kwargs):
+    """Call a falconpy method, waiting out rate limits and retrying 429 responses."""
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.wait()
+        response = method(**kwargs)
+        limiter.update(response)
+        if response.get("status_code") != 429:
+            return response
+        logger.warning(f"Falcon API returned 429, retry {attempt + 1} of {MAX_RETRIES}")
+    return response
+
+def iter_pages(query_method, limiter=None, page_size=QUERY_PAGE_SIZE, max_items=None, strict=False, **params):
+    """
+    Yield successive pages of resources from a Falcon query endpoint using offset pagination.
+
+    Works for ID queries (query_report_ids) and combined entity queries
+    (query_actor_entities) alike; each page is the body's resources list.
+
+    Args:
+        query_method: falconpy query method (e.g. Intel.query_report_ids)
+        limiter: Shared RateLimiter (one is created if omitted)
+        page_size: Resources requested per page
+        max_items: Stop after this many resources (None for all)
+        strict: Raise FalconAPIError on a failed request instead of stopping quietly
+        **params: Extra query parameters (filter, sort, ...)
+    """
+    limiter = limiter or RateLimiter()
+    offset = 0
+    fetched = 0
+
+    while True:
+        limit = page_size if max_items is None else min(page_size, max_items - fetched)
+        if limit <= 0:
+            return
+
+        response = call_with_rate_limit(query_method, limiter, offset=offset, limit=limit, **params)
+        if response["status_code"] != 200:
+            error_msg = response.get("body", {}).get("errors", ["Unknown error"])
+            logger.error(f"Falcon query failed at offset {offset}: {error_msg}")
+            if strict:
+                raise FalconAPIError(f"Falcon query failed at offset {offset}: {error_msg}")
+            return
+
+        body = response["body"]
+        resources = body.get("resources") or []
+        if not resources:
+            return
+        yield resources
+
+        fetched += len(resources)
+        pagination = (body.get("meta") or {}).get("pagination") or {}
+        total = pagination.get("total")
+        offset = offset + len(resources)
+        if total is not None and offset >= total:
+            return
+        if len(resources) < limit:
+            return
+
+def iter_entity_batches(get_method, ids, limiter=None, batch_size=ENTITY_BATCH_SIZE,
+                        max_workers=FALCON_MAX_WORKERS, strict=False, ordered=False):
+    """
+    Fetch entity details for ids in batches on a bounded thread pool, yielding one list per batch.
+
+    At most max_workers batches are in flight at once, so memory stays bounded
+    by that many responses. Batches are yielded in completion order, or in the
+    order of ids with ordered=True (for sorted ids whose consumer may stop at a
+    batch boundary; closing the generator submits no further requests). The
+    consumer runs on the calling thread (safe for Django ORM access).
+
+    Args:
+        get_method: falconpy entities method (e.g. Intel.get_report_entities)
+        ids: IDs to fetch
+        limiter: Shared RateLimiter (one is created if omitted)
+        batch_size: IDs per request
+        max_workers: Maximum concurrent requests
+        strict: Raise FalconAPIError when a batch fails instead of skipping it
+        ordered: Yield batches in the order of ids rather than as they complete
+    """
+    limiter = limiter or RateLimiter()
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    if not batches:
+        return
+
+    def fetch(batch):
+        return batch, call_with_rate_limit(get_method, limiter, ids=batch)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        remaining = iter(batches)
+        in_flight = deque(executor.submit(fetch, batch) for batch in islice(remaining, max_workers))
+
+        while in_flight:
+            if ordered:
+                done = [in_flight.popleft()]
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+
+            for future in done:
+                # Keep the pool full without queueing every batch up front
+                next_batch = next(remaining, None)
+                if next_batch is not None:
+                    in_flight.append(executor.submit(fetch, next_batch))
+
+                try:
+                    batch, response = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching Falcon entity batch: {str(e)}")
+                    if strict:
+                        raise FalconAPIError(str(e)) from e
+                    continue
+
+                if response["status_code"] != 200:
+                    error_msg = response.get("body", {}).get("errors", ["Unknown error"])
+                    logger.error(f"Failed to fetch {len(batch)} entities: {error_msg}")
+                    if strict:
+                        raise FalconAPIError(f"Failed to fetch {len(batch)} entities: {error_msg}")
+                else:
+                    yield response["body"].get("resources") or []
+
+def iter_entities(get_method, ids, limiter=None, batch_size=ENTITY_BATCH_SIZE, max_workers=FALCON_MAX_WORKERS,
+                  strict=False):
+    """
+    Fetch entity details for ids in batches on a bounded thread pool.
+
+    Entities are yielded in completion order; see iter_entity_batches.
+    """
+    for resources in iter_entity_batches(get_method, ids, limiter=limiter, batch_size=batch_size,
+                                         max_workers=max_workers, strict=strict):
+        yield from resources
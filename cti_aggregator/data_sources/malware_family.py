@@ -1,125 +1,219 @@
 """
-Module providing access to malware family data.
-All mock implementations have been replaced with simple error responses.
+Module providing access to CrowdStrike malware family data.
+
+Malware families are listed through the Intel query_malware endpoint (IDs are
+family slugs) and their details fetched with get_malware_entities in batches
+on the shared Falcon client, several batches at a time.
 """
 
+import os
+import sys
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_sources.falcon_client import get_intel_client
+from data_sources.falcon_paging import RateLimiter, call_with_rate_limit, iter_pages, iter_entities, QUERY_PAGE_SIZE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def query_malware_families(limit=50, offset=0, filter_string=None):
+# get_malware_entities has no documented ID cap, but IDs travel in the query
+# string; 100 slugs per request keeps the URL well within proxy limits.
+MALWARE_ENTITY_BATCH_SIZE = 100
+
+# The malware endpoints expose modification time as an ISO 8601 string
+MALWARE_MODIFIED_FIELD = 'last_updated'
+
+def _format_timestamp(value):
+    """Normalize an epoch or ISO 8601 timestamp from the API to a UTC ISO string."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return str(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+def _extract_values(items_list, *keys):
+    """Extract display values from a list of strings or objects (first of keys present)."""
+    keys = keys or ('value', 'name')
+    values = []
+    for item in items_list or []:
+        if isinstance(item, dict):
+            value = next((item.get(key) for key in keys if item.get(key)), None)
+        else:
+            value = item
+        if value and value not in values:
+            values.append(value)
+    return values
+
+def process_malware(entity):
     """
-    Query malware families. Returns error message instead of mock data.
-    
+    Map a get_malware_entities resource to the structure used by the sync and the API.
+
+    Args:
+        entity (dict): Malware family resource from the Falcon API
+
+    Returns:
+        dict: Processed malware family
+    """
+    return {
+        "id": entity.get("id"),
+        "name": entity.get("name") or entity.get("id") or "Unknown",
+        "description": entity.get("description") or entity.get("short_description", ""),
+        "publish_date": _format_timestamp(entity.get("created_timestamp") or entity.get("created_date")),
+        "last_updated": _format_timestamp(entity.get("last_updated") or entity.get("last_modified_date")),
+        "activity_start_date": _format_timestamp(entity.get("first_activity_date") or entity.get("activity_start_date")),
+        "activity_end_date": _format_timestamp(entity.get("last_activity_date") or entity.get("activity_end_date")),
+        "malware_type": entity.get("malware_type") or entity.get("family_type"),
+        "threat_groups": _extract_values(entity.get("actors") or entity.get("threat_groups")),
+        "ttps": _extract_values(entity.get("mitre_attack") or entity.get("ttps"), 'technique_id', 'value', 'name'),
+        "targeted_sectors": _extract_values(entity.get("targeted_industries") or entity.get("target_industries")),
+        "targeted_countries": _extract_values(entity.get("targeted_countries") or entity.get("target_countries")),
+        "aliases": _extract_values(entity.get("aliases")),
+    }
+
+def modified_since_filter(since):
+    """
+    FQL filter for families modified at or after since (epoch seconds or aware datetime).
+    Inclusive because the sync cursor has one-second granularity; the sync skips
+    the families it already stored at that second.
+    """
+    if isinstance(since, (int, float)):
+        since = datetime.fromtimestamp(since, tz=timezone.utc)
+    # Unquoted or epoch values silently match nothing on this endpoint
+    return f"{MALWARE_MODIFIED_FIELD}:>='{since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}'"
+
+def query_malware_families(limit=50, offset=0, filter_string=None, sort=None, q=None, falcon=None):
+    """
+    Query malware family IDs.
+
     Args:
         limit (int): Maximum number of results to return
         offset (int): Starting offset for results pagination
         filter_string (str): FQL filter string to restrict results
-        
+        sort (str): FQL sort expression
+        q (str): Free-text search across all fields
+        falcon: Intel client (the shared client by default)
+
     Returns:
-        list: List with a single error ID
+        list: Malware family IDs (empty on error)
     """
-    logger.info("Mock data generation has been disabled")
-    return ["error-404"]
+    falcon = falcon or get_intel_client()
+    if falcon is None:
+        return []
+
+    params = {'limit': limit, 'offset': offset}
+    if filter_string:
+        params['filter'] = filter_string
+    if sort:
+        params['sort'] = sort
+    if q:
+        params['q'] = q
 
-def get_malware_details(malware_ids):
+    response = call_with_rate_limit(falcon.query_malware, RateLimiter(), **params)
+    if response["status_code"] != 200:
+        error_msg = response.get("body", {}).get("errors", ["Unknown error"])
+        logger.error(f"Failed to query malware families: {error_msg}")
+        return []
+    return response["body"].get("resources") or []
+
+def get_malware_details(malware_ids, falcon=None, limiter=None, strict=False):
     """
-    Get malware details. Returns error message instead of mock data.
-    
+    Get processed details for malware families, fetching batches concurrently.
+
     Args:
         malware_ids (list): List of malware family IDs to retrieve details for
-        
+        falcon: Intel client (the shared client by default)
+        limiter: Shared RateLimiter for the surrounding sync
+        strict (bool): Raise FalconAPIError when a batch fails instead of skipping it
+
     Returns:
-        list: List with a single error object
-    """
-    logger.info("Mock data generation has been disabled")
-    
-    return [{
-        "id": "error-404",
-        "name": "404 Not Found",
-        "description": "Could not retrieve malware details. Mock data generation has been disabled.",
-        "publish_date": datetime.now().strftime("%Y-%m-%d"),
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "malware_type": "N/A",
-        "threat_groups": [],
-        "nation_affiliations": [],
-        "ttps": [],
-        "targeted_sectors": [],
-        "targeted_countries": [],
-        "family_id": "error",
-        "aliases": ["Data Unavailable"]
-    }]
-
-def search_malware_families(search_term=None, limit=20):
-    """
-    Search malware families. Returns error message instead of mock data.
-    
+        list: Processed malware families
+    """
+    falcon = falcon or get_intel_client()
+    if falcon is None or not malware_ids:
+        return []
+
+    entities = iter_entities(
+        falcon.get_malware_entities, list(malware_ids), limiter=limiter,
+        batch_size=MALWARE_ENTITY_BATCH_SIZE, strict=strict,
+    )
+    return [process_malware(entity) for entity in entities]
+
+def iter_malware_pages(falcon, since=None, page_size=QUERY_PAGE_SIZE, limiter=None):
+    """
+    Yield processed malware families one query page at a time, oldest modification first.
+
+    Failed requests raise FalconAPIError so a sync never advances past a gap.
+
+    Args:
+        falcon: Intel client
+        since: Only families modified at or after this (epoch seconds or datetime); all if None
+        page_size (int): Family IDs per query page
+        limiter: Shared RateLimiter (one is created if omitted)
+    """
+    limiter = limiter or RateLimiter()
+    params = {'sort': f"{MALWARE_MODIFIED_FIELD}|asc"}
+    if since is not None:
+        params['filter'] = modified_since_filter(since)
+
+    for ids in iter_pages(falcon.query_malware, limiter, page_size=page_size, strict=True, **params):
+        yield get_malware_details(ids, falcon=falcon, limiter=limiter, strict=True)
+
+def search_malware_families(search_term=None, limit=20, falcon=None):
+    """
+    Search malware families.
+
     Args:
         search_term (str): Text to search for in malware family names or descriptions
         limit (int): Maximum number of results to return
-        
+        falcon: Intel client (the shared client by default)
+
     Returns:
-        list: List with a single error object
-    """
-    logger.info("Mock data generation has been disabled")
-    
-    return [{
-        "id": "error-404",
-        "name": "404 Not Found",
-        "description": "Could not search for malware families. Mock data generation has been disabled.",
-        "publish_date": datetime.now().strftime("%Y-%m-%d"),
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "malware_type": "N/A",
-        "threat_groups": [],
-        "nation_affiliations": [],
-        "ttps": [],
-        "targeted_sectors": [],
-        "targeted_countries": [],
-        "family_id": "error",
-        "aliases": ["Data Unavailable"]
-    }]
-
-def get_recent_malware_families(days=30, limit=20):
-    """
-    Get recent malware families. Returns error message instead of mock data.
-    
+        list: Processed malware families
+    """
+    falcon = falcon or get_intel_client()
+    ids = query_malware_families(limit=limit, q=search_term, falcon=falcon)
+    return get_malware_details(ids, falcon=falcon)
+
+def get_recent_malware_families(days=30, limit=20, falcon=None):
+    """
+    Get malware families modified in the last days, newest first.
+
     Args:
         days (int): Number of days to look back
         limit (int): Maximum number of results to return
-        
+        falcon: Intel client (the shared client by default)
+
     Returns:
-        list: List with a single error object
-    """
-    logger.info("Mock data generation has been disabled")
-    
-    return [{
-        "id": "error-404",
-        "name": "404 Not Found",
-        "description": "Could not retrieve recent malware families. Mock data generation has been disabled.",
-        "publish_date": datetime.now().strftime("%Y-%m-%d"),
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "malware_type": "N/A",
-        "threat_groups": [],
-        "nation_affiliations": [],
-        "ttps": [],
-        "targeted_sectors": [],
-        "targeted_countries": [],
-        "family_id": "error",
-        "aliases": ["Data Unavailable"]
-    }]
+        list: Processed malware families
+    """
+    falcon = falcon or get_intel_client()
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    ids = query_malware_families(
+        limit=limit, filter_string=modified_since_filter(since),
+        sort=f"{MALWARE_MODIFIED_FIELD}|desc", falcon=falcon,
+    )
+    families = get_malware_details(ids, falcon=falcon)
+    # Batches complete in any order; restore the query's ordering
+    order = {malware_id: index for index, malware_id in enumerate(ids)}
+    return sorted(families, key=lambda family: order.get(family["id"], len(order)))
 
 def test_malware_module():
     """
     Test function to verify the malware module is working correctly.
     """
-    logger.info("Mock data generation has been disabled")
-    logger.info("Testing real API integration is required")
-    
-    return False
+    families = get_recent_malware_families(days=30, limit=5)
+    for family in families:
+        logger.info(f"{family['name']} (last updated {family['last_updated']})")
+    return bool(families)
 
 if __name__ == "__main__":
-    test_malware_module() 
\ No newline at end of file
+    test_malware_module()
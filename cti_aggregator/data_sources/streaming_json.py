@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON decoding for large feed documents.
+
+Feeds such as the CISA KEV catalog are a single object holding a few scalar
+header fields and one large array of records. StreamingJSONDocument reads the
+header first, then yields the array records one at a time as the bytes arrive,
+so peak memory is bounded by one record rather than the whole document.
+
+Uses ijson when it is installed and falls back to json.load otherwise.
+"""
+
+import json
+import logging
+from itertools import islice
+
+# Try to import ijson, handle if not available
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if not IJSON_AVAILABLE:
+    logger.warning("ijson not installed. Large JSON feeds will be decoded in memory. Install with: pip install ijson")
+
+SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+# Exceptions raised for malformed or truncated documents by either decoder
+DECODE_ERRORS = (ValueError, ijson.JSONError) if IJSON_AVAILABLE else (ValueError,)
+
+class StreamingJSONDocument:
+    """
+    Stream the records of one top-level array in a JSON object.
+
+    Args:
+        stream: Binary file-like object (e.g. a requests response.raw)
+        items_key: Top-level key of the array to stream (e.g. 'vulnerabilities')
+
+    Attributes:
+        header: Top-level scalar fields that appear before the array
+    """
+
+    def __init__(self, stream, items_key):
+        self.items_key = items_key
+        self.header = {}
+        self._fallback_items = None
+
+        if IJSON_AVAILABLE:
+            self._events = ijson.parse(stream, use_float=True)
+            self._read_header()
+        else:
+            document = json.load(stream)
+            self.header = {
+                key: value for key, value in document.items()
+                if key != items_key and not isinstance(value, (list, dict))
+            }
+            self._fallback_items = document.get(items_key) or []
+
+    def _read_header(self):
+        """Consume events up to the start of the items array, collecting top-level scalars."""
+        for prefix, event, value in self._events:
+            if prefix == self.items_key and event == 'start_array':
+                return
+            if prefix and '.' not in prefix and event in SCALAR_EVENTS:
+                self.header[prefix] = value
+        # The document has no items array
+        self._events = iter(())
+
+    def items(self):
+        """Yield each record of the items array as a Python object."""
+        if self._fallback_items is not None:
+            yield from self._fallback_items
+            return
+
+        item_prefix = f"{self.items_key}.item"
+        builder = None
+        for prefix, event, value in self._events:
+            if prefix == self.items_key and event == 'end_array':
+                return
+            if builder is None:
+                builder = ObjectBuilder()
+            builder.event(event, value)
+            # A record is complete when its own container closes (or it is a bare scalar)
+            if prefix == item_prefix and event in ('end_map', 'end_array') + SCALAR_EVENTS:
+                yield builder.value
+                builder = None
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items from any iterable without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
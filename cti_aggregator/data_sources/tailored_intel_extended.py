@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 """
 Module for fetching and processing extended CrowdStrike Tailored Intelligence data.
-This module extends the existing tailored_intelligence.py to include additional fields:
+This module extends the existing tailored_intelligence.py with the Intel
+indicators feed and its additional fields:
 - Source
 - Hit Type
 - Matched rule names
 - Details
 - First Seen
 
-It uses the FalconPy API to fetch data from CrowdStrike.
+Indicators are streamed page by page (published_date cursor, oldest first),
+their details fetched in bounded concurrent chunks, and each page bulk upserted
+into the Indicator table keyed by (type, normalized value). It uses the FalconPy API to fetch data from CrowdStrike.
 """
 
 import os
@@ -16,7 +19,8 @@ import sys
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -44,6 +48,11 @@ try:
 except ImportError:
     logger.warning("python-dotenv not installed. Environment variables must be set manually.")
 
+from data_sources import falcon_client
+from data_sources.falcon_paging import (
+    RateLimiter, FalconAPIError, call_with_rate_limit, iter_pages, iter_entities
+)
+
 # Try to import FalconPy
 try:
     from falconpy import Intel
@@ -59,39 +68,120 @@ try:
     django.setup()
     
     # Import models
-    from ioc_scraper.models import CrowdStrikeTailoredIntel
+    from django.db import transaction
+    from ioc_scraper.models import Indicator
+    from ioc_scraper.indicators import normalize_indicator
+    from ioc_scraper.crowdstrike_sync import INDICATORS_SYNC_KEY, get_cursor, advance_cursor, to_datetime
     DJANGO_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Django environment not available: {str(e)}")
     DJANGO_AVAILABLE = False
 
+# Indicator IDs per published_date query page
+INDICATOR_PAGE_SIZE = 5000
+# IDs per get_indicator_entities request (several run concurrently)
+INDICATOR_ENTITY_BATCH_SIZE = 500
+# Indicators upserted per INSERT ... ON CONFLICT statement
+INDICATOR_SAVE_CHUNK_SIZE = 1000
+
+INDICATOR_UPSERT_FIELDS = [
+    'indicator_id', 'indicator', 'ip_network', 'reversed_domain', 'source', 'malicious_confidence', 'matched_rule_names',
+    'details', 'first_seen', 'last_seen', 'published_date', 'last_updated',
+    'malware_families', 'threat_groups', 'reports',
+]
+
 def get_intel_client():
     """
-    Get a FalconPy Intel client instance with credentials from env variables.
+    Get the shared FalconPy Intel client with credentials from env variables.
     
     Returns:
         Intel: FalconPy Intel client instance or None if credentials are missing
     """
-    # Get API credentials from environment variables
-    client_id = os.environ.get('FALCON_CLIENT_ID')
-    client_secret = os.environ.get('FALCON_CLIENT_SECRET')
+    return falcon_client.get_intel_client()
+
+def process_indicator(indicator: Dict) -> Dict:
+    """Map a get_indicator_entities resource to the structure stored in the Indicator table."""
+    return {
+        "id": indicator.get("id", ""),
+        "indicator": indicator.get("indicator", ""),
+        "type": indicator.get("type", ""),
+        "source": indicator.get("source", ""),
+        "hit_type": indicator.get("malicious_confidence", ""),
+        "matched_rule_names": indicator.get("rule_names", []),
+        "details": indicator.get("description", ""),
+        "first_seen": indicator.get("first_seen", ""),
+        "last_seen": indicator.get("last_seen", ""),
+        "published_date": indicator.get("published_date", ""),
+        "last_updated": indicator.get("last_updated", ""),
+        "malware_families": indicator.get("malware_families", []),
+        "threat_groups": indicator.get("actors", []),
+        "reports": indicator.get("reports", []),
+    }
+
+def iter_indicator_pages(intel_client, since: Optional[int] = None, limiter: Optional[RateLimiter] = None,
+                         page_size: int = INDICATOR_PAGE_SIZE) -> Iterator[List[Dict]]:
+    """
+    Yield processed indicators one ID page at a time, oldest published_date first.
     
-    if not client_id or not client_secret:
-        logger.error("CrowdStrike API credentials not found in environment variables")
-        logger.error("Please set FALCON_CLIENT_ID and FALCON_CLIENT_SECRET in your .env file")
-        return None
+    Pages are selected with published_date:>=<cursor> rather than deep offsets:
+    after each page the cursor moves to the page's newest published_date, and
+    indicators already yielded at that timestamp are skipped on the next page.
+    Offsets are only used to step through a tie group larger than a page.
+    Failed requests raise FalconAPIError so a sync never skips a gap.
     
-    try:
-        # Initialize the Intel API client
-        intel_client = Intel(client_id=client_id, client_secret=client_secret)
-        return intel_client
-    except Exception as e:
-        logger.error(f"Error initializing Intel client: {str(e)}")
-        return None
+    Args:
+        intel_client: Falcon Intel client
+        since: Only indicators published at or after this epoch timestamp (all if None)
+        limiter: Shared RateLimiter (one is created if omitted)
+        page_size: Indicator IDs per query page
+    """
+    limiter = limiter or RateLimiter()
+    cursor = since
+    offset = 0
+    seen_at_cursor = set()
+    
+    while True:
+        params = {'sort': 'published_date|asc', 'limit': page_size, 'offset': offset}
+        if cursor is not None:
+            params['filter'] = f"published_date:>={int(cursor)}"
+        
+        response = call_with_rate_limit(intel_client.query_indicator_ids, limiter, **params)
+        if response["status_code"] != 200:
+            error_msg = response.get("body", {}).get("errors", ["Unknown error"])
+            raise FalconAPIError(f"Failed to query indicators after {cursor}: {error_msg}")
+        
+        ids = response["body"].get("resources") or []
+        new_ids = [indicator_id for indicator_id in ids if indicator_id not in seen_at_cursor]
+        if not new_ids:
+            if len(ids) < page_size:
+                return
+            # A full page of already-seen IDs: step past them within the tie group
+            offset += len(ids)
+            continue
+        
+        page = [
+            process_indicator(entity)
+            for entity in iter_entities(intel_client.get_indicator_entities, new_ids, limiter=limiter,
+                                        batch_size=INDICATOR_ENTITY_BATCH_SIZE, strict=True)
+        ]
+        if page:
+            yield page
+        
+        if len(ids) < page_size:
+            return
+        
+        newest = max((p["published_date"] for p in page if p["published_date"] not in (None, "")), default=None)
+        if newest is None or newest == cursor:
+            offset += len(ids)
+            seen_at_cursor.update(new_ids)
+        else:
+            cursor = newest
+            offset = 0
+            seen_at_cursor = {p["id"] for p in page if p["published_date"] == newest}
 
 def fetch_extended_tailored_intel(limit: int = 100) -> List[Dict]:
     """
-    Fetch extended tailored intelligence data from CrowdStrike API.
+    Fetch the most recently published indicators with extended fields from CrowdStrike API.
     
     Args:
         limit: Maximum number of indicators to fetch
@@ -109,66 +199,20 @@ def fetch_extended_tailored_intel(limit: int = 100) -> List[Dict]:
         return []
     
     try:
-        # Query for indicators
-        query_params = {
-            "limit": limit,
-            "sort": "first_seen.desc"  # Sort by first seen date, newest first
-        }
-        
-        response = intel_client.query_intel_indicators_v1(**query_params)
-        
-        if response["status_code"] != 200:
-            logger.error(f"Failed to query indicators: {response}")
-            return []
-        
-        if not response["body"]["resources"] or len(response["body"]["resources"]) == 0:
-            logger.warning("No indicators found")
-            return []
-        
-        logger.info(f"Found {len(response['body']['resources'])} indicators")
-        
-        # Get details for the indicators
-        indicator_ids = response["body"]["resources"]
-        
-        # Get details for each indicator
-        details_params = {
-            "ids": indicator_ids
-        }
-        
-        details_response = intel_client.get_intel_indicators_entities_v1(**details_params)
-        
-        if details_response["status_code"] != 200:
-            logger.error(f"Failed to get indicator details: {details_response}")
-            return []
-        
-        if not details_response["body"]["resources"] or len(details_response["body"]["resources"]) == 0:
-            logger.warning("No indicator details found")
-            return []
-        
-        # Process the results
-        indicators = details_response["body"]["resources"]
-        logger.info(f"Retrieved details for {len(indicators)} indicators")
-        
-        # Transform the data into our expected format
+        limiter = RateLimiter()
         processed_indicators = []
-        for indicator in indicators:
-            processed = {
-                "id": indicator.get("id", ""),
-                "indicator": indicator.get("indicator", ""),
-                "type": indicator.get("type", ""),
-                "source": indicator.get("source", ""),
-                "hit_type": indicator.get("malicious_confidence", ""),
-                "matched_rule_names": indicator.get("rule_names", []),
-                "details": indicator.get("description", ""),
-                "first_seen": indicator.get("first_seen", ""),
-                "last_seen": indicator.get("last_seen", ""),
-                "published_date": indicator.get("published_date", ""),
-                "malware_families": indicator.get("malware_families", []),
-                "threat_groups": indicator.get("actors", []),
-                "raw_data": indicator
-            }
-            processed_indicators.append(processed)
+        for ids in iter_pages(intel_client.query_indicator_ids, limiter, page_size=min(limit, INDICATOR_PAGE_SIZE),
+                              max_items=limit, sort='published_date|desc'):
+            processed_indicators.extend(
+                process_indicator(entity)
+                for entity in iter_entities(intel_client.get_indicator_entities, ids, limiter=limiter,
+                                            batch_size=INDICATOR_ENTITY_BATCH_SIZE)
+            )
         
+        if not processed_indicators:
+            logger.warning("No indicators found")
+        else:
+            logger.info(f"Retrieved details for {len(processed_indicators)} indicators")
         return processed_indicators
     
     except Exception as e:
@@ -177,51 +221,67 @@ def fetch_extended_tailored_intel(limit: int = 100) -> List[Dict]:
         traceback.print_exc()
         return []
 
-def update_model_for_extended_fields():
+def _upsert_indicators(indicators: Iterable[Dict]) -> Tuple[int, int]:
     """
-    Update the Django model to support the extended fields.
-    This function should be called once to migrate the database.
-    
-    Note: In a production environment, you would use Django migrations instead.
+    Bulk upsert processed indicators INDICATOR_SAVE_CHUNK_SIZE at a time.
+    Database errors propagate so callers can roll back (e.g. with the sync cursor).
     """
-    if not DJANGO_AVAILABLE:
-        logger.error("Django not available, cannot update model")
-        return False
+    created_count = 0
+    updated_count = 0
+    iterator = iter(indicators)
     
-    try:
-        from django.db import models
-        
-        # Check if the model already has the extended fields
-        model_fields = [f.name for f in CrowdStrikeTailoredIntel._meta.get_fields()]
-        
-        # List of fields to add
-        new_fields = [
-            ('source', models.CharField(max_length=255, null=True, blank=True)),
-            ('hit_type', models.CharField(max_length=255, null=True, blank=True)),
-            ('matched_rule_names', models.JSONField(default=list, null=True, blank=True)),
-            ('details', models.TextField(null=True, blank=True)),
-            ('first_seen', models.DateTimeField(null=True, blank=True))
-        ]
+    while True:
+        chunk = list(islice(iterator, INDICATOR_SAVE_CHUNK_SIZE))
+        if not chunk:
+            break
         
-        # Add fields that don't already exist
-        for field_name, field_type in new_fields:
-            if field_name not in model_fields:
-                logger.info(f"Adding field {field_name} to CrowdStrikeTailoredIntel model")
-                field_type.contribute_to_class(CrowdStrikeTailoredIntel, field_name)
+        objs = {}
+        for indicator in chunk:
+            if not indicator.get("id"):
+                continue
+            indicator_type = indicator["type"] or ""
+            normalized = normalize_indicator(indicator["indicator"] or indicator["id"], indicator_type)
+            objs[(indicator_type, normalized["normalized_value"])] = Indicator(
+                indicator_id=indicator["id"],
+                indicator=indicator["indicator"] or indicator["id"],
+                indicator_type=indicator_type,
+                **normalized,
+                source=indicator["source"] or None,
+                malicious_confidence=indicator["hit_type"] or None,
+                matched_rule_names=indicator["matched_rule_names"] or [],
+                details=indicator["details"] or None,
+                first_seen=to_datetime(indicator["first_seen"]),
+                last_seen=to_datetime(indicator["last_seen"]),
+                published_date=to_datetime(indicator["published_date"]),
+                last_updated=to_datetime(indicator.get("last_updated")),
+                malware_families=indicator["malware_families"] or [],
+                threat_groups=indicator["threat_groups"] or [],
+                reports=indicator.get("reports") or [],
+            )
+        if not objs:
+            continue
         
-        logger.info("Model updated successfully")
-        return True
+        existing = set(
+            Indicator.objects.filter(normalized_value__in=[value for _, value in objs])
+            .values_list('indicator_type', 'normalized_value')
+        ) & set(objs)
+        Indicator.objects.bulk_create(
+            list(objs.values()),
+            update_conflicts=True,
+            unique_fields=['indicator_type', 'normalized_value'],
+            update_fields=INDICATOR_UPSERT_FIELDS,
+        )
+        created_count += len(objs) - len(existing)
+        updated_count += len(existing)
     
-    except Exception as e:
-        logger.error(f"Error updating model: {str(e)}")
-        return False
+    return created_count, updated_count
 
-def save_extended_tailored_intel(indicators: List[Dict]) -> Tuple[int, int]:
+def save_extended_tailored_intel(indicators: Iterable[Dict]) -> Tuple[int, int]:
     """
-    Save extended tailored intelligence data to the database.
+    Save extended tailored intelligence indicators to the Indicator table.
     
     Args:
-        indicators: List of processed indicators
+        indicators: Processed indicators (any iterable; consumed in chunks)
         
     Returns:
         Tuple of (created_count, updated_count)
@@ -230,39 +290,9 @@ def save_extended_tailored_intel(indicators: List[Dict]) -> Tuple[int, int]:
         logger.error("Django not available, cannot save to database")
         return (0, 0)
     
-    created_count = 0
-    updated_count = 0
-    
     try:
-        # Update the model to support extended fields
-        update_model_for_extended_fields()
-        
-        # Save each indicator
-        for indicator in indicators:
-            # Try to get existing record or create a new one
-            obj, created = CrowdStrikeTailoredIntel.objects.update_or_create(
-                report_id=indicator["id"],
-                defaults={
-                    'title': indicator["indicator"],
-                    'summary': indicator["details"],
-                    'publish_date': indicator["published_date"] or indicator["first_seen"],
-                    'last_updated': indicator["last_seen"],
-                    'report_url': f"https://falcon.crowdstrike.com/intelligence/indicators/{indicator['id']}",
-                    'threat_groups': ','.join(indicator["threat_groups"]) if indicator["threat_groups"] else '',
-                    'threat_groups_json': indicator["threat_groups"],
-                    'source': indicator["source"],
-                    'hit_type': indicator["hit_type"],
-                    'matched_rule_names': indicator["matched_rule_names"],
-                    'details': indicator["details"],
-                    'first_seen': indicator["first_seen"]
-                }
-            )
-            
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-        
+        with transaction.atomic():
+            created_count, updated_count = _upsert_indicators(indicators)
         logger.info(f"Saved {created_count} new and updated {updated_count} existing indicators")
         return (created_count, updated_count)
     
@@ -272,6 +302,46 @@ def save_extended_tailored_intel(indicators: List[Dict]) -> Tuple[int, int]:
         traceback.print_exc()
         return (0, 0)
 
+def sync_indicators(intel_client=None) -> Dict[str, Any]:
+    """
+    Incrementally sync indicators published since the stored cursor into the database.
+    
+    Each page is upserted in one transaction together with the advanced
+    published_date cursor, so memory is bounded by one page and a failed run
+    resumes after the last page it stored.
+    
+    Returns:
+        dict: Status, created/updated counts and the new cursor
+    """
+    if not FALCONPY_AVAILABLE or not DJANGO_AVAILABLE:
+        logger.error("FalconPy or Django not available, cannot sync indicators")
+        return {"status": "error", "created": 0, "updated": 0}
+    
+    intel_client = intel_client or get_intel_client()
+    if not intel_client:
+        return {"status": "error", "created": 0, "updated": 0}
+    
+    cursor = get_cursor(INDICATORS_SYNC_KEY)
+    created_count = 0
+    updated_count = 0
+    
+    for page in iter_indicator_pages(intel_client, since=cursor):
+        with transaction.atomic():
+            created, updated = _upsert_indicators(page)
+            cursor = advance_cursor(
+                INDICATORS_SYNC_KEY,
+                [to_datetime(indicator["published_date"]) for indicator in page],
+            )
+        created_count += created
+        updated_count += updated
+        logger.info(f"Stored {len(page)} indicators (cursor {cursor})")
+    
+    if created_count + updated_count == 0:
+        logger.info(f"No indicators published since cursor {cursor}")
+        return {"status": "unchanged", "created": 0, "updated": 0, "cursor": cursor}
+    
+    return {"status": "success", "created": created_count, "updated": updated_count, "cursor": cursor}
+
 def run_update(limit: int = 100) -> List[Dict]:
     """
     Run the extended tailored intelligence update process.
@@ -303,8 +373,12 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Extended Tailored Intelligence Update Tool")
     parser.add_argument("--limit", type=int, default=100, help="Maximum number of indicators to fetch")
+    parser.add_argument("--sync", action="store_true", help="Sync every indicator published since the stored cursor")
     
     args = parser.parse_args()
     
-    indicators = run_update(args.limit)
-    print(f"Updated {len(indicators)} extended tailored intelligence indicators") 
\ No newline at end of file
+    if args.sync:
+        print(f"Indicator sync: {sync_indicators()}")
+    else:
+        indicators = run_update(args.limit)
+        print(f"Updated {len(indicators)} extended tailored intelligence indicators") 
\ No newline at end of file
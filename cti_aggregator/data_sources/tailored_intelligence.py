@@ -11,10 +11,12 @@ import json
 import logging
 from datetime import datetime, timedelta
 import redis
+from datetime import timezone as dt_timezone
+from itertools import islice
 from uuid import uuid4
 import django
 import random
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 # Load environment variables from .env file
 try:
@@ -36,12 +38,17 @@ django.setup()
 
 # Import models after Django setup
 from ioc_scraper.models import CrowdStrikeTailoredIntel
+from ioc_scraper.crowdstrike_sync import (
+    TAILORED_INTEL_SYNC_KEY, get_cursor, modified_since_params, advance_cursor, unseen_at_cursor
+)
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 # Try to import FalconPy, handle if not available
 try:
     from falconpy import Intel
-    from falconpy import APIHarness
     FALCONPY_AVAILABLE = True
 except ImportError:
     print("Could not import FalconPy. Install with: pip install falconpy")
@@ -85,13 +92,6 @@ try:
     # Import models
     from ioc_scraper.models import CrowdStrikeTailoredIntel
     
-    # Import Redis cache
-    from ioc_scraper.redis_cache import (
-        cache_tailored_intelligence,
-        get_tailored_intelligence,
-        clear_tailored_intelligence_cache
-    )
-    
     DJANGO_AVAILABLE = True
     logger.info("Django environment set up successfully")
 except ImportError as e:
@@ -101,6 +101,29 @@ except Exception as e:
     DJANGO_AVAILABLE = False
     logger.warning(f"Error setting up Django environment: {str(e)}")
 
+# Optional Redis cache helpers (only used by run_tests); their absence must not disable Django
+try:
+    from ioc_scraper.redis_cache import (
+        cache_tailored_intelligence,
+        get_tailored_intelligence,
+        clear_tailored_intelligence_cache
+    )
+except ImportError:
+    pass
+
+from data_sources.falcon_client import get_intel_client
+from data_sources.falcon_paging import (
+    RateLimiter, iter_pages, iter_entity_batches, ENTITY_BATCH_SIZE, FALCON_MAX_WORKERS
+)
+
+# Reports upserted per statement when saving a stream of reports
+SAVE_CHUNK_SIZE = 200
+
+UPSERT_FIELDS = [
+    'title', 'publish_date', 'last_updated', 'summary', 'report_url',
+    'threat_groups', 'targeted_sectors', 'threat_groups_json', 'targeted_sectors_json',
+]
+
 # Sample data for testing
 SAMPLE_THREAT_GROUPS = [
     "FANCY BEAR", "COZY BEAR", "LAZARUS GROUP", "APT29", "APT28", 
@@ -113,35 +136,140 @@ SAMPLE_SECTORS = [
 ]
 
 def get_falcon_api():
-    """Get a FalconAPI instance with credentials from env variables."""
-    import os
+    """Get the shared Falcon Intel client with credentials from env variables."""
+    falcon = get_intel_client()
+    if falcon is None:
+        # Debug information
+        logger.info("Current working directory: " + os.getcwd())
+    return falcon
+
+def _to_datetime(value):
+    """Convert a Falcon epoch timestamp or ISO string to an aware datetime (None if unparseable)."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value if timezone.is_aware(value) else timezone.make_aware(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        parsed_date = parse_date(str(value))
+        if parsed_date is None:
+            return None
+        parsed = datetime.combine(parsed_date, datetime.min.time())
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+def process_api_report(report):
+    """Transform one Falcon Intel report entity into the normalized report dict."""
+    processed_report = {
+        "id": report.get("id", ""),
+        "name": report.get("name", ""),
+        "publish_date": report.get("created_date", ""),
+        "last_updated": report.get("last_modified_date", ""),
+        "summary": report.get("short_description", report.get("description", "")),
+        "url": report.get("url", ""),
+        "threat_groups": [actor.get("name", "") for actor in report.get("actors", [])],
+        "targeted_sectors": [industry.get("value", "") for industry in report.get("target_industries", [])],
+        "nation_affiliations": [origin.get("value", "") for origin in report.get("origins", [])
+                              if origin.get("type", "") == "country"],
+        "targeted_countries": [country.get("value", "") for country in report.get("target_countries", [])],
+        "raw_data": report
+    }
+    
+    # Extract tags if available
+    if "tags" in report:
+        processed_report["tags"] = report["tags"]
+    
+    return processed_report
+
+def _stored_last_updated(report_ids):
+    """Return {report_id: last_updated} for the given reports already in the database."""
+    if not DJANGO_AVAILABLE:
+        return {}
+    return dict(
+        CrowdStrikeTailoredIntel.objects.filter(report_id__in=report_ids).values_list('report_id', 'last_updated')
+    )
+
+def _has_stored_reports():
+    """Whether any tailored intelligence reports are already in the database."""
+    return DJANGO_AVAILABLE and CrowdStrikeTailoredIntel.objects.exists()
+
+def iter_report_pages(falcon, max_reports=None, params=None, skip_unchanged=True, stop_at_unchanged=True,
+                      batch_size=ENTITY_BATCH_SIZE, max_workers=FALCON_MAX_WORKERS, strict=False):
+    """
+    Yield processed tailored intelligence reports from the Falcon Intel API, one list per ID page.
     
-    # Check for environment variables
-    client_id = os.environ.get('FALCON_CLIENT_ID')
-    client_secret = os.environ.get('FALCON_CLIENT_SECRET')
+    Report IDs are paged with offset pagination (newest-modified first unless
+    params say otherwise). Each page's entities are fetched concurrently in
+    batches of batch_size on a bounded pool that honours the Falcon rate-limit
+    headers.
     
-    if not client_id or not client_secret:
-        logger.error("CrowdStrike API credentials not found in environment variables")
-        logger.error("Please set FALCON_CLIENT_ID and FALCON_CLIENT_SECRET in your .env file")
+    Args:
+        falcon: Falcon Intel API instance
+        max_reports: Maximum number of report IDs to page through (None for all)
+        params: Query parameters (sort, FQL filter); defaults to newest-modified first
+        skip_unchanged: Leave out stored reports whose last_updated matches the API
+        stop_at_unchanged: Stop after the first entity batch containing such a
+            report (only valid for newest-first order, where everything older is
+            unchanged too); batches are then consumed in ID order
+        batch_size: Number of report entities requested per API call
+        max_workers: Maximum concurrent entity requests
+        strict: Raise FalconAPIError on a failed request instead of skipping it
+    """
+    limiter = RateLimiter()
+    params = params or {"sort": "last_modified_date.desc"}
+    logger.info(f"Querying for intelligence report IDs ({params})...")
+    
+    for page_number, report_ids in enumerate(
+        iter_pages(falcon.query_report_ids, limiter=limiter, max_items=max_reports, strict=strict, **params),
+        start=1,
+    ):
+        logger.info(f"Processing page {page_number} with {len(report_ids)} report IDs...")
+        stored = _stored_last_updated(report_ids) if skip_unchanged else {}
+        reached_known = False
+        page = []
+        
+        batches = iter_entity_batches(falcon.get_report_entities, report_ids, limiter=limiter,
+                                      batch_size=batch_size, max_workers=max_workers, strict=strict,
+                                      ordered=stop_at_unchanged)
+        for batch in batches:
+            for report in batch:
+                try:
+                    processed_report = process_api_report(report)
+                except Exception as e:
+                    logger.error(f"Error processing report {report.get('id', 'unknown')}: {str(e)}")
+                    continue
+                
+                report_id = processed_report["id"]
+                if report_id in stored and stored[report_id] == _to_datetime(processed_report["last_updated"]):
+                    reached_known = True
+                    continue
+                page.append(processed_report)
+            
+            if reached_known and stop_at_unchanged:
+                # Later batches hold older reports, so none of them changed either
+                batches.close()
+                break
         
-        # Debug information
-        logger.info("Available environment variables: " + ", ".join(list(os.environ.keys())))
-        logger.info("Current working directory: " + os.getcwd())
+        yield page
         
-        return None
+        if reached_known and stop_at_unchanged:
+            logger.info(f"Reached already-stored unchanged reports on page {page_number}, stopping")
+            return
+
+def iter_tailored_intel(falcon, max_reports=None, skip_unchanged=True,
+                        batch_size=ENTITY_BATCH_SIZE, max_workers=FALCON_MAX_WORKERS):
+    """
+    Yield processed tailored intelligence reports, newest-modified first.
     
-    try:
-        # Use FalconPy SDK for API access
-        from falconpy import APIHarness
-        falcon = APIHarness(client_id=client_id, client_secret=client_secret)
-        logger.info("Successfully initialized Falcon API connection")
-        return falcon
-    except ImportError:
-        logger.error("FalconPy library not installed. Please install it with: pip install crowdstrike-falconpy")
-        return None
-    except Exception as e:
-        logger.error(f"Error initializing Falcon API: {str(e)}")
-        return None
+    With skip_unchanged, reports whose stored last_updated matches the API are
+    not yielded, and paging stops after the first entity batch that contains
+    one: the sort order guarantees everything older is unchanged as well.
+    """
+    for page in iter_report_pages(falcon, max_reports=max_reports, skip_unchanged=skip_unchanged,
+                                  stop_at_unchanged=skip_unchanged, batch_size=batch_size,
+                                  max_workers=max_workers):
+        yield from page
 
 def fetch_tailored_intel(api_client_id=None, api_client_secret=None, base_url=None, falcon=None, use_cache=True):
     """
@@ -155,7 +283,8 @@ def fetch_tailored_intel(api_client_id=None, api_client_secret=None, base_url=No
         use_cache (bool, optional): Whether to use caching. Defaults to True.
         
     Returns:
-        list: List of tailored intelligence reports
+        list: New and changed tailored intelligence reports (empty when every
+        report is already stored unchanged)
     """
     if not FALCONPY_AVAILABLE:
         logger.error("FalconPy library not installed. Using sample data for testing.")
@@ -183,101 +312,21 @@ def fetch_tailored_intel(api_client_id=None, api_client_secret=None, base_url=No
     try:
         logger.info("Initializing connection to CrowdStrike Falcon API")
         
-        # Create the API client using the Intel class specifically
+        # Reuse the process-wide Intel client (shared, cached token)
         if not falcon:
-            from falconpy import Intel
-            # If base_url is None, use the default US Cloud URL
-            base_url = base_url or 'https://api.crowdstrike.com'
-            falcon = Intel(client_id=api_client_id,
-                         client_secret=api_client_secret,
-                         base_url=base_url)
-        
-        # Query for report IDs first using the standard Intel.query_report_ids method
-        logger.info("Querying for intelligence report IDs...")
-        
-        # Prepare parameters for the query
-        params = {
-            "limit": 100,  # Maximum number of reports to retrieve
-            "sort": "created_date.desc",  # Sort by creation date, newest first
-        }
-        
-        # Query for report IDs
-        response = falcon.query_report_ids(**params)
+            falcon = get_intel_client(api_client_id, api_client_secret, base_url)
         
-        # Check if the request was successful
-        if response["status_code"] != 200:
-            error_msg = response.get("body", {}).get("errors", ["Unknown error"])
-            logger.error(f"API request failed: {error_msg}")
-            return generate_top_news_reports(10)
-        
-        # Extract report IDs from the response
-        report_ids = response["body"].get("resources", [])
-        
-        if not report_ids:
-            logger.warning("No intelligence report IDs returned from API")
-            return generate_top_news_reports(10)
-        
-        logger.info(f"Found {len(report_ids)} intelligence report IDs")
-        
-        # Initialize reports list
-        reports = []
+        # Page through every report, newest-modified first, stopping at the first stored unchanged one
+        processed_reports = list(iter_tailored_intel(falcon))
         
-        # Process reports in batches to avoid exceeding API limits
-        batch_size = 20
-        for i in range(0, len(report_ids), batch_size):
-            batch_ids = report_ids[i:i + batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1} with {len(batch_ids)} reports...")
-            
-            # Get details for each report using the Intel.get_report_entities method
-            batch_response = falcon.get_report_entities(ids=batch_ids)
-            
-            if batch_response["status_code"] != 200:
-                error_msg = batch_response.get("body", {}).get("errors", ["Unknown error"])
-                logger.error(f"Failed to fetch report details: {error_msg}")
-                continue
-            
-            batch_reports = batch_response["body"].get("resources", [])
-            if not batch_reports:
-                logger.warning(f"No report data returned for batch {i//batch_size + 1}")
-                continue
-                
-            logger.info(f"Successfully fetched {len(batch_reports)} reports in batch {i//batch_size + 1}")
-            reports.extend(batch_reports)
-        
-        # If we couldn't get any reports, use sample data
-        if not reports:
+        if not processed_reports:
+            if _has_stored_reports():
+                logger.info("No new or changed tailored intelligence reports")
+                return []
+            # If we couldn't get any reports, use sample data
             logger.warning("No report data could be retrieved from the API")
             return generate_top_news_reports(10)
         
-        # Process the fetched reports
-        processed_reports = []
-        for report in reports:
-            try:
-                # Extract and transform relevant fields
-                processed_report = {
-                    "id": report.get("id", ""),
-                    "name": report.get("name", ""),
-                    "publish_date": report.get("created_date", ""),
-                    "last_updated": report.get("last_modified_date", ""),
-                    "summary": report.get("short_description", report.get("description", "")),
-                    "url": report.get("url", ""),
-                    "threat_groups": [actor.get("name", "") for actor in report.get("actors", [])],
-                    "targeted_sectors": [industry.get("value", "") for industry in report.get("target_industries", [])],
-                    "nation_affiliations": [origin.get("value", "") for origin in report.get("origins", []) 
-                                          if origin.get("type", "") == "country"],
-                    "targeted_countries": [country.get("value", "") for country in report.get("target_countries", [])],
-                    "raw_data": report
-                }
-                
-                # Extract tags if available
-                if "tags" in report:
-                    processed_report["tags"] = report["tags"]
-                
-                processed_reports.append(processed_report)
-            except Exception as e:
-                logger.error(f"Error processing report {report.get('id', 'unknown')}: {str(e)}")
-                # Continue processing other reports
-        
         logger.info(f"Successfully processed {len(processed_reports)} intelligence reports")
         
         # Cache the results if caching is enabled
@@ -521,8 +570,77 @@ def generate_sample_data(count: int = 10) -> List[Dict]:
     
     return samples
 
-def save_to_database(reports: List[Dict]) -> Tuple[int, int]:
-    """Save reports to the database."""
+def _split_names(value):
+    """Accept a list or comma-separated string of names and return a clean list."""
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    return [v for v in (value or []) if v]
+
+def _build_report(report):
+    """Build an unsaved CrowdStrikeTailoredIntel from a normalized report dict (None if it has no ID)."""
+    report_id = report.get('id')
+    if not report_id:
+        logger.warning("Report missing ID, skipping")
+        return None
+    
+    threat_groups = _split_names(report.get('threat_groups', []))
+    targeted_sectors = _split_names(report.get('targeted_sectors', []))
+    now = timezone.now()
+    
+    return CrowdStrikeTailoredIntel(
+        report_id=report_id,
+        title=(report.get('name') or report.get('title') or 'Untitled Report')[:255],
+        publish_date=_to_datetime(report.get('publish_date', report.get('published_date'))) or now,
+        last_updated=_to_datetime(report.get('last_updated', report.get('last_update_date'))) or now,
+        summary=report.get('summary', report.get('description', '')),
+        report_url=report.get('url', report.get('report_url', '')),
+        # Keep updating the old text fields for backward compatibility
+        threat_groups=','.join(threat_groups),
+        targeted_sectors=','.join(targeted_sectors),
+        threat_groups_json=threat_groups,
+        targeted_sectors_json=targeted_sectors,
+    )
+
+def _upsert_reports(reports: List[Dict]) -> Tuple[int, int]:
+    """
+    Bulk upsert one chunk of normalized reports and their entity links.
+    Database errors propagate so callers can roll back (e.g. with the sync cursor).
+    """
+    objs = {}
+    for report in reports:
+        try:
+            obj = _build_report(report)
+        except Exception as e:
+            logger.error(f"Error saving report {report.get('id', 'unknown')}: {str(e)}")
+            continue
+        if obj is not None:
+            # Later duplicates in a chunk win, matching the old per-row upsert
+            objs[obj.report_id] = obj
+    if not objs:
+        return 0, 0
+    
+    existing = set(
+        CrowdStrikeTailoredIntel.objects.filter(report_id__in=list(objs)).values_list('report_id', flat=True)
+    )
+    saved_reports = CrowdStrikeTailoredIntel.objects.bulk_create(
+        list(objs.values()),
+        update_conflicts=True,
+        unique_fields=['report_id'],
+        update_fields=UPSERT_FIELDS,
+    )
+    
+    # Populate the normalized threat group / sector join tables in bulk
+    CrowdStrikeTailoredIntel.sync_entities(saved_reports)
+    
+    return len(objs) - len(existing), len(existing)
+
+def save_to_database(reports: Iterable[Dict]) -> Tuple[int, int]:
+    """
+    Save reports to the database.
+    
+    Reports may be any iterable, including the iter_tailored_intel generator; they
+    are upserted SAVE_CHUNK_SIZE at a time so only one chunk is held in memory.
+    """
     if not DJANGO_AVAILABLE:
         logger.warning("Django not available, skipping database save")
         return 0, 0
@@ -531,70 +649,22 @@ def save_to_database(reports: List[Dict]) -> Tuple[int, int]:
     updated_count = 0
     
     try:
-        for report in reports:
-            try:
-                # Get the report ID, using different keys based on the report format
-                report_id = report.get('id')
-                if not report_id:
-                    logger.warning("Report missing ID, skipping")
-                    continue
-                
-                # Get the title/name, with fallbacks
-                title = report.get('name', report.get('title', 'Untitled Report'))
-                
-                # Get dates with fallbacks
-                publish_date = report.get('publish_date', report.get('published_date', datetime.now().isoformat()))
-                last_updated = report.get('last_updated', report.get('last_update_date', datetime.now().isoformat()))
-                
-                # Get the URL with fallbacks
-                report_url = report.get('url', report.get('report_url', ''))
-                
-                # Get summary/description with fallbacks
-                summary = report.get('summary', report.get('description', ''))
-                
-                # Get threat groups and targeted sectors as lists
-                threat_groups = report.get('threat_groups', [])
-                if isinstance(threat_groups, str):
-                    threat_groups = [g.strip() for g in threat_groups.split(',') if g.strip()]
-                    
-                targeted_sectors = report.get('targeted_sectors', [])
-                if isinstance(targeted_sectors, str):
-                    targeted_sectors = [s.strip() for s in targeted_sectors.split(',') if s.strip()]
-                
-                # Try to get existing report or create a new one
-                obj, created = CrowdStrikeTailoredIntel.objects.update_or_create(
-                    report_id=report_id,
-                    defaults={
-                        'title': title,
-                        'publish_date': publish_date,
-                        'last_updated': last_updated,
-                        'summary': summary,
-                        'report_url': report_url,
-                        # Keep updating the old text fields for backward compatibility
-                        'threat_groups': ','.join(threat_groups) if threat_groups else '',
-                        'targeted_sectors': ','.join(targeted_sectors) if targeted_sectors else '',
-                        # Update the new JSON fields
-                        'threat_groups_json': threat_groups if threat_groups else [],
-                        'targeted_sectors_json': targeted_sectors if targeted_sectors else [],
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                    logger.debug(f"Created new report: {title}")
-                else:
-                    updated_count += 1
-                    logger.debug(f"Updated existing report: {title}")
-            except Exception as e:
-                logger.error(f"Error saving report {report.get('id', 'unknown')}: {str(e)}")
-                # Continue with other reports
+        iterator = iter(reports)
+        while True:
+            chunk = list(islice(iterator, SAVE_CHUNK_SIZE))
+            if not chunk:
+                break
+            
+            created, updated = _upsert_reports(chunk)
+            created_count += created
+            updated_count += updated
                 
         logger.info(f"Database update complete: {created_count} created, {updated_count} updated")
         return created_count, updated_count
     except Exception as e:
         logger.error(f"Error saving to database: {str(e)}")
         logger.exception(e)  # Log full traceback
-        return 0, 0
+        return created_count, updated_count
 
 def load_from_database() -> List[Dict]:
     """Load reports from the database."""
@@ -670,6 +740,10 @@ def run_update(use_cache: bool = True, force_refresh: bool = False) -> List[Dict
             use_cache=use_cache
         )
         
+        if not reports and _has_stored_reports():
+            logger.info("Stored tailored intelligence reports are up to date")
+            return load_from_database()
+        
         if not reports:
             logger.warning("No tailored intelligence reports fetched from API")
             logger.info("Using sample data as fallback")
@@ -700,6 +774,70 @@ def run_update(use_cache: bool = True, force_refresh: bool = False) -> List[Dict
         logger.info(f"Saved {len(sample_data)} sample reports to database: {created} created, {updated} updated")
         return sample_data
 
+def sync_tailored_intel(max_reports: Optional[int] = None,
+                        progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Incrementally sync tailored intelligence from the Falcon API into the database.
+    
+    Only reports modified after the stored cursor are requested (FQL
+    last_modified_date filter, oldest first). Each ID page is written in one
+    transaction together with the advanced cursor, so steady-state runs cost
+    API calls proportional to the number of changed reports, and a failed run
+    resumes after the last page it stored. Reports are never collected into a
+    list or cached, so worker memory is bounded by one page.
+    
+    Args:
+        max_reports: Stop after this many reports
+        progress: Called after each stored page with {"pages", "rows_written", "created", "updated", "cursor"}
+    
+    Returns:
+        dict: Status, created/updated counts and the new cursor
+    """
+    logger.info("Starting incremental tailored intelligence sync")
+    
+    client_id = os.environ.get('FALCON_CLIENT_ID')
+    client_secret = os.environ.get('FALCON_CLIENT_SECRET')
+    
+    if not FALCONPY_AVAILABLE or not client_id or not client_secret:
+        logger.error("FalconPy or CrowdStrike API credentials not available")
+        logger.info("Using sample data as fallback")
+        created, updated = save_to_database(generate_top_news_reports(15))
+        return {"status": "sample", "created": created, "updated": updated}
+    
+    falcon = get_intel_client(client_id, client_secret)
+    cursor = get_cursor(TAILORED_INTEL_SYNC_KEY)
+    created_count = 0
+    updated_count = 0
+    page_count = 0
+    
+    for page in iter_report_pages(falcon, max_reports=max_reports, params=modified_since_params(cursor),
+                                  skip_unchanged=False, stop_at_unchanged=False, strict=True):
+        with transaction.atomic():
+            # The inclusive cursor query returns the reports stored at the cursor second again
+            keep = unseen_at_cursor(
+                TAILORED_INTEL_SYNC_KEY, {report["id"]: _to_datetime(report["last_updated"]) for report in page},
+            )
+            page = [report for report in page if report["id"] in keep]
+            created, updated = _upsert_reports(page)
+            cursor = advance_cursor(
+                TAILORED_INTEL_SYNC_KEY,
+                [_to_datetime(report["last_updated"]) for report in page],
+                ids=[report["id"] for report in page],
+            )
+        created_count += created
+        updated_count += updated
+        page_count += 1
+        if progress:
+            progress({"pages": page_count, "rows_written": created_count + updated_count,
+                      "created": created_count, "updated": updated_count, "cursor": cursor})
+    
+    if created_count + updated_count == 0:
+        logger.info(f"No tailored intelligence reports modified since cursor {cursor}")
+        return {"status": "unchanged", "created": 0, "updated": 0, "cursor": cursor}
+    
+    logger.info(f"Successfully updated {created_count + updated_count} reports (cursor {cursor})")
+    return {"status": "success", "created": created_count, "updated": updated_count, "cursor": cursor}
+
 def run_tests() -> bool:
     """Run tests for the tailored intelligence module."""
     logger.info("Running tailored intelligence tests")
@@ -75,7 +75,7 @@ def test_query_tailored_intel_extended():
         
         # Test authentication
         logger.info("Testing API authentication...")
-        response = intel_client.query_intel_indicators_v1(limit=1)
+        response = intel_client.query_indicator_ids(limit=1)
         
         if response["status_code"] != 200:
             logger.error(f"Authentication failed: {response}")
@@ -89,10 +89,10 @@ def test_query_tailored_intel_extended():
         # First, query for indicators to get IDs
         query_params = {
             "limit": 10,  # Limit to 10 results for testing
-            "sort": "first_seen.desc"  # Sort by first seen date, newest first
+            "sort": "published_date|desc"  # Sort by published date, newest first
         }
         
-        response = intel_client.query_intel_indicators_v1(**query_params)
+        response = intel_client.query_indicator_ids(**query_params)
         
         if response["status_code"] != 200:
             logger.error(f"Failed to query indicators: {response}")
@@ -112,7 +112,7 @@ def test_query_tailored_intel_extended():
             "ids": indicator_ids
         }
         
-        details_response = intel_client.get_intel_indicators_entities_v1(**details_params)
+        details_response = intel_client.get_indicator_entities(**details_params)
         
         if details_response["status_code"] != 200:
             logger.error(f"Failed to get indicator details: {details_response}")
@@ -11,28 +11,36 @@ const API_BASE_URL =
     ? process.env.NEXT_PUBLIC_API_URL 
     : 'http://localhost:8000/api';
 
+// How often the liveness endpoint is polled while the dashboard is open
+const LIVENESS_POLL_INTERVAL = 30000;
+
 export function BackendConnectionCheck() {
   const [connectionStatus, setConnectionStatus] = useState<'checking' | 'connected' | 'disconnected'>('checking');
   const [retrying, setRetrying] = useState(false);
-  const [apiInfo, setApiInfo] = useState<any>(null);
 
   useEffect(() => {
     // Only run in browser
     if (typeof window !== 'undefined') {
       checkApiConnection();
+      // Background polls update the status without showing the "checking" state
+      const intervalId = setInterval(() => checkApiConnection(true), LIVENESS_POLL_INTERVAL);
+      return () => clearInterval(intervalId);
     }
   }, []);
 
-  const checkApiConnection = async () => {
+  const checkApiConnection = async (background = false) => {
     try {
-      setConnectionStatus('checking');
-      setRetrying(true);
+      if (!background) {
+        setConnectionStatus('checking');
+        setRetrying(true);
+      }
 
       // Use a timeout to avoid waiting too long
       const controller = new AbortController();
       const timeoutId = setTimeout(() => controller.abort(), 3000);
 
-      const response = await fetch(`${API_BASE_URL}/health-check/`, {
+      // Liveness endpoint: answered by the web process without touching the database
+      const response = await fetch(`${API_BASE_URL}/livez/`, {
         method: 'HEAD',
         signal: controller.signal
       }).catch(() => null);
@@ -41,17 +49,6 @@ export function BackendConnectionCheck() {
 
       if (response && response.ok) {
         setConnectionStatus('connected');
-        
-        // Get more detailed API info
-        try {
-          const infoResponse = await fetch(`${API_BASE_URL}/health-check/`);
-          if (infoResponse.ok) {
-            const data = await infoResponse.json();
-            setApiInfo(data);
-          }
-        } catch (error) {
-          console.error("Error fetching API details:", error);
-        }
       } else {
         setConnectionStatus('disconnected');
       }
@@ -59,7 +56,9 @@ export function BackendConnectionCheck() {
       console.error("API connection check failed:", error);
       setConnectionStatus('disconnected');
     } finally {
-      setRetrying(false);
+      if (!background) {
+        setRetrying(false);
+      }
     }
   };
 
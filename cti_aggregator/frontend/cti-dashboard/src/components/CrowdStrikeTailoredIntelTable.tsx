@@ -1,7 +1,7 @@
 "use client"
 
 import React, { useState, useEffect, useCallback } from 'react'
-import { fetchCrowdStrikeTailoredIntel, isErrorResponse, ApiErrorResponse, clearCache } from '@/lib/api'
+import { fetchCrowdStrikeTailoredIntel, refreshTailoredIntel, waitForTaskCompletion, isErrorResponse, ApiErrorResponse, clearCache } from '@/lib/api'
 import { format } from 'date-fns'
 import {
   Table,
@@ -114,15 +114,23 @@ export default function CrowdStrikeTailoredIntelTable() {
       if (forceRefresh) {
         setIsRefreshing(true);
         
-        // Call the refresh endpoint directly
+        // Queue the refresh and wait for the task to finish before reloading the table
         try {
-          const backendUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api';
-          const refreshResponse = await fetch(`${backendUrl}/refresh-tailored-intel/`);
+          const refresh = await refreshTailoredIntel();
           
-          if (!refreshResponse.ok) {
-            logger.error('Error refreshing tailored intelligence data');
+          if (!refresh.success || !refresh.taskId) {
+            logger.error(`Error refreshing tailored intelligence data: ${refresh.message}`);
           } else {
-            logger.info('Successfully refreshed tailored intelligence data');
+            const status = await waitForTaskCompletion(refresh.taskId, (progress) => {
+              if (progress.progress) {
+                logger.info(`Refresh in progress: ${progress.progress.pages} pages, ${progress.progress.rows_written} rows written`);
+              }
+            });
+            if (status.state === 'SUCCESS') {
+              logger.info('Successfully refreshed tailored intelligence data');
+            } else {
+              logger.error(`Tailored intelligence refresh ended in state ${status.state}`, status.error);
+            }
           }
         } catch (refreshError) {
           logger.error('Failed to call refresh endpoint', refreshError);
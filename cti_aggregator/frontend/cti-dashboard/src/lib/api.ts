@@ -267,11 +267,11 @@ async function isApiReachable(): Promise<boolean> {
   }
   
   try {
-    // Use a simple HEAD request to check if the API is reachable
+    // Use a HEAD request against the liveness endpoint (no database work on the server)
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 3000); // 3 second timeout
     
-    const response = await fetch(`${API_BASE_URL}/health-check/`, {
+    const response = await fetch(`${API_BASE_URL}/livez/`, {
       method: 'HEAD',
       signal: controller.signal,
     }).catch(() => null);
@@ -514,4 +514,85 @@ export async function refreshIntelligence(): Promise<{success: boolean, message:
       message: `Error refreshing intelligence: ${error instanceof Error ? error.message : 'Unknown error'}`
     };
   }
-}
\ No newline at end of file
+}
+/**
+ * State of a background task as reported by /task-status/ and /task-events/
+ */
+export interface TaskStatus {
+  task_id: string;
+  state: string;
+  ready: boolean;
+  progress?: {
+    pages: number;
+    rows_written: number;
+    created: number;
+    updated: number;
+  };
+  result?: unknown;
+  error?: string;
+}
+
+/**
+ * Queue a tailored intelligence refresh; joins the running refresh if there is one
+ */
+export async function refreshTailoredIntel(): Promise<{success: boolean, message: string, taskId?: string}> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/refresh-tailored-intel/`, {
+      method: 'POST',
+    });
+    const data = await response.json();
+    
+    if (!response.ok) {
+      return {
+        success: false,
+        message: data.message || `Refresh failed with status: ${response.status}`
+      };
+    }
+    
+    return {
+      success: true,
+      message: data.message,
+      taskId: data.task_id
+    };
+  } catch (error) {
+    console.error('Error refreshing tailored intelligence:', error);
+    return {
+      success: false,
+      message: `Error refreshing tailored intelligence: ${error instanceof Error ? error.message : 'Unknown error'}`
+    };
+  }
+}
+
+/**
+ * Wait for a background task to finish by polling /task-status/.
+ * Polling keeps no HTTP worker busy between requests; the /task-events/ stream
+ * is only for ASGI deployments. Resolves with the final status, or with the
+ * last known status if the timeout passes first.
+ */
+export async function waitForTaskCompletion(
+  taskId: string,
+  onProgress?: (status: TaskStatus) => void,
+  timeoutMs: number = 30 * 60 * 1000,
+  intervalMs: number = 2000
+): Promise<TaskStatus> {
+  let last: TaskStatus = { task_id: taskId, state: 'PENDING', ready: false };
+  const deadline = Date.now() + timeoutMs;
+
+  while (Date.now() < deadline) {
+    try {
+      const response = await fetch(`${API_BASE_URL}/task-status/${taskId}/`, { cache: 'no-store' });
+      if (response.ok) {
+        last = await response.json();
+        if (last.ready) {
+          return last;
+        }
+        onProgress?.(last);
+      }
+    } catch (error) {
+      // Keep polling through transient network errors until the deadline
+      console.warn('Error polling task status:', error);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+  return last;
+}